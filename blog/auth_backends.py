@@ -0,0 +1,72 @@
+import copy
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.db import transaction
+
+from blog.models import User
+
+USER_CACHE_KEY = "blog:user:{pk}"
+
+
+def user_cache_timeout():
+    return getattr(settings, "BLOG_USER_CACHE_TIMEOUT", 300)
+
+
+def invalidate_cached_user(pk):
+    """
+    Drop the cached user now and again once the current transaction
+    commits, so a concurrent request cannot re-cache the old row in the
+    meantime.
+    """
+
+    key = USER_CACHE_KEY.format(pk=pk)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def cacheable_user(user):
+    """
+    Return a copy of ``user`` to cache without its password hash.
+
+    The password is left out as a deferred field, so the copy still checks
+    or saves a password correctly (loading it first), and the session hash
+    derived from it is kept for the per-request session check.
+    """
+
+    cached = copy.copy(user)
+    cached.cached_session_auth_hash = user.get_session_auth_hash()
+    del cached.password
+    return cached
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that serves the user behind a session from the cache, so
+    authenticated requests do not fetch the user row every time.
+
+    Entries are dropped whenever the user is saved (which covers password
+    changes and last_login updates), deleted or logged out, and never hold
+    the password hash (see ``cacheable_user``).
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        user = super().authenticate(request, username, password, **kwargs)
+        if user is None and password is not None:
+            # Stops authenticate() from checking the same password again
+            # in the ModelBackend listed after this one.
+            raise PermissionDenied
+        return user
+
+    def get_user(self, user_id):
+        key = USER_CACHE_KEY.format(pk=user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = User._default_manager.get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            cache.set(key, cacheable_user(user), user_cache_timeout())
+        return user if self.user_can_authenticate(user) else None
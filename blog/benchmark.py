@@ -0,0 +1,145 @@
+import datetime
+import math
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from blog.models import (AuthorStats, Category, CategoryPostCount, Comment, Post, User,
+                         make_excerpt)
+from blog.search import get_search_backend
+from blog.timestamps import preserve_timestamps
+
+
+def percentile(values, pct):
+    """
+    Return the ``pct`` percentile of ``values`` using the nearest-rank method.
+    """
+
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(latencies, elapsed=None):
+    """
+    Summarize a list of per-request latencies (in seconds) as milliseconds,
+    plus throughput when the wall-clock ``elapsed`` time is given.
+    """
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    summary = {
+        "requests": len(latencies),
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+        "max_ms": ms(max(latencies) if latencies else None),
+    }
+    if elapsed:
+        summary["requests_per_second"] = round(len(latencies) / elapsed, 1)
+    return summary
+
+
+WORDS = (
+    "django python query index cache template render request response view "
+    "database replica cursor feed search comment post author category async "
+    "latency throughput benchmark profile memory allocation session token "
+    "stream worker process thread lock queue batch migration schema table "
+    "column row transaction commit rollback signal middleware router model "
+    "field manager serializer form widget static asset compress header "
+    "the a of and to in is for on with as by at from that this it be are"
+).split()
+
+
+def text(rng, mean_words, sigma=0.6):
+    """
+    Return filler text whose word count follows a log-normal distribution
+    around ``mean_words``, like real titles, posts and comments do.
+    """
+
+    count = max(1, round(rng.lognormvariate(math.log(mean_words), sigma)))
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def seed_dataset(users=50, categories=10, posts=1000, comments=5000, seed=0, password="benchmark"):
+    """
+    Bulk insert a synthetic, reproducible dataset and return the seeded
+    user emails, post ids and the password shared by every user.
+
+    Posts are spread over the last year and comments are skewed towards a
+    few popular posts. The denormalized counters and the search index are
+    filled in as the regular write paths would.
+    """
+
+    rng = random.Random(seed)
+    now = timezone.now()
+
+    def moment():
+        return now - datetime.timedelta(seconds=rng.randrange(365 * 24 * 60 * 60))
+
+    # Hashing is deliberately slow, so every user shares one hash.
+    password_hash = make_password(password)
+    user_objs = [
+        User(
+            email=f"user{index}@example.com",
+            first_name=text(rng, 1, 0.3).title(),
+            last_name=text(rng, 1, 0.3).title(),
+            password=password_hash,
+        )
+        for index in range(users)
+    ]
+    category_objs = [
+        Category(name=text(rng, 2, 0.3).title(), description=text(rng, 20))
+        for _ in range(categories)
+    ]
+    post_objs = []
+    for _ in range(posts):
+        content = "\n\n".join(text(rng, 80) for _ in range(rng.randint(1, 8)))
+        created_at = moment()
+        post_objs.append(Post(
+            title=text(rng, 7, 0.4)[:200],
+            content=content,
+            excerpt=make_excerpt(content),
+            author=rng.choice(user_objs),
+            category=rng.choice(category_objs) if category_objs and rng.random() < 0.9 else None,
+            created_at=created_at,
+            updated_at=created_at,
+        ))
+
+    comment_objs = []
+    if post_objs:
+        weights = [rng.paretovariate(1.2) for _ in post_objs]
+        for post in rng.choices(post_objs, weights, k=comments):
+            created_at = post.created_at + (now - post.created_at) * rng.random()
+            comment_objs.append(Comment(
+                post=post,
+                name=text(rng, 2, 0.3).title(),
+                body=text(rng, 30, 0.9),
+                created_at=created_at,
+                updated_at=created_at,
+            ))
+            post.comment_count += 1
+            if post.last_comment_at is None or created_at > post.last_comment_at:
+                post.last_comment_at = created_at
+
+    with transaction.atomic():
+        User.objects.bulk_create(user_objs, batch_size=500)
+        Category.objects.bulk_create(category_objs, batch_size=500)
+        with preserve_timestamps(Post):
+            Post.objects.bulk_create(post_objs, batch_size=500)
+        with preserve_timestamps(Comment):
+            Comment.objects.bulk_create(comment_objs, batch_size=500)
+        CategoryPostCount.objects.rebuild()
+        AuthorStats.objects.rebuild()
+    get_search_backend().rebuild()
+
+    return {
+        "emails": [user.email for user in user_objs],
+        "post_ids": [post.pk for post in post_objs],
+        "password": password,
+    }
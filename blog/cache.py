@@ -0,0 +1,294 @@
+import threading
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.models import AuthorStats, CategoryPostCount
+from blog.routers import replica_reads, replica_sticky_seconds
+
+POST_CARD_TEMPLATE = "blog/_post_card.html"
+POST_CARD_KEY = "blog:post-card:v3:{}"
+CONTENT_VERSION_KEY = "blog:version:{}"
+CATEGORY_SIDEBAR_KEY = "blog:category-sidebar:{}"
+AUTHOR_SUMMARY_KEY = "blog:author-summary:{}:{}"
+
+# Version scopes that expire, see content_version_timeout().
+EXPIRING_VERSION_SCOPES = ("day:",)
+
+
+class FragmentCacheStats:
+    """
+    Process-local hit/miss counters for a fragment cache.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def as_dict(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else None,
+        }
+
+
+post_card_stats = FragmentCacheStats()
+
+
+def post_card_key(post_id):
+    return POST_CARD_KEY.format(post_id)
+
+
+def post_card_version(post):
+    return f"{post.updated_at.isoformat()}:{post.comment_count}"
+
+
+def _cards_from_cache(keys, posts, cached, using=None):
+    cards = []
+    missing = {}
+    for key, post in zip(keys, posts):
+        version = post_card_version(post)
+        entry = cached.get(key)
+        if entry is not None and entry[0] == version:
+            cards.append(entry[1])
+            continue
+        # Jinja2 renders to a plain str; either way the card is markup.
+        html = mark_safe(render_to_string(POST_CARD_TEMPLATE, {"post": post}, using=using))
+        missing[key] = (version, html)
+        cards.append(html)
+    post_card_stats.record(len(keys) - len(missing), len(missing))
+    return cards, missing
+
+
+def post_card_timeout():
+    return getattr(settings, "BLOG_POST_CARD_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+def render_post_cards(posts, using=None):
+    """
+    Return the rendered card for each post, in order, rendering missing
+    cards with the template engine named ``using`` (any engine by default).
+
+    Cards are fetched from the cache in a single round trip and stored as
+    ``(version, html)`` pairs, where the version is derived from the post's
+    ``updated_at`` and comment count; only the missing or outdated ones are
+    rendered. Changes that do not touch the post row (author or category
+    renames) are handled by the signal receivers deleting the affected
+    entries. Cards are cached independently of the engine that rendered
+    them, as both produce the same markup.
+    """
+
+    keys = [post_card_key(post.pk) for post in posts]
+    cards, missing = _cards_from_cache(keys, posts, cache.get_many(keys), using)
+    if missing:
+        cache.set_many(missing, post_card_timeout())
+    return cards
+
+
+async def arender_post_cards(posts, using=None):
+    keys = [post_card_key(post.pk) for post in posts]
+    cards, missing = _cards_from_cache(keys, posts, await cache.aget_many(keys), using)
+    if missing:
+        await cache.aset_many(missing, post_card_timeout())
+    return cards
+
+
+def invalidate_post_cards(post_ids):
+    cache.delete_many([post_card_key(post_id) for post_id in post_ids])
+
+
+def get_content_version(scope="content"):
+    """
+    Return the version stamp of a content scope.
+
+    Versions are nanosecond timestamps replaced by ``bump_content_version``
+    whenever content in the scope changes, so they double as a
+    last-modified time. They are stored without expiry, except for the
+    per-day scopes of the windowed feeds (see ``content_version_timeout``).
+    A scope missing from the cache (first use, expiry, eviction, flush)
+    starts a fresh version, which at worst costs clients one full response.
+    """
+
+    return get_content_versions([scope])[scope]
+
+
+def content_version_timeout(scope):
+    # A year-long window reads hundreds of day scopes; they only key pages
+    # cached for BLOG_FEED_WINDOW_CACHE_TIMEOUT, so they need not outlive
+    # them.
+    if scope.startswith(EXPIRING_VERSION_SCOPES):
+        return getattr(settings, "BLOG_FEED_WINDOW_CACHE_TIMEOUT", 60 * 60 * 24)
+    return None
+
+
+def _set_content_versions(scopes, version):
+    by_timeout = defaultdict(dict)
+    for scope in scopes:
+        by_timeout[content_version_timeout(scope)][CONTENT_VERSION_KEY.format(scope)] = version
+    for timeout, versions in by_timeout.items():
+        cache.set_many(versions, timeout)
+
+
+def get_content_versions(scopes, exists=None):
+    """
+    Return a dict of the versions of ``scopes``, starting the missing ones
+    together in a single write.
+
+    Scopes named after an object (``author:<id>``) pass ``exists``, which
+    is called before any version is started: when it returns a false value
+    nothing is written and ``None`` is returned, so requests for unknown
+    ids leave no version keys behind.
+    """
+
+    keys = {CONTENT_VERSION_KEY.format(scope): scope for scope in scopes}
+    versions = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    missing = [scope for scope in keys.values() if scope not in versions]
+    if missing:
+        if exists is not None and not exists():
+            return None
+        # Overwriting a version bumped since the read above is harmless:
+        # the new stamp is just as fresh, and the caller reads the content
+        # only after this returns.
+        version = time.time_ns()
+        _set_content_versions(missing, version)
+        versions.update(dict.fromkeys(missing, version))
+    return versions
+
+
+def bump_content_version(*scopes):
+    """
+    Start a new version for each of the given scopes.
+    """
+
+    _set_content_versions(scopes, time.time_ns())
+
+
+def versions_settling(versions):
+    """
+    Return whether any of ``versions`` was started within the last
+    BLOG_REPLICA_STICKY_SECONDS, so the replicas may not have replayed the
+    change behind it yet. Always false without replicas.
+    """
+
+    if not getattr(settings, "DATABASE_REPLICAS", []):
+        return False
+    horizon = time.time_ns() - replica_sticky_seconds() * 1_000_000_000
+    return any(version > horizon for version in versions)
+
+
+def refill_reads(versions):
+    """
+    Return a context manager for the reads that refill a cache entry keyed
+    by ``versions``. While the versions are settling they go to the
+    primary, as a replica that has not replayed the change would get the
+    old rows cached under the new version; reads of unchanged scopes, and
+    everything else the request reads, stay on the replicas.
+    """
+
+    return replica_reads(False) if versions_settling(versions) else nullcontext()
+
+
+def bump_content_version_on_commit(*scopes, using=None):
+    """
+    Bump the given scopes once the current transaction on ``using``
+    commits, or right away outside one. Bumping earlier would let another
+    request read the old rows and cache them under the new version.
+    """
+
+    transaction.on_commit(lambda: bump_content_version(*scopes), using=using)
+
+
+def _category_sidebar_queryset():
+    return (
+        CategoryPostCount.objects.filter(post_count__gt=0)
+        .order_by("-post_count", "category__name")
+        .values("category_id", "category__name", "post_count")
+    )
+
+
+def get_category_sidebar(limit=20):
+    """
+    Return the categories with the most posts as dicts with the keys
+    ``category_id``, ``category__name`` and ``post_count``.
+
+    The list is read from the materialized counts and cached under the
+    content version, which every post and category change bumps.
+    """
+
+    version = get_content_version()
+    key = CATEGORY_SIDEBAR_KEY.format(version)
+    categories = cache.get(key)
+    if categories is None:
+        with refill_reads([version]):
+            categories = list(_category_sidebar_queryset()[:limit])
+        cache.set(key, categories, post_card_timeout())
+    return categories
+
+
+async def aget_category_sidebar(limit=20):
+    version = await sync_to_async(get_content_version)()
+    key = CATEGORY_SIDEBAR_KEY.format(version)
+    categories = await cache.aget(key)
+    if categories is None:
+        with refill_reads([version]):
+            categories = [row async for row in _category_sidebar_queryset()[:limit]]
+        await cache.aset(key, categories, post_card_timeout())
+    return categories
+
+
+def get_author_summary(author_id):
+    """
+    Return the name and post stats of an author as a dict, or ``None`` for
+    an unknown author.
+
+    The entry is keyed by the author's own version scope, which only their
+    post, profile and comment changes bump, so activity elsewhere on the
+    blog leaves it cached.
+    """
+
+    scope = f"author:{author_id}"
+    versions = get_content_versions(
+        [scope], exists=AuthorStats.objects.filter(pk=author_id).exists
+    )
+    if versions is None:
+        return None
+    key = AUTHOR_SUMMARY_KEY.format(author_id, versions[scope])
+    summary = cache.get(key)
+    if summary is None:
+        with refill_reads([versions[scope]]):
+            summary = (
+                AuthorStats.objects.filter(pk=author_id)
+                .values(
+                    "post_count",
+                    "last_post_at",
+                    id=F("user_id"),
+                    first_name=F("user__first_name"),
+                    last_name=F("user__last_name"),
+                )
+                .first()
+            )
+        if summary is None:
+            return None
+        cache.set(key, summary, post_card_timeout())
+    return summary
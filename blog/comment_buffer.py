@@ -0,0 +1,360 @@
+import atexit
+import datetime
+import fcntl
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.db import InterfaceError, OperationalError, connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from blog.ids import uuid7
+from blog.models import Comment, Post
+
+logger = logging.getLogger(__name__)
+
+PENDING_SESSION_KEY = "blog_pending_comments"
+PENDING_MAX_AGE = datetime.timedelta(hours=1)
+PENDING_LIMIT = 20
+
+# Subdirectory of the journal directory that segments which keep failing
+# to be written are moved to. replay_journals() does not look into it.
+DEAD_LETTER_DIR = "dead-letter"
+
+
+def write_comments(entries):
+    """
+    Insert the journaled comments that are not in the database yet, and
+    update the counters of their posts. Returns the number of inserted
+    comments.
+
+    Entries that were written before, or whose post has been deleted in
+    the meantime, are skipped, so a journal can safely be replayed twice.
+    """
+
+    comments = [
+        Comment(
+            id=uuid.UUID(entry["id"]),
+            post_id=uuid.UUID(entry["post_id"]),
+            name=entry["name"],
+            body=entry["body"],
+            created_at=parse_datetime(entry["created_at"]),
+            updated_at=parse_datetime(entry["created_at"]),
+        )
+        for entry in entries
+    ]
+    if not comments:
+        return 0
+
+    with transaction.atomic():
+        existing = set(
+            Comment.objects.filter(pk__in=[comment.pk for comment in comments])
+            .values_list("pk", flat=True)
+        )
+        live_posts = set(
+            Post.objects.filter(pk__in={comment.post_id for comment in comments})
+            .values_list("pk", flat=True)
+        )
+        new = [
+            comment for comment in comments
+            if comment.pk not in existing and comment.post_id in live_posts
+        ]
+        if not new:
+            return 0
+
+        # A raw insert keeps the time the comment was accepted, where
+        # bulk_create() would stamp every row with the flush time.
+        Comment.objects._insert(new, fields=Comment._meta.local_concrete_fields, raw=True)
+
+        by_post = defaultdict(list)
+        for comment in new:
+            by_post[comment.post_id].append(comment.created_at)
+        for post_id, created in by_post.items():
+            Post.objects.record_comments(post_id, len(created), max(created))
+    return len(new)
+
+
+def replay_journals(journal_dir, batch_size=500):
+    """
+    Write the comments of every journal in ``journal_dir`` that no running
+    buffer holds on to, i.e. journals left behind by a crashed or killed
+    process, and remove them. Returns the number of inserted comments.
+    """
+
+    inserted = 0
+    for path in sorted(Path(journal_dir).glob("*.jsonl")):
+        with open(path) as journal:
+            try:
+                fcntl.flock(journal, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            entries = []
+            for line in journal:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    # A torn last line was never acknowledged to the client.
+                    logger.warning("Skipping a truncated entry in %s", path)
+            for start in range(0, len(entries), batch_size):
+                inserted += write_comments(entries[start:start + batch_size])
+            path.unlink()
+    if inserted:
+        logger.info("Replayed %d buffered comments from %s", inserted, journal_dir)
+    return inserted
+
+
+class CommentBuffer:
+    """
+    Write-behind buffer for new comments.
+
+    Accepted comments are appended (and fsynced) to an on-disk journal
+    segment before being queued in memory. A background thread writes the
+    queue to the database in batches, whenever BATCH_SIZE comments are
+    waiting or FLUSH_INTERVAL seconds have passed, and deletes the segment
+    once its comments are committed. Each segment stays locked by this
+    process until then, so replay_journals() only picks up the segments
+    of processes that are gone.
+
+    A segment that fails ``max_attempts`` flushes in a row for any reason
+    but the database being unreachable is moved to DEAD_LETTER_DIR and
+    logged, so it cannot hold up the segments after it forever.
+    """
+
+    def __init__(self, journal_dir, batch_size=100, flush_interval=1.0, fsync=True,
+                 max_attempts=5):
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.max_attempts = max_attempts
+        # Failed flushes of the oldest unflushed segment.
+        self.failed_attempts = 0
+        self.name = f"comments-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.sequence = 0
+        # Guards the queue and the open journal segment.
+        self.lock = threading.Lock()
+        # Serializes flushes; segments are written in order.
+        self.flush_lock = threading.Lock()
+        self.queue = []
+        self.journal = self.open_segment()
+        self.unflushed = []
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def open_segment(self):
+        """
+        Create and return the next journal segment, locked by this process.
+
+        The segment is created and locked under a ``.tmp`` name that
+        replay_journals() does not look at, and only renamed once it is
+        locked, so another process's replay can never take the new segment
+        and remove it from under this one. A name that is already taken or
+        locked is skipped for the next sequence number.
+        """
+
+        while True:
+            self.sequence += 1
+            path = self.journal_dir / f"{self.name}-{self.sequence:06d}.jsonl"
+            temporary = path.with_suffix(".tmp")
+            try:
+                fd = os.open(temporary, os.O_WRONLY | os.O_APPEND | os.O_CREAT | os.O_EXCL, 0o666)
+            except FileExistsError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            os.rename(temporary, path)
+            # The locked descriptor is wrapped under the segment's final name.
+            return open(path, "a", opener=lambda *args: fd)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="comment-buffer", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while not self.stopped.is_set():
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            try:
+                if self.flush():
+                    connections.close_all()
+            except Exception:
+                logger.exception("Flushing buffered comments failed")
+
+    def add(self, post_id, name, body):
+        """
+        Durably accept a comment and return its journal entry.
+        """
+
+        entry = {
+            "id": str(uuid7()),
+            "post_id": str(post_id),
+            "name": name,
+            "body": body,
+            "created_at": timezone.now().isoformat(),
+        }
+        line = json.dumps(entry) + "\n"
+        with self.lock:
+            self.journal.write(line)
+            self.journal.flush()
+            if self.fsync:
+                os.fsync(self.journal.fileno())
+            self.queue.append(entry)
+            full = len(self.queue) >= self.batch_size
+        if full:
+            self.wakeup.set()
+        return entry
+
+    def flush(self):
+        """
+        Write every queued comment to the database and return how many were
+        inserted. Segments that fail to write are kept and retried on the
+        next flush, up to ``max_attempts`` times.
+        """
+
+        with self.flush_lock:
+            with self.lock:
+                if self.queue:
+                    self.unflushed.append((self.journal, self.queue))
+                    self.journal = self.open_segment()
+                    self.queue = []
+
+            inserted = 0
+            while self.unflushed:
+                journal, entries = self.unflushed[0]
+                try:
+                    for start in range(0, len(entries), self.batch_size):
+                        inserted += write_comments(entries[start:start + self.batch_size])
+                except (InterfaceError, OperationalError):
+                    # The database is down or busy; that is no fault of the
+                    # segment's.
+                    raise
+                except Exception:
+                    self.failed_attempts += 1
+                    if self.failed_attempts < self.max_attempts:
+                        raise
+                    self.dead_letter(journal, len(entries))
+                else:
+                    os.unlink(journal.name)
+                    journal.close()
+                self.failed_attempts = 0
+                self.unflushed.pop(0)
+            return inserted
+
+    def dead_letter(self, journal, count):
+        target = self.journal_dir / DEAD_LETTER_DIR / Path(journal.name).name
+        target.parent.mkdir(exist_ok=True)
+        os.replace(journal.name, target)
+        journal.close()
+        logger.exception(
+            "Gave up writing %d buffered comments after %d attempts; moved %s to %s",
+            count, self.failed_attempts, journal.name, target,
+        )
+
+    def close(self, flush=True):
+        self.stopped.set()
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join()
+        if flush:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Flushing buffered comments on shutdown failed")
+        with self.lock:
+            self.journal.close()
+            if not self.queue:
+                os.unlink(self.journal.name)
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def write_behind_enabled():
+    return getattr(settings, "BLOG_COMMENT_WRITE_BEHIND", False)
+
+
+def get_comment_buffer():
+    """
+    Return this process's comment buffer, replaying leftover journals and
+    starting the flush thread the first time it is used.
+    """
+
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            journal_dir = settings.BLOG_COMMENT_JOURNAL_DIR
+            Path(journal_dir).mkdir(parents=True, exist_ok=True)
+            replay_journals(journal_dir)
+            _buffer = CommentBuffer(
+                journal_dir,
+                batch_size=getattr(settings, "BLOG_COMMENT_BATCH_SIZE", 100),
+                flush_interval=getattr(settings, "BLOG_COMMENT_FLUSH_INTERVAL", 1.0),
+                fsync=getattr(settings, "BLOG_COMMENT_JOURNAL_FSYNC", True),
+                max_attempts=getattr(settings, "BLOG_COMMENT_FLUSH_ATTEMPTS", 5),
+            )
+            _buffer.start()
+            atexit.register(_buffer.close)
+        return _buffer
+
+
+def close_comment_buffer(flush=True):
+    global _buffer
+    with _buffer_lock:
+        if _buffer is not None:
+            atexit.unregister(_buffer.close)
+            _buffer.close(flush=flush)
+            _buffer = None
+
+
+def remember_pending_comment(request, entry):
+    """
+    Keep a buffered comment in its author's session so they see it on the
+    post page before it has been written to the database.
+    """
+
+    entries = request.session.get(PENDING_SESSION_KEY, [])
+    request.session[PENDING_SESSION_KEY] = [*entries, entry][-PENDING_LIMIT:]
+
+
+def has_pending_comments(request):
+    session = getattr(request, "session", None)
+    return bool(session and session.get(PENDING_SESSION_KEY))
+
+
+def get_pending_comments(request, post):
+    """
+    Return the author's buffered comments on ``post`` that are not in the
+    database yet, and forget the ones that are (or have expired).
+    """
+
+    if not has_pending_comments(request):
+        return []
+    stored = request.session[PENDING_SESSION_KEY]
+    cutoff = timezone.now() - PENDING_MAX_AGE
+    entries = [dict(entry, created=parse_datetime(entry["created_at"])) for entry in stored]
+    mine = [entry["id"] for entry in entries if entry["post_id"] == str(post.pk)]
+    published = set()
+    if mine:
+        published = {
+            str(pk) for pk in Comment.objects.filter(pk__in=mine).values_list("pk", flat=True)
+        }
+    remaining = [
+        entry for entry in entries
+        if entry["id"] not in published and entry["created"] > cutoff
+    ]
+    if len(remaining) != len(entries):
+        keep = {entry["id"] for entry in remaining}
+        request.session[PENDING_SESSION_KEY] = [entry for entry in stored if entry["id"] in keep]
+    return [entry for entry in remaining if entry["post_id"] == str(post.pk)]
@@ -0,0 +1,76 @@
+import gzip
+import re
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Elements whose whitespace is significant or that are not HTML.
+_PRESERVED = re.compile(r"<(pre|textarea|script|style)\b.*?</\1\s*>", re.S | re.I)
+_LINE_BREAK = re.compile(r"[ \t\r\f\v]*\n\s*")
+_SPACES = re.compile(r"[ \t\r\f\v]{2,}")
+
+
+def gzip_compress(data, level=6):
+    # mtime=0 makes the output depend on the input only.
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def brotli_compress(data, quality=5):
+    return brotli.compress(data, quality=quality)
+
+
+def get_encoders():
+    """
+    Return ``(Content-Encoding, file suffix, compressor)`` for every
+    encoding available in this environment, best first.
+    """
+
+    encoders = []
+    if brotli is not None:
+        encoders.append(("br", ".br", brotli_compress))
+    encoders.append(("gzip", ".gz", gzip_compress))
+    return encoders
+
+
+def accepted_encodings(header):
+    """
+    Return the content codings an ``Accept-Encoding`` header allows.
+    """
+
+    encodings = set()
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        quality = params.strip().lower()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding.strip():
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def _collapse(text):
+    return _SPACES.sub(" ", _LINE_BREAK.sub("\n", text))
+
+
+def collapse_whitespace(html):
+    """
+    Shrink every run of whitespace in ``html`` to a single space, or to a
+    single line break if it spans lines, leaving ``<pre>``, ``<textarea>``,
+    ``<script>`` and ``<style>`` elements untouched. Browsers render the
+    result the same as long as no other element is styled with
+    ``white-space: pre``.
+    """
+
+    parts, position = [], 0
+    for match in _PRESERVED.finditer(html):
+        parts.append(_collapse(html[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_collapse(html[position:]))
+    return "".join(parts)
@@ -0,0 +1,161 @@
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.contrib.messages import get_messages
+from django.http import Http404
+from django.utils.cache import (
+    add_never_cache_headers,
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+from blog.cache import get_content_versions, versions_settling
+
+
+def is_authenticated(request):
+    user = getattr(request, "user", None)
+    return user is not None and user.is_authenticated
+
+
+def get_validators(request, scope="content", exists=None):
+    """
+    Return the ``(etag, last_modified)`` validators for a page whose content
+    is covered by the given version scope, or by a list of scopes, or
+    ``None`` when ``exists`` is given and says the page's object is gone
+    (see ``get_content_versions``).
+
+    While a version is settling (see ``versions_settling``) the page may be
+    rendered from a replica that has not replayed the change yet, so it is
+    not validated under the new version and ``(None, None)`` is returned.
+
+    The ETag also covers the full path and the viewer, since logged-in
+    users get a different variant of the page than anonymous visitors.
+    """
+
+    scopes = [scope] if isinstance(scope, str) else scope
+    versions = get_content_versions(scopes, exists)
+    if versions is None:
+        return None
+    if versions_settling(versions.values()):
+        return None, None
+    viewer = f"user:{request.user.pk}" if is_authenticated(request) else "anonymous"
+    # Scope names are hashed with their versions, so pages whose scopes
+    # differ (a time window that moved on a day) never share an ETag.
+    stamps = ":".join(f"{name}={versions[name]}" for name in scopes)
+    digest = hashlib.md5(
+        f"{stamps}:{viewer}:{request.get_full_path()}".encode(), usedforsecurity=False
+    ).hexdigest()
+    return quote_etag(digest), max(versions.values()) // 1_000_000_000
+
+
+def conditional_response(request, etag, last_modified):
+    """
+    Return a 304 response when the request's validators still match, or
+    ``None`` when the page has to be rendered.
+    """
+
+    if request.method not in ("GET", "HEAD"):
+        return None
+    # A page with pending flash messages consumes them when rendered.
+    if len(get_messages(request)):
+        return None
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        finalize_response(request, response, etag, last_modified)
+    return response
+
+
+def finalize_response(request, response, etag, last_modified):
+    if response.status_code not in (200, 304):
+        return response
+    if not response.has_header("ETag"):
+        response.headers["ETag"] = etag
+    if not response.has_header("Last-Modified"):
+        response.headers["Last-Modified"] = http_date(last_modified)
+    patch_vary_headers(response, ["Cookie"])
+    if is_authenticated(request):
+        patch_cache_control(response, no_cache=True, private=True)
+    else:
+        patch_cache_control(response, no_cache=True, public=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match``/``If-Modified-Since`` requests with a 304 from
+    a cached content version, before the view runs any query or renders
+    any template.
+    """
+
+    conditional_scope = "content"
+
+    def get_conditional_scope(self):
+        return self.conditional_scope
+
+    def scope_exists(self):
+        """
+        Return whether the object the conditional scope is named after
+        exists; only asked before a version is started for the scope.
+        """
+
+        return True
+
+    def has_private_changes(self, request):
+        """
+        Return True when the page shows this client changes that the content
+        version does not cover yet, so it must not be validated or cached.
+        """
+
+        return False
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+        if self.has_private_changes(request):
+            return self._dispatch_unvalidated(request, *args, **kwargs)
+        validators = get_validators(request, self.get_conditional_scope(), self.scope_exists)
+        if validators is None:
+            raise Http404
+        etag, last_modified = validators
+        if etag is None:
+            return self._dispatch_unvalidated(request, *args, **kwargs)
+        response = conditional_response(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            finalize_response(request, response, etag, last_modified)
+        return response
+
+    def _dispatch_unvalidated(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        add_never_cache_headers(response)
+        return response
+
+    async def _adispatch(self, request, *args, **kwargs):
+        # Resolving the user and the flash messages touches the session and
+        # user tables, so the validator checks run in a worker thread.
+        if await sync_to_async(self.has_private_changes)(request):
+            return await self._adispatch_unvalidated(request, *args, **kwargs)
+        validators = await sync_to_async(get_validators)(
+            request, self.get_conditional_scope(), self.scope_exists
+        )
+        if validators is None:
+            raise Http404
+        etag, last_modified = validators
+        if etag is None:
+            return await self._adispatch_unvalidated(request, *args, **kwargs)
+        response = await sync_to_async(conditional_response)(request, etag, last_modified)
+        if response is not None:
+            return response
+        response = await super().dispatch(request, *args, **kwargs)
+        if request.method in ("GET", "HEAD"):
+            finalize_response(request, response, etag, last_modified)
+        return response
+
+    async def _adispatch_unvalidated(self, request, *args, **kwargs):
+        response = await super().dispatch(request, *args, **kwargs)
+        add_never_cache_headers(response)
+        return response
@@ -0,0 +1,309 @@
+import datetime
+import hashlib
+import json
+from xml.sax.saxutils import escape, quoteattr
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.feedgenerator import rfc2822_date, rfc3339_date
+from django.utils.http import http_date, quote_etag
+from django.views import View
+
+from blog.cache import get_content_versions, refill_reads
+from blog.models import Category, Post, User
+
+FEED_CACHE_KEY = "blog:feed:{scope}:{format}:{version}:{origin}"
+
+
+class FeedWriter:
+    """
+    Base class for writers that turn a stream of posts into chunks of a
+    syndication document.
+    """
+
+    content_type = None
+
+    def __init__(self, title, link, feed_url, updated):
+        self.title = title
+        self.link = link
+        self.feed_url = feed_url
+        self.updated = updated
+
+    def header(self):
+        raise NotImplementedError
+
+    def item(self, post, url):
+        raise NotImplementedError
+
+    def footer(self):
+        raise NotImplementedError
+
+    def write(self, posts, build_url):
+        yield self.header()
+        for post in posts:
+            yield self.item(post, build_url(post))
+        yield self.footer()
+
+
+class RSSFeedWriter(FeedWriter):
+    content_type = "application/rss+xml; charset=utf-8"
+
+    def header(self):
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+            'xmlns:dc="http://purl.org/dc/elements/1.1/"><channel>'
+            f"<title>{escape(self.title)}</title>"
+            f"<link>{escape(self.link)}</link>"
+            f"<description>{escape(self.title)}</description>"
+            f'<atom:link href={quoteattr(self.feed_url)} rel="self"/>'
+            f"<lastBuildDate>{rfc2822_date(self.updated)}</lastBuildDate>"
+        )
+
+    def item(self, post, url):
+        category = f"<category>{escape(post.category.name)}</category>" if post.category else ""
+        return (
+            "<item>"
+            f"<title>{escape(post.title)}</title>"
+            f"<link>{escape(url)}</link>"
+            f"<description>{escape(post.content)}</description>"
+            f"<dc:creator>{escape(post.author.get_full_name())}</dc:creator>"
+            f'<guid isPermaLink="false">urn:uuid:{post.pk}</guid>'
+            f"<pubDate>{rfc2822_date(post.created_at)}</pubDate>"
+            f"{category}"
+            "</item>"
+        )
+
+    def footer(self):
+        return "</channel></rss>\n"
+
+
+class AtomFeedWriter(FeedWriter):
+    content_type = "application/atom+xml; charset=utf-8"
+
+    def header(self):
+        return (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            '<feed xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>{escape(self.title)}</title>"
+            f'<link href={quoteattr(self.link)} rel="alternate"/>'
+            f'<link href={quoteattr(self.feed_url)} rel="self"/>'
+            f"<id>{escape(self.feed_url)}</id>"
+            f"<updated>{rfc3339_date(self.updated)}</updated>"
+        )
+
+    def item(self, post, url):
+        category = f"<category term={quoteattr(post.category.name)}/>" if post.category else ""
+        return (
+            "<entry>"
+            f"<title>{escape(post.title)}</title>"
+            f'<link href={quoteattr(url)} rel="alternate"/>'
+            f"<id>urn:uuid:{post.pk}</id>"
+            f"<published>{rfc3339_date(post.created_at)}</published>"
+            f"<updated>{rfc3339_date(post.updated_at)}</updated>"
+            f"<author><name>{escape(post.author.get_full_name())}</name></author>"
+            f"{category}"
+            f'<summary type="text">{escape(post.excerpt)}</summary>'
+            f'<content type="text">{escape(post.content)}</content>'
+            "</entry>"
+        )
+
+    def footer(self):
+        return "</feed>\n"
+
+
+class JSONFeedWriter(FeedWriter):
+    content_type = "application/feed+json; charset=utf-8"
+
+    def header(self):
+        head = json.dumps({
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": self.title,
+            "home_page_url": self.link,
+            "feed_url": self.feed_url,
+        })
+        self.first_item = True
+        return head[:-1] + ', "items": ['
+
+    def item(self, post, url):
+        data = {
+            "id": f"urn:uuid:{post.pk}",
+            "url": url,
+            "title": post.title,
+            "content_text": post.content,
+            "summary": post.excerpt,
+            "date_published": post.created_at.isoformat(),
+            "date_modified": post.updated_at.isoformat(),
+            "authors": [{"name": post.author.get_full_name()}],
+        }
+        if post.category:
+            data["tags"] = [post.category.name]
+        separator = "" if self.first_item else ", "
+        self.first_item = False
+        return separator + json.dumps(data)
+
+    def footer(self):
+        return "]}\n"
+
+
+FEED_WRITERS = {
+    "rss": RSSFeedWriter,
+    "atom": AtomFeedWriter,
+    "json": JSONFeedWriter,
+}
+
+
+def stream_and_cache(chunks, key, timeout):
+    """
+    Yield the chunks of a document and cache the whole document once it
+    has been streamed completely.
+    """
+
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, "".join(parts), timeout)
+
+
+class FeedView(View):
+    """
+    Stream the latest posts as RSS, Atom or JSON Feed.
+
+    The rendered document is cached per scope, format, content version and
+    origin, and the version doubles as the ETag/Last-Modified validators, so
+    unchanged feeds are answered with a 304 or straight from the cache.
+
+    Links are absolute, so they are built from BLOG_SITE_URL when it is set
+    and otherwise from the request's scheme and Host header; the origin is
+    part of the cache key so one host's document is never served to another.
+    """
+
+    items = 50
+    chunk_size = 25
+
+    def get_scope(self):
+        return "posts"
+
+    def get_title(self):
+        return "Blogger"
+
+    def get_link(self):
+        return reverse("home")
+
+    def get_posts(self):
+        return Post.objects.all()
+
+    def scope_exists(self):
+        """
+        Return whether the object the scope is named after exists, raising
+        Http404 otherwise; only asked before a version is started.
+        """
+
+        return True
+
+    def get_origin(self):
+        site_url = getattr(settings, "BLOG_SITE_URL", "")
+        if site_url:
+            return site_url.rstrip("/")
+        return f"{self.request.scheme}://{self.request.get_host()}"
+
+    def get(self, request, *args, **kwargs):
+        writer_class = FEED_WRITERS.get(kwargs["format"])
+        if writer_class is None:
+            raise Http404("Unknown feed format.")
+
+        scope = self.get_scope()
+        version = get_content_versions([scope], self.scope_exists)[scope]
+        origin = hashlib.md5(self.get_origin().encode(), usedforsecurity=False).hexdigest()
+        etag = quote_etag(hashlib.md5(
+            f"{scope}:{kwargs['format']}:{version}:{origin}".encode(), usedforsecurity=False
+        ).hexdigest())
+        last_modified = version // 1_000_000_000
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.render(writer_class, scope, kwargs["format"], version, origin)
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, public=True, max_age=getattr(settings, "BLOG_FEED_MAX_AGE", 300))
+        return response
+
+    def render(self, writer_class, scope, format, version, origin):
+        key = FEED_CACHE_KEY.format(scope=scope, format=format, version=version, origin=origin)
+        cached = cache.get(key)
+        if cached is not None:
+            return HttpResponse(cached, content_type=writer_class.content_type)
+
+        updated = datetime.datetime.fromtimestamp(version / 1_000_000_000, datetime.timezone.utc)
+        site = self.get_origin()
+        # The feeds take no query parameters, and the document is cached for
+        # every client, so the self link leaves out whatever the first one sent.
+        writer = writer_class(
+            self.get_title(), site + self.get_link(), site + self.request.path, updated
+        )
+        # The body is produced after the view returns, outside the request's
+        # routing context, so the database to read from is chosen now.
+        with refill_reads([version]):
+            using = router.db_for_read(Post)
+        posts = (
+            self.get_posts()
+            .using(using)
+            .select_related("author", "category")
+            .order_by("-created_at", "-id")[:self.items]
+            .iterator(chunk_size=self.chunk_size)
+        )
+
+        def build_url(post):
+            return site + reverse("post_detail", kwargs={"pk": post.pk})
+
+        chunks = writer.write(posts, build_url)
+        timeout = getattr(settings, "BLOG_FEED_CACHE_TIMEOUT", 60 * 60 * 24)
+        return StreamingHttpResponse(
+            stream_and_cache(chunks, key, timeout), content_type=writer.content_type
+        )
+
+
+class CategoryFeedView(FeedView):
+
+    def get_scope(self):
+        return f"category:{self.kwargs['pk']}"
+
+    def scope_exists(self):
+        return self.get_category() is not None
+
+    def get_category(self):
+        if not hasattr(self, "_category"):
+            self._category = get_object_or_404(Category, pk=self.kwargs["pk"])
+        return self._category
+
+    def get_title(self):
+        return f"Blogger: {self.get_category().name}"
+
+    def get_posts(self):
+        return Post.objects.filter(category=self.get_category())
+
+
+class AuthorFeedView(FeedView):
+
+    def get_scope(self):
+        return f"author:{self.kwargs['pk']}"
+
+    def scope_exists(self):
+        return self.get_author() is not None
+
+    def get_author(self):
+        if not hasattr(self, "_author"):
+            self._author = get_object_or_404(User, pk=self.kwargs["pk"])
+        return self._author
+
+    def get_title(self):
+        return f"Blogger: {self.get_author().get_full_name() or 'posts'}"
+
+    def get_posts(self):
+        return Post.objects.filter(author=self.get_author())
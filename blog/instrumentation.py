@@ -0,0 +1,170 @@
+import re
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.jinja2 import Jinja2
+from django.template.backends.jinja2 import Template as Jinja2Template
+
+_current_metrics = ContextVar("blog_request_metrics", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def sql_fingerprint(sql):
+    """
+    Normalize a SQL statement so that queries differing only in their
+    literal values or the length of an ``IN`` list share one fingerprint.
+    """
+
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+class RequestMetrics:
+    """
+    Timings collected while a single request is handled.
+
+    Durations are in seconds. Besides the query and template totals, other
+    layers can report their own entries through ``record``, optionally with
+    details such as the number of bytes they saved.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.view_time = 0.0
+        self.view_started = None
+        self.statements = {}
+        self.timings = {}
+        self.details = {}
+        self._template_depth = 0
+
+    def record_query(self, sql, duration):
+        self.queries += 1
+        self.db_time += duration
+        count, total = self.statements.get(sql, (0, 0.0))
+        self.statements[sql] = (count + 1, total + duration)
+
+    def record(self, name, duration, **details):
+        self.timings[name] = self.timings.get(name, 0.0) + duration
+        if details:
+            self.details.setdefault(name, {}).update(details)
+
+    @property
+    def total_time(self):
+        return time.perf_counter() - self.started
+
+    def fingerprints(self, limit=10):
+        """
+        Return the ``limit`` most expensive statement fingerprints as
+        ``(fingerprint, count, seconds)`` tuples.
+        """
+
+        merged = {}
+        for sql, (count, duration) in self.statements.items():
+            fingerprint = sql_fingerprint(sql)
+            seen, total = merged.get(fingerprint, (0, 0.0))
+            merged[fingerprint] = (seen + count, total + duration)
+        ranked = sorted(merged.items(), key=lambda item: item[1][1], reverse=True)
+        return [(fingerprint, count, duration) for fingerprint, (count, duration) in ranked[:limit]]
+
+
+def current_metrics():
+    """
+    Return the metrics of the request being handled, or ``None`` outside
+    of an instrumented request.
+    """
+
+    return _current_metrics.get()
+
+
+def start_metrics():
+    metrics = RequestMetrics()
+    return metrics, _current_metrics.set(metrics)
+
+
+def stop_metrics(token):
+    _current_metrics.reset(token)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.record_query(sql, time.perf_counter() - started)
+
+
+def install_query_recorder(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class TimedRenderMixin:
+    """
+    Report the render time of a backend template to the request metrics.
+    """
+
+    def render(self, context=None, request=None):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().render(context, request)
+        # Only the outermost render is timed, so templates rendered from
+        # within another template are not counted twice.
+        metrics._template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics._template_depth -= 1
+            if not metrics._template_depth:
+                metrics.template_time += time.perf_counter() - started
+
+
+class InstrumentedTemplate(TimedRenderMixin, DjangoTemplate):
+    pass
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """
+    The Django template backend, reporting render time to the request
+    metrics.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedTemplate(template.template, self)
+
+
+class InstrumentedJinja2Template(TimedRenderMixin, Jinja2Template):
+    pass
+
+
+class InstrumentedJinja2(Jinja2):
+    """
+    The Jinja2 template backend, reporting render time to the request
+    metrics.
+    """
+
+    def from_string(self, template_code):
+        return InstrumentedJinja2Template(self.env.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return InstrumentedJinja2Template(template.template, self)
@@ -0,0 +1,71 @@
+import os
+
+from django.conf import settings
+from django.template.defaultfilters import date, linebreaks_filter, linebreaksbr, pluralize
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import formats, timezone
+from jinja2 import Environment, FileSystemBytecodeCache, pass_context
+
+from blog.templatetags import blog_tags, tailwind_static
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args or None, kwargs=kwargs or None)
+
+
+def localize(value):
+    """
+    Display a value the way ``{{ value }}`` does in a Django template:
+    datetimes in the current time zone and format.
+    """
+
+    return formats.localize(timezone.template_localtime(value))
+
+
+def local_date(value, arg=None):
+    return date(timezone.template_localtime(value), arg)
+
+
+@pass_context
+def page_url(context, direction, cursor):
+    return blog_tags.page_url(context, direction, cursor)
+
+
+@pass_context
+def window_url(context, window=None):
+    return blog_tags.window_url(context, window)
+
+
+def environment(**options):
+    """
+    Build the Jinja2 environment of the ``jinja2`` template engine, with the
+    Django helpers its templates use.
+
+    Compiled templates are cached as bytecode in
+    BLOG_JINJA2_BYTECODE_CACHE_DIR, so restarted or newly forked workers
+    skip compiling them again. Entries are keyed by the template source,
+    so edited templates are recompiled.
+    """
+
+    cache_dir = getattr(settings, "BLOG_JINJA2_BYTECODE_CACHE_DIR", None)
+    if cache_dir and "bytecode_cache" not in options:
+        os.makedirs(cache_dir, exist_ok=True)
+        options["bytecode_cache"] = FileSystemBytecodeCache(str(cache_dir))
+
+    env = Environment(**options)
+    env.globals.update({
+        "url": url,
+        "static": static,
+        "page_url": page_url,
+        "window_url": window_url,
+        "tailwind_css": tailwind_static.tailwind_css,
+    })
+    env.filters.update({
+        "date": local_date,
+        "localize": localize,
+        "linebreaks": lambda value: linebreaks_filter(value, autoescape=True),
+        "linebreaksbr": lambda value: linebreaksbr(value, autoescape=True),
+        "pluralize": pluralize,
+    })
+    return env
@@ -0,0 +1,258 @@
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import ExitStack
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings, setup_databases, teardown_databases
+from django.urls import reverse
+
+from blog.benchmark import WORDS, seed_dataset, summarize_latencies
+from blog.models import User
+
+SCENARIOS = ("home", "search", "post_detail", "create_comment", "login", "credential_stuffing")
+
+# Metrics compared against a baseline; higher is worse for all of them.
+REGRESSION_METRICS = ("p95_ms", "queries_per_request", "cpu_ms_per_request")
+
+
+class QueryCounter:
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset into a throwaway test database and measure "
+        "latency percentiles, queries per request and allocations of the hot "
+        "endpoints through the test client. Results are written as JSON and "
+        "can be compared against a previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=50)
+        parser.add_argument("--categories", type=int, default=10)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--comments", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--scenario", action="append", dest="scenarios", choices=SCENARIOS,
+            help="Scenario to run, may be repeated. Defaults to all of them.",
+        )
+        parser.add_argument("--requests", type=int, default=100, help="Timed requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=10, help="Untimed requests per scenario.")
+        parser.add_argument(
+            "--alloc-samples", type=int, default=10,
+            help="Requests per scenario replayed under tracemalloc to measure allocations.",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="Fail when a metric is this many percent worse than the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        # The run gets its own database and cache so nothing it writes can
+        # leak into the configured ones.
+        with override_settings(
+            ALLOWED_HOSTS=["testserver"],
+            CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+        ):
+            old_config = setup_databases(verbosity=0, interactive=False)
+            try:
+                results = self.run(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+        document = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(document + "\n")
+        else:
+            self.stdout.write(document)
+        self.report(results)
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def run(self, options):
+        self.stderr.write("Seeding the benchmark dataset...")
+        started = time.perf_counter()
+        self.dataset = seed_dataset(
+            users=options["users"],
+            categories=options["categories"],
+            posts=options["posts"],
+            comments=options["comments"],
+            seed=options["seed"],
+        )
+        if not self.dataset["emails"] or not self.dataset["post_ids"]:
+            raise CommandError("The benchmark needs at least one user and one post.")
+
+        results = {
+            "meta": {
+                "dataset": {
+                    key: options[key] for key in ("users", "categories", "posts", "comments", "seed")
+                },
+                "requests": options["requests"],
+                "seed_seconds": round(time.perf_counter() - started, 2),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "django": django.get_version(),
+            },
+            "scenarios": {},
+        }
+        for name in options["scenarios"] or SCENARIOS:
+            self.stderr.write(f"Running {name}...")
+            self.counter = 0
+            request = getattr(self, f"scenario_{name}")()
+            results["scenarios"][name] = self.measure(request, options)
+        return results
+
+    def measure(self, request, options):
+        for _ in range(options["warmup"]):
+            request()
+
+        counter = QueryCounter()
+        latencies, errors, throttled = [], 0, 0
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            started = time.perf_counter()
+            cpu_started = time.process_time()
+            for _ in range(options["requests"]):
+                request_started = time.perf_counter()
+                response = request()
+                latencies.append(time.perf_counter() - request_started)
+                throttled += response.status_code == 429
+                errors += response.status_code >= 400 and response.status_code != 429
+            cpu_time = time.process_time() - cpu_started
+            elapsed = time.perf_counter() - started
+
+        requests = max(len(latencies), 1)
+        summary = summarize_latencies(latencies, elapsed)
+        summary["queries_per_request"] = round(counter.count / requests, 2)
+        summary["cpu_ms_per_request"] = round(cpu_time * 1000 / requests, 3)
+        summary["errors"] = errors
+        summary["throttled"] = throttled
+        summary["alloc_peak_kb"] = self.measure_allocations(request, options["alloc_samples"])
+        return summary
+
+    def measure_allocations(self, request, samples):
+        """
+        Return the median peak of memory allocated while handling one
+        request, in KiB. Tracing is slow, so this runs separately from the
+        timed requests.
+        """
+
+        if samples <= 0:
+            return None
+        peaks = []
+        tracemalloc.start()
+        try:
+            for _ in range(samples):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                request()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        finally:
+            tracemalloc.stop()
+        return round(statistics.median(peaks) / 1024, 1)
+
+    def next_index(self, size):
+        self.counter += 1
+        return self.counter % size
+
+    def scenario_home(self):
+        client = Client()
+        url = reverse("home")
+        return lambda: client.get(url)
+
+    def scenario_search(self):
+        client = Client()
+        url = reverse("home")
+        terms = [word for word in WORDS if len(word) > 3]
+        return lambda: client.get(url, {"q": terms[self.next_index(len(terms))]})
+
+    def scenario_post_detail(self):
+        client = Client()
+        post_ids = self.dataset["post_ids"]
+        return lambda: client.get(
+            reverse("post_detail", kwargs={"pk": post_ids[self.next_index(len(post_ids))]})
+        )
+
+    def scenario_create_comment(self):
+        client = Client()
+        client.force_login(User.objects.get(email=self.dataset["emails"][0]))
+        post_ids = self.dataset["post_ids"]
+        return lambda: client.post(
+            reverse("create_comment", kwargs={"post_id": post_ids[self.next_index(len(post_ids))]}),
+            {"name": "Benchmark", "body": " ".join(WORDS[:30])},
+        )
+
+    def scenario_login(self):
+        # Legitimate logins, each from its own address so the per-IP
+        # throttle does not kick in.
+        client = Client()
+        url = reverse("login")
+        emails = self.dataset["emails"]
+
+        def request():
+            index = self.next_index(2 ** 16)
+            return client.post(url, {
+                "email": emails[index % len(emails)],
+                "password": self.dataset["password"],
+            }, REMOTE_ADDR=f"10.0.{index // 256}.{index % 256}")
+        return request
+
+    def scenario_credential_stuffing(self):
+        # A single address trying leaked credentials for many accounts;
+        # once its bucket is empty every attempt should be a cheap 429.
+        client = Client(REMOTE_ADDR="203.0.113.7")
+        url = reverse("login")
+        return lambda: client.post(url, {
+            "email": f"victim{self.next_index(10 ** 6)}@example.com",
+            "password": "hunter2",
+        })
+
+    def report(self, results):
+        for name, summary in results["scenarios"].items():
+            self.stderr.write(
+                f"{name:<20} p50 {summary['p50_ms']:>9.2f}ms  p95 {summary['p95_ms']:>9.2f}ms  "
+                f"p99 {summary['p99_ms']:>9.2f}ms  {summary['queries_per_request']:>6} queries  "
+                f"{summary['cpu_ms_per_request']:>9.2f}ms cpu  "
+                f"{summary['alloc_peak_kb'] or 0:>8} KiB  {summary['errors']} errors  "
+                f"{summary['throttled']} throttled"
+            )
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        for name, summary in results["scenarios"].items():
+            previous = baseline.get("scenarios", {}).get(name)
+            if not previous:
+                continue
+            for metric in REGRESSION_METRICS:
+                before, after = previous.get(metric), summary.get(metric)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + threshold / 100):
+                    regressions.append(f"{name}.{metric}: {before} -> {after}")
+        return regressions
@@ -0,0 +1,149 @@
+import asyncio
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmark import summarize_latencies
+
+READ_VIEWS = "home,post_detail"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput and tail latency of the read endpoints served by "
+        "the sync views through the WSGI handler against the async-native "
+        "views through the ASGI handler, at a fixed concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path", action="append", dest="paths",
+            help="Path to request, may be repeated. Defaults to the feed and a search.",
+        )
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument(
+            "--mode", choices=["wsgi", "asgi"],
+            help="Run a single mode in this process and print its result as JSON.",
+        )
+
+    def handle(self, *args, **options):
+        paths = options["paths"] or ["/", "/?q=django"]
+        if options["mode"]:
+            runner = self.run_wsgi if options["mode"] == "wsgi" else self.run_asgi
+            result = runner(paths, options["requests"], options["concurrency"])
+            self.stdout.write(json.dumps(result))
+            return
+
+        # Each mode runs in a fresh interpreter so the URLconf picks the
+        # matching view implementations from BLOG_ASYNC_VIEWS.
+        results = {}
+        for mode, async_views in (("wsgi", ""), ("asgi", READ_VIEWS)):
+            command = [
+                sys.executable, sys.argv[0], "benchmark_asgi", "--mode", mode,
+                "--requests", str(options["requests"]),
+                "--concurrency", str(options["concurrency"]),
+            ]
+            for path in paths:
+                command += ["--path", path]
+            env = dict(os.environ, BLOG_ASYNC_VIEWS=async_views)
+            completed = subprocess.run(command, env=env, capture_output=True, text=True)
+            if completed.returncode:
+                raise CommandError(completed.stderr)
+            results[mode] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def request_paths(self, paths, total):
+        return [paths[i % len(paths)] for i in range(total)]
+
+    def run_wsgi(self, paths, total, concurrency):
+        from django.core.handlers.wsgi import WSGIHandler
+
+        handler = WSGIHandler()
+
+        def call(path):
+            url = urlsplit(path)
+            environ = {
+                "PATH_INFO": url.path,
+                "QUERY_STRING": url.query,
+                "REQUEST_METHOD": "GET",
+                "wsgi.input": io.BytesIO(),
+            }
+            setup_testing_defaults(environ)
+            statuses = []
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: statuses.append(status))
+            for _ in response:
+                pass
+            response.close()
+            return time.perf_counter() - started, statuses[0]
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(call, self.request_paths(paths, total)))
+        return self.summarize(results, time.perf_counter() - started)
+
+    def run_asgi(self, paths, total, concurrency):
+        from django.core.handlers.asgi import ASGIHandler
+
+        handler = ASGIHandler()
+
+        async def call(path):
+            url = urlsplit(path)
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": url.path,
+                "raw_path": url.path.encode(),
+                "query_string": url.query.encode(),
+                "root_path": "",
+                "headers": [(b"host", b"testserver")],
+                "client": ("127.0.0.1", 0),
+                "server": ("testserver", 80),
+            }
+            done = asyncio.Event()
+            statuses = []
+
+            async def receive():
+                return {"type": "http.request", "body": b"", "more_body": False}
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    statuses.append(message["status"])
+                elif not message.get("more_body"):
+                    done.set()
+
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            await done.wait()
+            return time.perf_counter() - started, statuses[0]
+
+        async def run():
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def limited(path):
+                async with semaphore:
+                    return await call(path)
+
+            return await asyncio.gather(*(limited(path) for path in self.request_paths(paths, total)))
+
+        started = time.perf_counter()
+        results = asyncio.run(run())
+        return self.summarize(results, time.perf_counter() - started)
+
+    def summarize(self, results, elapsed):
+        summary = summarize_latencies([latency for latency, _ in results], elapsed)
+        summary["errors"] = sum(1 for _, status in results if not str(status).startswith("2"))
+        return summary
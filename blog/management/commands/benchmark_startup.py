@@ -0,0 +1,132 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Phases compared against a baseline; higher is worse for all of them.
+REGRESSION_METRICS = ("process_ms", "setup_ms", "wsgi_ms", "urls_ms", "templates_ms")
+
+
+def parse_importtime(output):
+    """
+    Sum the self time of the modules in ``python -X importtime`` output per
+    top-level package, in milliseconds.
+    """
+
+    packages = defaultdict(float)
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        packages[module.strip().split(".")[0]] += int(self_us) / 1000
+    return packages
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the application in fresh Python processes and measure how long "
+        "it takes until a worker is ready to serve: Django setup, loading the "
+        "WSGI handler and middleware, importing the URLconf and views, and "
+        "compiling the templates, plus the import time per package."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settings-module", default="core.settings_production",
+            help="Settings the measured processes start with.",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="Packages listed by import time.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="Fail when a phase is this many percent slower than the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1.")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        runs = [self.start(options["settings_module"]) for _ in range(options["runs"])]
+        results = {
+            "meta": {
+                "settings": options["settings_module"],
+                "runs": options["runs"],
+                "python": sys.version.split()[0],
+            },
+            "startup": {
+                metric: round(statistics.median(run[0][metric] for run in runs), 2)
+                for metric in runs[0][0]
+            },
+            "imports_ms": self.top_packages([run[1] for run in runs], options["top"]),
+        }
+
+        document = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(document + "\n")
+        else:
+            self.stdout.write(document)
+        self.report(results)
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def start(self, settings_module):
+        """
+        Run one cold start and return its phase timings and the import
+        times per package.
+        """
+
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings_module}
+        started = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-m", "blog.startup"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        elapsed = time.perf_counter() - started
+        if process.returncode:
+            raise CommandError(f"Starting the application failed:\n{process.stderr[-2000:]}")
+        timings = json.loads(process.stdout.strip().splitlines()[-1])
+        timings["process_ms"] = round(elapsed * 1000, 2)
+        return timings, parse_importtime(process.stderr)
+
+    def top_packages(self, imports, top):
+        packages = {
+            package: statistics.median(run.get(package, 0.0) for run in imports)
+            for package in set().union(*imports)
+        }
+        ranked = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        return {package: round(duration, 2) for package, duration in ranked[:top]}
+
+    def report(self, results):
+        for metric, value in results["startup"].items():
+            self.stderr.write(f"{metric:<20} {value:>9.2f}ms")
+        self.stderr.write("Slowest imports:")
+        for package, duration in results["imports_ms"].items():
+            self.stderr.write(f"  {package:<30} {duration:>9.2f}ms")
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        previous = baseline.get("startup", {})
+        for metric in REGRESSION_METRICS:
+            before, after = previous.get(metric), results["startup"].get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold / 100):
+                regressions.append(f"startup.{metric}: {before} -> {after}")
+        return regressions
@@ -0,0 +1,161 @@
+import json
+import random
+import time
+import tracemalloc
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from blog.benchmark import WORDS, percentile, summarize_latencies, text
+from blog.suggest import SuggestionIndex
+
+# Metrics compared against a baseline; higher is worse for all of them.
+REGRESSION_METRICS = ("lookup_p50_us", "lookup_p99_us", "cold_p50_us", "add_p50_us", "traced_bytes")
+
+
+def build_titles(count, seed=0):
+    """
+    Return ``count`` rows of (id, title, comment count, created at) shaped
+    like the ones the index loads from the post table.
+    """
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    return [
+        (
+            uuid.UUID(int=rng.getrandbits(128)),
+            text(rng, 6).capitalize(),
+            rng.randrange(50),
+            now - timezone.timedelta(minutes=index),
+        )
+        for index in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the title suggestion index from synthetic titles, time "
+        "prefix lookups of one to six characters and adding titles to it, "
+        "and measure its memory. No database is used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=10_000)
+        parser.add_argument("--limit", type=int, default=10, help="Suggestions per lookup.")
+        parser.add_argument("--updates", type=int, default=1000, help="Titles added after the build.")
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="Fail when a metric is this many percent worse than the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        if options["posts"] < 1 or options["queries"] < 1:
+            raise CommandError("--posts and --queries must be at least 1.")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        self.stderr.write(f"Indexing {options['posts']} titles...")
+        results = {
+            "meta": {key: options[key] for key in ("posts", "queries", "limit", "updates")},
+            "index": self.measure(options),
+        }
+
+        document = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(document + "\n")
+        else:
+            self.stdout.write(document)
+        self.report(results)
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def measure(self, options):
+        rows = build_titles(options["posts"] + options["updates"])
+        rows, updates = rows[:options["posts"]], rows[options["posts"]:]
+
+        def new_index():
+            return SuggestionIndex(max_bytes=float("inf"), limit=options["limit"])
+
+        tracemalloc.start()
+        traced = new_index()
+        traced.build(rows)
+        traced_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del traced
+
+        index = new_index()
+        started = time.perf_counter()
+        index.build(rows)
+        build_seconds = time.perf_counter() - started
+        keys, estimated_bytes = len(index.keys), index.bytes
+
+        rng = random.Random(1)
+        queries = [rng.choice(WORDS)[:rng.randint(1, 6)] for _ in range(options["queries"])]
+        cold, warm, seen = [], [], set()
+        for query in queries:
+            lookup_started = time.perf_counter()
+            index.suggest(query, options["limit"])
+            # The first lookup of a prefix longer than the precomputed ones
+            # walks its keys; later ones are served from the memo.
+            (warm if query in seen else cold).append(time.perf_counter() - lookup_started)
+            seen.add(query)
+
+        add_latencies = []
+        for row in updates:
+            add_started = time.perf_counter()
+            index.add(*row)
+            add_latencies.append(time.perf_counter() - add_started)
+
+        def us(seconds):
+            return round(percentile(seconds, 50) * 1_000_000, 1) if seconds else None
+
+        summary = summarize_latencies(warm)
+        return {
+            "posts": len(rows),
+            "keys": keys,
+            "build_ms": round(build_seconds * 1000, 1),
+            "estimated_bytes": estimated_bytes,
+            "traced_bytes": traced_bytes,
+            "lookup_p50_us": round(summary["p50_ms"] * 1000, 1),
+            "lookup_p95_us": round(summary["p95_ms"] * 1000, 1),
+            "lookup_p99_us": round(summary["p99_ms"] * 1000, 1),
+            "cold_lookups": len(cold),
+            "cold_p50_us": us(cold),
+            "cold_max_us": round(max(cold) * 1_000_000, 1),
+            "add_p50_us": us(add_latencies),
+        }
+
+    def report(self, results):
+        summary = results["index"]
+        self.stderr.write(
+            f"{summary['posts']} posts, {summary['keys']} keys, built in {summary['build_ms']}ms, "
+            f"{summary['traced_bytes'] / 2 ** 20:.1f} MiB "
+            f"(estimated {summary['estimated_bytes'] / 2 ** 20:.1f} MiB)"
+        )
+        self.stderr.write(
+            f"lookup p50 {summary['lookup_p50_us']}us  p95 {summary['lookup_p95_us']}us  "
+            f"p99 {summary['lookup_p99_us']}us  first lookup of a prefix p50 {summary['cold_p50_us']}us  "
+            f"max {summary['cold_max_us']}us  add p50 {summary['add_p50_us']}us"
+        )
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        previous = baseline.get("index", {})
+        for metric in REGRESSION_METRICS:
+            before, after = previous.get(metric), results["index"].get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold / 100):
+                regressions.append(f"index.{metric}: {before} -> {after}")
+        return regressions
@@ -0,0 +1,175 @@
+import datetime
+import json
+import random
+import time
+import uuid
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+
+from blog.benchmark import summarize_latencies, text
+from blog.cache import POST_CARD_TEMPLATE
+from blog.models import Category, Post, User, make_excerpt
+from blog.pagination import CursorPage
+
+# Names of the template engines in TEMPLATES.
+ENGINES = ("django", "jinja2")
+
+# Metrics compared against a baseline; higher is worse for all of them.
+REGRESSION_METRICS = ("page_p50_ms", "page_p95_ms")
+
+
+def build_posts(count, seed=0):
+    """
+    Build ``count`` unsaved posts with authors and categories, enough to
+    render the feed without a database.
+    """
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    authors = [
+        User(id=uuid.UUID(int=rng.getrandbits(128)), first_name=text(rng, 1), last_name=text(rng, 1))
+        for _ in range(10)
+    ]
+    categories = [
+        Category(id=uuid.UUID(int=rng.getrandbits(128)), name=text(rng, 2)) for _ in range(5)
+    ]
+    posts = []
+    for index in range(count):
+        content = text(rng, 300)
+        posts.append(Post(
+            id=uuid.UUID(int=rng.getrandbits(128)),
+            title=text(rng, 6),
+            content=content,
+            excerpt=make_excerpt(content),
+            author=rng.choice(authors),
+            category=rng.choice(categories + [None]),
+            comment_count=rng.randrange(50),
+            created_at=now - datetime.timedelta(hours=index),
+            updated_at=now - datetime.timedelta(hours=index),
+        ))
+    return posts
+
+
+class Command(BaseCommand):
+    help = (
+        "Render the homepage feed with a page of posts through the Django and "
+        "the Jinja2 template engine and compare their render times. Cards are "
+        "rendered every time, as on a cold fragment cache. No database is used."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100, help="Posts on the rendered page.")
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--engine", action="append", dest="engines", choices=ENGINES,
+            help="Engine to measure, may be repeated. Defaults to both.",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+        parser.add_argument("--baseline", help="JSON results of a previous run to compare against.")
+        parser.add_argument(
+            "--threshold", type=float, default=10.0,
+            help="Fail when a metric is this many percent worse than the baseline.",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as file:
+                baseline = json.load(file)
+
+        posts = build_posts(options["posts"])
+        request = RequestFactory().get("/")
+        request.user = AnonymousUser()
+        categories = [
+            {"category_id": category.id, "category__name": category.name, "post_count": 10}
+            for category in {post.category for post in posts if post.category}
+        ]
+
+        results = {
+            "meta": {"posts": options["posts"], "iterations": options["iterations"]},
+            "engines": {},
+        }
+        for name in options["engines"] or ENGINES:
+            self.stderr.write(f"Rendering with {name}...")
+            results["engines"][name] = self.measure(name, posts, categories, request, options)
+        engines_results = results["engines"]
+        if {"django", "jinja2"} <= set(engines_results):
+            results["jinja2_speedup"] = round(
+                engines_results["django"]["page_p50_ms"] / engines_results["jinja2"]["page_p50_ms"], 2
+            )
+
+        document = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(document + "\n")
+        else:
+            self.stdout.write(document)
+        self.report(results)
+
+        if baseline is not None:
+            regressions = self.compare(baseline, results, options["threshold"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stderr.write(self.style.SUCCESS("No regressions against the baseline."))
+
+    def render_page(self, engine, posts, categories, request):
+        cards = [
+            mark_safe(render_to_string(POST_CARD_TEMPLATE, {"post": post}, using=engine))
+            for post in posts
+        ]
+        page = CursorPage(posts)
+        context = {
+            "posts": page, "cards": cards, "page": page, "query": "", "categories": categories,
+        }
+        return render_to_string("homepage.html", context, request=request, using=engine)
+
+    def measure(self, engine, posts, categories, request, options):
+        for _ in range(options["warmup"]):
+            html = self.render_page(engine, posts, categories, request)
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(options["iterations"]):
+            render_started = time.perf_counter()
+            html = self.render_page(engine, posts, categories, request)
+            latencies.append(time.perf_counter() - render_started)
+        summary = summarize_latencies(latencies, time.perf_counter() - started)
+        return {
+            "renders": summary["requests"],
+            "page_p50_ms": summary["p50_ms"],
+            "page_p95_ms": summary["p95_ms"],
+            "page_p99_ms": summary["p99_ms"],
+            "card_us": round(summary["p50_ms"] * 1000 / max(len(posts), 1), 1),
+            "page_bytes": len(html.encode()),
+        }
+
+    def report(self, results):
+        for name, summary in results["engines"].items():
+            self.stderr.write(
+                f"{name:<10} p50 {summary['page_p50_ms']:>8.2f}ms  p95 {summary['page_p95_ms']:>8.2f}ms  "
+                f"{summary['card_us']:>8.1f}us/post  {summary['page_bytes']} bytes"
+            )
+        if "jinja2_speedup" in results:
+            self.stderr.write(f"Jinja2 renders the page {results['jinja2_speedup']}x as fast.")
+
+    def compare(self, baseline, results, threshold):
+        regressions = []
+        for name, summary in results["engines"].items():
+            previous = baseline.get("engines", {}).get(name)
+            if not previous:
+                continue
+            for metric in REGRESSION_METRICS:
+                before, after = previous.get(metric), summary.get(metric)
+                if before is None or after is None:
+                    continue
+                if after > before * (1 + threshold / 100):
+                    regressions.append(f"{name}.{metric}: {before} -> {after}")
+        return regressions
@@ -0,0 +1,178 @@
+import json
+import time
+import uuid
+
+from django.apps.registry import Apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.test.utils import setup_databases, teardown_databases
+from django.utils import timezone
+
+from blog.ids import uuid7
+
+SCHEMES = {"uuid4": uuid.uuid4, "uuid7": uuid7}
+
+
+def comment_model(scheme):
+    """
+    Return an unregistered model shaped like the primary and foreign key
+    indexes of Comment, with a table per key scheme.
+    """
+
+    class Meta:
+        app_label = "blog"
+        db_table = f"blog_benchmark_{scheme}"
+        apps = Apps()
+
+    return type(f"Benchmark{scheme.title()}Comment", (models.Model,), {
+        "__module__": __name__,
+        "Meta": Meta,
+        "id": models.UUIDField(primary_key=True),
+        "post_id": models.UUIDField(db_index=True),
+        "created_at": models.DateTimeField(),
+    })
+
+
+def index_sizes(model):
+    """
+    Return the on-disk size in bytes of the table and each of its indexes,
+    keyed by ``table``, ``primary_key`` and the indexed column names.
+    """
+
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                """
+                SELECT a.attname, i.indisprimary, pg_relation_size(i.indexrelid)
+                FROM pg_index i
+                JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                WHERE i.indrelid = %s::regclass
+                """,
+                [table],
+            )
+            rows = cursor.fetchall()
+            cursor.execute("SELECT pg_relation_size(%s::regclass)", [table])
+            table_size = cursor.fetchone()[0]
+        elif connection.vendor == "sqlite":
+            cursor.execute(
+                "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = %s", [table]
+            )
+            indexes = cursor.fetchall()
+            rows = []
+            for name, sql in indexes:
+                cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [name])
+                column = "id" if sql is None else "post_id"
+                rows.append((column, sql is None, cursor.fetchone()[0]))
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [table])
+            table_size = cursor.fetchone()[0]
+        else:
+            return None
+
+    sizes = {"table": table_size}
+    for column, primary, size in rows:
+        sizes["primary_key" if primary else column] = size
+    return sizes
+
+
+class Command(BaseCommand):
+    help = (
+        "Insert the same comment-shaped rows into a table keyed by random "
+        "(uuid4) and one keyed by time-ordered (uuid7) ids, in a throwaway "
+        "test database, and compare insert throughput and index sizes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--posts", type=int, default=10_000, help="Distinct post ids referenced.")
+        parser.add_argument(
+            "--scheme", action="append", dest="schemes", choices=SCHEMES,
+            help="Key scheme to measure, may be repeated. Defaults to both.",
+        )
+        parser.add_argument("--output", help="Write the JSON results to this file instead of stdout.")
+
+    def handle(self, *args, **options):
+        if options["rows"] < 1 or options["batch_size"] < 1:
+            raise CommandError("--rows and --batch-size must be at least 1.")
+
+        old_config = setup_databases(verbosity=0, interactive=False)
+        try:
+            results = {
+                "meta": {
+                    key: options[key] for key in ("rows", "batch_size", "posts")
+                },
+                "schemes": {},
+            }
+            results["meta"]["database"] = connection.vendor
+            for scheme in options["schemes"] or SCHEMES:
+                self.stderr.write(f"Inserting {options['rows']} rows keyed by {scheme}...")
+                results["schemes"][scheme] = self.measure(scheme, options)
+        finally:
+            teardown_databases(old_config, verbosity=0)
+
+        document = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(document + "\n")
+        else:
+            self.stdout.write(document)
+        self.report(results)
+
+    def measure(self, scheme, options):
+        model = comment_model(scheme)
+        with connection.schema_editor() as editor:
+            editor.create_model(model)
+        try:
+            generate = SCHEMES[scheme]
+            post_ids = [uuid.uuid4() for _ in range(options["posts"])]
+            fields = [model._meta.get_field(name) for name in ("id", "post_id", "created_at")]
+            sql = "INSERT INTO {} ({}) VALUES ({})".format(
+                connection.ops.quote_name(model._meta.db_table),
+                ", ".join(connection.ops.quote_name(field.column) for field in fields),
+                ", ".join(["%s"] * len(fields)),
+            )
+            now = timezone.now()
+
+            batch_seconds = []
+            inserted = 0
+            while inserted < options["rows"]:
+                size = min(options["batch_size"], options["rows"] - inserted)
+                rows = [
+                    [
+                        field.get_db_prep_value(value, connection)
+                        for field, value in zip(fields, (generate(), post_ids[(inserted + n) % len(post_ids)], now))
+                    ]
+                    for n in range(size)
+                ]
+                started = time.perf_counter()
+                with transaction.atomic(), connection.cursor() as cursor:
+                    cursor.executemany(sql, rows)
+                batch_seconds.append((size, time.perf_counter() - started))
+                inserted += size
+
+            total = sum(seconds for _, seconds in batch_seconds)
+            # The last tenth shows how inserts hold up once the index is big.
+            tail = batch_seconds[-max(1, len(batch_seconds) // 10):]
+            return {
+                "rows": inserted,
+                "seconds": round(total, 2),
+                "rows_per_second": round(inserted / total),
+                "tail_rows_per_second": round(
+                    sum(size for size, _ in tail) / sum(seconds for _, seconds in tail)
+                ),
+                "bytes": index_sizes(model),
+            }
+        finally:
+            with connection.schema_editor() as editor:
+                editor.delete_model(model)
+
+    def report(self, results):
+        for scheme, summary in results["schemes"].items():
+            sizes = summary["bytes"] or {}
+            self.stderr.write(
+                f"{scheme:<6} {summary['rows_per_second']:>9} rows/s  "
+                f"(last batches {summary['tail_rows_per_second']:>9} rows/s)  "
+                f"pk index {sizes.get('primary_key', 0) / 2 ** 20:>8.1f} MiB  "
+                f"post_id index {sizes.get('post_id', 0) / 2 ** 20:>8.1f} MiB"
+            )
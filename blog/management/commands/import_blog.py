@@ -0,0 +1,155 @@
+import io
+import json
+import sys
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from blog.cache import bump_content_version
+from blog.management.commands.export_blog import EXPORT_MODELS
+from blog.management.progress import ProgressReporter
+from blog.models import AuthorStats, CategoryPostCount
+from blog.search import get_search_backend
+from blog.suggest import record_suggestion_change
+from blog.timestamps import preserve_timestamps
+from blog.windows import day_scope
+
+IMPORTABLE = {model._meta.label_lower for model in EXPORT_MODELS}
+
+
+def copy_text_value(value):
+    if value is None:
+        return "\\N"
+    text = str(value)
+    return (
+        text.replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Load a JSON lines file written by export_blog, in batches and with "
+        "the original primary keys. Uses COPY on PostgreSQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "input", nargs="?",
+            help="File to read from. Defaults to standard input.",
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Rows inserted per statement.",
+        )
+        parser.add_argument(
+            "--no-copy", action="store_true",
+            help="Use bulk_create even on PostgreSQL.",
+        )
+        parser.add_argument(
+            "--ignore-conflicts", action="store_true",
+            help="Skip rows whose primary key already exists (bulk_create only).",
+        )
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        self.connection = connections[options["database"]]
+        self.use_copy = self.connection.vendor == "postgresql" and not options["no_copy"]
+        if self.use_copy and options["ignore_conflicts"]:
+            raise CommandError("--ignore-conflicts requires --no-copy.")
+        self.options = options
+        self.progress = ProgressReporter(self.stderr)
+        # Version scopes of the feeds and pages the imported posts show up in.
+        self.scopes = {"content", "posts", "categories"}
+
+        source = open(options["input"]) if options["input"] else sys.stdin
+        try:
+            self.load(source)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        imported = self.progress.rows_by_label
+        if imported.get("blog.post"):
+            get_search_backend(self.connection.alias).rebuild(using=self.connection.alias)
+        if imported.get("blog.post") or imported.get("blog.category"):
+            CategoryPostCount.objects.using(self.connection.alias).rebuild()
+        if imported.get("blog.post") or imported.get("blog.user"):
+            AuthorStats.objects.using(self.connection.alias).rebuild()
+        bump_content_version(*self.scopes)
+        if imported.get("blog.post"):
+            record_suggestion_change()
+        self.stderr.write(self.style.SUCCESS(f"Imported {self.progress.summary()}"))
+
+    def load(self, source):
+        batch_size = self.options["batch_size"]
+        label, batch = None, []
+        for line_number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                record_label, fields = record["model"], record["fields"]
+            except (ValueError, KeyError, TypeError):
+                raise CommandError(f"Line {line_number}: not an export record.")
+            if record_label not in IMPORTABLE:
+                raise CommandError(f"Line {line_number}: unknown model {record_label!r}.")
+
+            if record_label != label or len(batch) >= batch_size:
+                self.flush(label, batch)
+                label, batch = record_label, []
+            batch.append(fields)
+        self.flush(label, batch)
+
+    def flush(self, label, rows):
+        if not rows:
+            return
+        model = apps.get_model(label)
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        objs = []
+        for row in rows:
+            values = {
+                attname: fields[attname].to_python(value)
+                for attname, value in row.items()
+                if attname in fields
+            }
+            objs.append(model(**values))
+        if label == "blog.post":
+            for obj in objs:
+                self.scopes.add(f"author:{obj.author_id}")
+                if obj.category_id is not None:
+                    self.scopes.add(f"category:{obj.category_id}")
+                if obj.created_at is not None:
+                    self.scopes.add(day_scope(obj.created_at))
+
+        if self.use_copy:
+            self.copy(model, objs)
+        else:
+            with preserve_timestamps(model), transaction.atomic(using=self.connection.alias):
+                model.objects.using(self.connection.alias).bulk_create(
+                    objs,
+                    batch_size=self.options["batch_size"],
+                    ignore_conflicts=self.options["ignore_conflicts"],
+                )
+        self.progress.advance(label, len(objs))
+
+    def copy(self, model, objs):
+        fields = model._meta.concrete_fields
+        buffer = io.StringIO()
+        for obj in objs:
+            buffer.write("\t".join(
+                copy_text_value(field.get_db_prep_save(getattr(obj, field.attname), self.connection))
+                for field in fields
+            ))
+            buffer.write("\n")
+        buffer.seek(0)
+
+        quote = self.connection.ops.quote_name
+        columns = ", ".join(quote(field.column) for field in fields)
+        with transaction.atomic(using=self.connection.alias), self.connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN", buffer
+            )
@@ -0,0 +1,76 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+
+from blog.models import AuthorStats, CategoryPostCount, Comment, Post
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the denormalized comment counters on posts, the "
+        "materialized post counts of categories and the author stats to "
+        "repair drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Number of posts recomputed per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Report drifted posts without writing the corrections.",
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+        checked = repaired = 0
+        last_pk = None
+
+        while True:
+            with transaction.atomic():
+                posts = Post.objects.order_by("pk").only(
+                    "pk", "comment_count", "last_comment_at"
+                )
+                if last_pk is not None:
+                    posts = posts.filter(pk__gt=last_pk)
+                if not dry_run:
+                    posts = posts.select_for_update()
+                posts = list(posts[:batch_size])
+                if not posts:
+                    break
+                last_pk = posts[-1].pk
+
+                actual = {
+                    row["post_id"]: row
+                    for row in Comment.objects.filter(post__in=posts)
+                    .order_by()
+                    .values("post_id")
+                    .annotate(count=Count("pk"), last=Max("created_at"))
+                }
+                drifted = []
+                for post in posts:
+                    row = actual.get(post.pk, {"count": 0, "last": None})
+                    if (post.comment_count, post.last_comment_at) != (row["count"], row["last"]):
+                        post.comment_count = row["count"]
+                        post.last_comment_at = row["last"]
+                        drifted.append(post)
+                if drifted and not dry_run:
+                    Post.objects.bulk_update(drifted, ["comment_count", "last_comment_at"])
+
+            checked += len(posts)
+            repaired += len(drifted)
+
+        verb = "Found" if dry_run else "Repaired"
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} posts. {verb} {repaired} drifted counters.")
+        )
+
+        with transaction.atomic():
+            drifted_categories = CategoryPostCount.objects.rebuild(commit=not dry_run)
+            drifted_authors = AuthorStats.objects.rebuild(commit=not dry_run)
+        self.stdout.write(
+            self.style.SUCCESS(f"{verb} {drifted_categories} drifted category post counts.")
+        )
+        self.stdout.write(self.style.SUCCESS(f"{verb} {drifted_authors} drifted author stats."))
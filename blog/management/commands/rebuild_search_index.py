@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from blog.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = "Rebuild the post search index from the post table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        backend = get_search_backend(options["database"])
+        backend.rebuild(using=options["database"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt search index using {type(backend).__name__}.")
+        )
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blog.comment_buffer import replay_journals
+
+
+class Command(BaseCommand):
+    help = (
+        "Write the comments left in the write-behind journals of processes "
+        "that are no longer running. Journals of live processes are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--journal-dir", default=settings.BLOG_COMMENT_JOURNAL_DIR,
+            help="Directory holding the journals.",
+        )
+
+    def handle(self, *args, **options):
+        inserted = replay_journals(options["journal_dir"])
+        self.stdout.write(self.style.SUCCESS(f"Replayed {inserted} comments."))
@@ -0,0 +1,38 @@
+import time
+
+
+class ProgressReporter:
+    """
+    Report row counts and throughput of a long-running command to a stream,
+    at most once per ``interval`` seconds.
+    """
+
+    def __init__(self, stream, interval=2.0):
+        self.stream = stream
+        self.interval = interval
+        self.started = self.last_report = time.perf_counter()
+        self.rows = 0
+        self.rows_by_label = {}
+
+    def advance(self, label, count):
+        self.rows += count
+        self.rows_by_label[label] = self.rows_by_label.get(label, 0) + count
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(label)
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.started
+        return self.rows / elapsed if elapsed else 0.0
+
+    def report(self, label):
+        self.stream.write(
+            f"{label}: {self.rows_by_label.get(label, 0)} rows "
+            f"({self.rows} total, {self.rate():,.0f} rows/sec)"
+        )
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started
+        parts = ", ".join(f"{label}: {count}" for label, count in self.rows_by_label.items())
+        return f"{self.rows} rows in {elapsed:.1f}s ({self.rate():,.0f} rows/sec). {parts}"
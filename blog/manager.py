@@ -1,4 +1,12 @@
 from django.contrib.auth.base_user import BaseUserManager
+from django.db import models, transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.dispatch import Signal
+
+# Sent with the post id once a change to the comment counters of a post
+# has been committed.
+post_comments_changed = Signal()
 
 
 class UserManager(BaseUserManager):
@@ -29,3 +37,202 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault('is_active', True)
 
         return self.create_user(email, password, **extra_fields)
+
+
+class PostQuerySet(models.QuerySet):
+
+    FEED_FIELDS = [
+        "id",
+        "title",
+        "excerpt",
+        "created_at",
+        "updated_at",
+        "comment_count",
+        "author__id",
+        "author__first_name",
+        "category__id",
+        "category__name",
+    ]
+
+    def for_feed(self):
+        """
+        Return the lean projection used to render post cards: the author
+        and category are joined in, and the full content is left behind in
+        favour of the precomputed excerpt.
+        """
+
+        return self.select_related("author", "category").only(*self.FEED_FIELDS)
+
+    def _comments_changed(self, post_id):
+        # Receivers bump cache versions, so they run once the new counters
+        # are committed and visible to other connections.
+        transaction.on_commit(
+            lambda: post_comments_changed.send(sender=self.model, post_id=post_id), using=self.db
+        )
+
+    def record_comments(self, post_id, count, last_comment_at):
+        """
+        Atomically add ``count`` new comments, the latest made at
+        ``last_comment_at``, to the post's denormalized counters.
+        """
+
+        updated = self.filter(pk=post_id).update(
+            comment_count=F("comment_count") + count,
+            last_comment_at=Greatest(
+                Coalesce("last_comment_at", Value(last_comment_at)), Value(last_comment_at)
+            ),
+        )
+        self._comments_changed(post_id)
+        return updated
+
+    def forget_comments(self, post_id, count):
+        """
+        Atomically remove ``count`` deleted comments from the post's
+        denormalized counters.
+        """
+
+        comment_model = self.model._meta.get_field("comments").related_model
+        comments = comment_model.objects.filter(post=OuterRef("pk"))
+        updated = self.filter(pk=post_id).update(
+            comment_count=Greatest(F("comment_count") - count, Value(0)),
+            last_comment_at=Subquery(
+                comments.order_by("-created_at").values("created_at")[:1]
+            ),
+        )
+        self._comments_changed(post_id)
+        return updated
+
+
+PostManager = models.Manager.from_queryset(PostQuerySet)
+
+
+class CommentQuerySet(models.QuerySet):
+
+    def delete(self):
+        """
+        Delete the comments and keep the counters of their posts in step.
+        """
+
+        post_model = self.model._meta.get_field("post").related_model
+        with transaction.atomic(using=self.db):
+            deleted_per_post = list(
+                self.order_by().values_list("post_id").annotate(count=Count("pk"))
+            )
+            result = super().delete()
+            for post_id, count in deleted_per_post:
+                post_model.objects.forget_comments(post_id, count)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
+CommentManager = models.Manager.from_queryset(CommentQuerySet)
+
+
+class CategoryPostCountQuerySet(models.QuerySet):
+
+    def adjust(self, deltas):
+        """
+        Atomically apply ``{category_id: delta}`` to the materialized post
+        counts, creating missing rows on the way.
+        """
+
+        for category_id, delta in deltas.items():
+            if category_id is None or not delta:
+                continue
+            counts = self.filter(pk=category_id)
+            updated = counts.update(post_count=Greatest(F("post_count") + delta, Value(0)))
+            if not updated and delta > 0:
+                self.bulk_create([self.model(pk=category_id)], ignore_conflicts=True)
+                counts.update(post_count=Greatest(F("post_count") + delta, Value(0)))
+
+    def rebuild(self, category_ids=None, commit=True):
+        """
+        Recompute the counts of the given categories (all of them by
+        default) from the posts table. Returns the number of drifted rows,
+        which are only corrected when ``commit`` is true.
+        """
+
+        category_model = self.model._meta.get_field("category").related_model
+        categories = category_model.objects.using(self.db)
+        if category_ids is not None:
+            categories = categories.filter(pk__in=category_ids)
+        actual = dict(
+            categories.order_by().annotate(count=Count("post_category")).values_list("pk", "count")
+        )
+        stored = dict(self.filter(pk__in=actual).values_list("pk", "post_count"))
+        drifted = [
+            self.model(pk=pk, post_count=count)
+            for pk, count in actual.items() if stored.get(pk) != count
+        ]
+        if not commit:
+            return len(drifted)
+        self.bulk_create(
+            drifted, update_conflicts=True, unique_fields=["category"], update_fields=["post_count"],
+        )
+        return len(drifted)
+
+
+CategoryPostCountManager = models.Manager.from_queryset(CategoryPostCountQuerySet)
+
+
+class AuthorStatsQuerySet(models.QuerySet):
+
+    def refresh(self, author_ids, create=True):
+        """
+        Recompute the post count and latest post time of the given authors
+        off the (author, created_at) index, creating missing stats rows on
+        the way unless ``create`` is false.
+        """
+
+        author_ids = {author_id for author_id in author_ids if author_id is not None}
+        if not author_ids:
+            return
+        post_model = self.model._meta.get_field("user").related_model._meta.get_field(
+            "post_auther"
+        ).related_model
+        posts = post_model.objects.using(self.db).filter(author=OuterRef("pk")).order_by()
+        if create:
+            self.bulk_create(
+                [self.model(pk=author_id) for author_id in author_ids], ignore_conflicts=True
+            )
+        self.filter(pk__in=author_ids).update(
+            post_count=Coalesce(
+                Subquery(posts.values("author").annotate(count=Count("pk")).values("count")),
+                Value(0),
+            ),
+            last_post_at=Subquery(posts.order_by("-created_at").values("created_at")[:1]),
+        )
+
+    def rebuild(self, commit=True):
+        """
+        Recompute the stats of every author from the posts table. Returns
+        the number of drifted rows, which are only corrected when
+        ``commit`` is true.
+        """
+
+        user_model = self.model._meta.get_field("user").related_model
+        actual = {
+            pk: (count, last)
+            for pk, count, last in user_model.objects.using(self.db).order_by()
+            .annotate(count=Count("post_auther"), last=Max("post_auther__created_at"))
+            .values_list("pk", "count", "last")
+        }
+        stored = {
+            pk: (count, last)
+            for pk, count, last in self.values_list("pk", "post_count", "last_post_at")
+        }
+        drifted = [
+            self.model(pk=pk, post_count=count, last_post_at=last)
+            for pk, (count, last) in actual.items() if stored.get(pk) != (count, last)
+        ]
+        if commit:
+            self.bulk_create(
+                drifted, update_conflicts=True, unique_fields=["user"],
+                update_fields=["post_count", "last_post_at"],
+            )
+        return len(drifted)
+
+
+AuthorStatsManager = models.Manager.from_queryset(AuthorStatsQuerySet)
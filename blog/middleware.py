@@ -0,0 +1,435 @@
+import logging
+import mimetypes
+import os
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import FileResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.functional import cached_property
+from django.utils.http import http_date
+
+from blog.compression import accepted_encodings, collapse_whitespace, get_encoders
+from blog.instrumentation import current_metrics, start_metrics, stop_metrics
+from blog.routers import replica_reads, replica_sticky_seconds
+
+request_logger = logging.getLogger("blog.requests")
+slow_request_logger = logging.getLogger("blog.requests.slow")
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Precompressed variants written by blog.storage, best first.
+STATIC_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class ReplicaPinningMiddleware:
+    """
+    Let safe requests read from the replicas, except for clients that wrote
+    something within the last BLOG_REPLICA_STICKY_SECONDS: every unsafe
+    request sets a short-lived cookie that keeps that client's reads on the
+    primary until the replicas have caught up with its own writes. Admin
+    pages always read from the primary. Other clients keep reading from the
+    replicas after a change, except for the cache refills under a version
+    that is still settling (see ``blog.cache.refill_reads``).
+    """
+
+    cookie_name = "blog_primary_until"
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @cached_property
+    def admin_prefix(self):
+        try:
+            return reverse("admin:index")
+        except NoReverseMatch:
+            return None
+
+    def sticky_seconds(self):
+        return replica_sticky_seconds()
+
+    def is_pinned(self, request):
+        if request.method not in SAFE_METHODS:
+            return True
+        if self.admin_prefix and request.path.startswith(self.admin_prefix):
+            return True
+        try:
+            if float(request.COOKIES.get(self.cookie_name, 0)) > time.time():
+                return True
+        except ValueError:
+            pass
+        return False
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        with replica_reads(not self.is_pinned(request)):
+            response = self.get_response(request)
+        return self.pin_writer(request, response)
+
+    async def __acall__(self, request):
+        # The routing flag is set inside the coroutine, so the view and
+        # the worker threads it hands queries to see it.
+        with replica_reads(not self.is_pinned(request)):
+            response = await self.get_response(request)
+        return self.pin_writer(request, response)
+
+    def pin_writer(self, request, response):
+        if request.method not in SAFE_METHODS:
+            sticky_seconds = self.sticky_seconds()
+            response.set_cookie(
+                self.cookie_name,
+                str(time.time() + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite="Lax",
+            )
+        return response
+
+
+class RequestMetricsMiddleware:
+    """
+    Measure the query count, database time, template render time and view
+    time of every request, and report them in a ``Server-Timing`` header
+    and a structured ``blog.requests`` log line.
+
+    Requests slower than BLOG_SLOW_REQUEST_MS additionally log their most
+    expensive SQL fingerprints to ``blog.requests.slow``. Work done while
+    a streaming response is consumed is not included.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, "BLOG_SERVER_TIMING", True)
+        self.slow_threshold = getattr(settings, "BLOG_SLOW_REQUEST_MS", 500) / 1000
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # Django adapts a sync process_view to the async chain with a
+            # thread hop, so the async one is registered instead.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics, token = start_metrics()
+        try:
+            response = self.get_response(request)
+            self.stop_view_timer(metrics)
+        finally:
+            stop_metrics(token)
+        return self.report(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics, token = start_metrics()
+        try:
+            response = await self.get_response(request)
+            self.stop_view_timer(metrics)
+        finally:
+            stop_metrics(token)
+        return self.report(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view_timer()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.start_view_timer()
+
+    def start_view_timer(self):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def stop_view_timer(self, metrics):
+        if metrics.view_started is not None:
+            metrics.view_time = time.perf_counter() - metrics.view_started
+
+    def report(self, request, response, metrics):
+        total_time = metrics.total_time
+        if self.server_timing:
+            response.headers["Server-Timing"] = self.server_timing_header(metrics, total_time)
+        self.log(request, response, metrics, total_time)
+        return response
+
+    def server_timing_header(self, metrics, total_time):
+        entries = [
+            f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.queries} queries"',
+            f"tpl;dur={metrics.template_time * 1000:.1f}",
+            f"view;dur={metrics.view_time * 1000:.1f}",
+        ]
+        for name, duration in metrics.timings.items():
+            entry = f"{name};dur={duration * 1000:.1f}"
+            details = metrics.details.get(name)
+            if details:
+                entry += ';desc="{}"'.format(" ".join(f"{key}={value}" for key, value in details.items()))
+            entries.append(entry)
+        entries.append(f"total;dur={total_time * 1000:.1f}")
+        return ", ".join(entries)
+
+    def log(self, request, response, metrics, total_time):
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            "queries": metrics.queries,
+            "db_ms": round(metrics.db_time * 1000, 1),
+            "template_ms": round(metrics.template_time * 1000, 1),
+            "view_ms": round(metrics.view_time * 1000, 1),
+            "total_ms": round(total_time * 1000, 1),
+        }
+        for name, duration in metrics.timings.items():
+            fields[f"{name}_ms"] = round(duration * 1000, 1)
+            for key, value in metrics.details.get(name, {}).items():
+                fields[f"{name}_{key}"] = value
+        if request_logger.isEnabledFor(logging.INFO):
+            request_logger.info(
+                " ".join(f"{key}={value}" for key, value in fields.items()),
+                extra={"metrics": fields},
+            )
+        if total_time >= self.slow_threshold and slow_request_logger.isEnabledFor(logging.WARNING):
+            fingerprints = metrics.fingerprints()
+            lines = [
+                f"  {count}x {duration * 1000:.1f}ms {fingerprint}"
+                for fingerprint, count, duration in fingerprints
+            ]
+            slow_request_logger.warning(
+                "Slow request %s %s took %.1fms with %d queries\n%s",
+                request.method, request.path, total_time * 1000, metrics.queries, "\n".join(lines),
+                extra={"metrics": fields, "fingerprints": fingerprints},
+            )
+
+
+class PrecompressedStaticMiddleware:
+    """
+    Serve the collected files in STATIC_ROOT without going through the
+    rest of the stack, picking the precompressed ``.br`` or ``.gz`` variant
+    the client accepts. Files with a content hash in their name are cached
+    as immutable for a year, everything else for BLOG_STATIC_MAX_AGE.
+
+    STATIC_ROOT is indexed once per process, so collectstatic has to run
+    before the server starts, as it does in server-entrypoint.sh.
+    """
+
+    immutable_max_age = 60 * 60 * 24 * 365
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, "BLOG_SERVE_STATIC", False) or not settings.STATIC_ROOT:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.root = str(settings.STATIC_ROOT)
+        self.prefix = urlsplit(settings.STATIC_URL).path
+        self.max_age = getattr(settings, "BLOG_STATIC_MAX_AGE", 60 * 60)
+
+    @cached_property
+    def files(self):
+        """
+        Map every collected file's name to its path and its precompressed
+        variants as ``(encoding, path)``.
+        """
+
+        names = set()
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                names.add(name)
+
+        variants = {
+            name + suffix
+            for name in names
+            for _, suffix in STATIC_ENCODINGS
+            if name + suffix in names
+        }
+        return {
+            name: {
+                "path": os.path.join(self.root, name),
+                "variants": [
+                    (encoding, os.path.join(self.root, name + suffix))
+                    for encoding, suffix in STATIC_ENCODINGS
+                    if name + suffix in names
+                ],
+            }
+            for name in names
+            if name not in variants
+        }
+
+    @cached_property
+    def immutable_names(self):
+        return set(getattr(staticfiles_storage, "hashed_files", {}).values())
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.serve_static(request)
+        if response is not None:
+            return response
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        response = self.serve_static(request)
+        if response is not None:
+            return response
+        return await self.get_response(request)
+
+    def serve_static(self, request):
+        if request.method in ("GET", "HEAD") and request.path.startswith(self.prefix):
+            return self.serve(request, request.path[len(self.prefix):])
+        return None
+
+    def serve(self, request, name):
+        entry = self.files.get(name)
+        if entry is None:
+            return None
+
+        path, encoding = entry["path"], None
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for candidate, variant_path in entry["variants"]:
+            if candidate in accepted:
+                path, encoding = variant_path, candidate
+                break
+
+        last_modified = int(os.stat(path).st_mtime)
+        response = get_conditional_response(request, last_modified=last_modified)
+        if response is None:
+            content_type, _ = mimetypes.guess_type(name)
+            response = FileResponse(
+                open(path, "rb"), content_type=content_type or "application/octet-stream"
+            )
+            del response.headers["Content-Disposition"]
+            if encoding:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["Last-Modified"] = http_date(last_modified)
+        if name in self.immutable_names:
+            patch_cache_control(response, public=True, max_age=self.immutable_max_age, immutable=True)
+        else:
+            patch_cache_control(response, public=True, max_age=self.max_age)
+        if entry["variants"]:
+            patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress text responses with brotli or gzip, whichever the client
+    accepts (brotli first), and optionally collapse the whitespace of HTML
+    responses before that.
+
+    Responses below the BLOG_COMPRESSION_MIN_BYTES and
+    BLOG_COLLAPSE_WHITESPACE_MIN_BYTES thresholds, streaming responses and
+    responses that already have a Content-Encoding are left alone. The time
+    spent and the bytes saved are reported to the request metrics as
+    ``minify`` and ``compress``, so this has to sit below
+    RequestMetricsMiddleware.
+    """
+
+    compressible_types = (
+        "text/", "application/json", "application/javascript", "application/xml",
+        "application/rss+xml", "application/atom+xml", "application/feed+json",
+        "image/svg+xml",
+    )
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.compress = getattr(settings, "BLOG_COMPRESSION", True)
+        self.collapse = getattr(settings, "BLOG_COLLAPSE_WHITESPACE", False)
+        if not self.compress and not self.collapse:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.compress_min_bytes = getattr(settings, "BLOG_COMPRESSION_MIN_BYTES", 512)
+        self.collapse_min_bytes = getattr(settings, "BLOG_COLLAPSE_WHITESPACE_MIN_BYTES", 1024)
+        self.levels = {
+            "br": getattr(settings, "BLOG_BROTLI_QUALITY", 5),
+            "gzip": getattr(settings, "BLOG_GZIP_LEVEL", 6),
+        }
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if (
+            response.streaming
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(self.compressible_types)
+        ):
+            return response
+
+        metrics = current_metrics()
+        if self.collapse and response.get("Content-Type", "").startswith("text/html"):
+            self.collapse_whitespace(response, metrics)
+        if self.compress:
+            patch_vary_headers(response, ("Accept-Encoding",))
+            if "no-transform" not in response.get("Cache-Control", ""):
+                self.compress_content(request, response, metrics)
+        return response
+
+    def collapse_whitespace(self, response, metrics):
+        if len(response.content) < self.collapse_min_bytes:
+            return
+        started = time.perf_counter()
+        size = len(response.content)
+        charset = response.charset
+        response.content = collapse_whitespace(response.content.decode(charset)).encode(charset)
+        self.replace_content(response)
+        if metrics is not None:
+            metrics.record(
+                "minify", time.perf_counter() - started,
+                bytes_in=size, bytes_out=len(response.content),
+            )
+
+    def compress_content(self, request, response, metrics):
+        if len(response.content) < self.compress_min_bytes:
+            return
+        accepted = accepted_encodings(request.headers.get("Accept-Encoding", ""))
+        for encoding, _, compressor in get_encoders():
+            if encoding in accepted:
+                break
+        else:
+            return
+
+        started = time.perf_counter()
+        size = len(response.content)
+        compressed = compressor(response.content, self.levels[encoding])
+        if len(compressed) >= size:
+            return
+        response.content = compressed
+        response.headers["Content-Encoding"] = encoding
+        self.replace_content(response)
+        if metrics is not None:
+            metrics.record(
+                "compress", time.perf_counter() - started,
+                encoding=encoding, bytes_in=size, bytes_out=len(compressed),
+            )
+
+    def replace_content(self, response):
+        response.headers["Content-Length"] = str(len(response.content))
+        # The body is no longer byte-for-byte what a strong ETag promised.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
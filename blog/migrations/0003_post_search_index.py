@@ -0,0 +1,56 @@
+from django.db import migrations
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE blog_post ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english'::regconfig, coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX blog_post_search_vector_idx ON blog_post USING GIN (search_vector)",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS blog_post_search_vector_idx",
+    "ALTER TABLE blog_post DROP COLUMN IF EXISTS search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE blog_post_fts USING fts5(
+        post_id UNINDEXED, title, content, tokenize = 'porter unicode61'
+    )
+    """,
+    "INSERT INTO blog_post_fts (post_id, title, content) SELECT id, title, content FROM blog_post",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {
+            "postgresql": postgres,
+            "sqlite": sqlite,
+        }.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_post_created_at_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD),
+            run_for_vendor(POSTGRES_BACKWARD, SQLITE_BACKWARD),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.14 on 2026-10-18 18:24
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+
+def make_excerpt(content):
+    # A frozen copy of blog.models.make_excerpt as of this migration, so
+    # later changes to the model code cannot change what it writes.
+    return Truncator(" ".join(content.split())).chars(280)
+
+
+def backfill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    batch = []
+    for post in Post.objects.only('id', 'content').iterator(chunk_size=500):
+        post.excerpt = make_excerpt(post.content)
+        batch.append(post)
+        if len(batch) >= 500:
+            Post.objects.bulk_update(batch, ['excerpt'])
+            batch = []
+    if batch:
+        Post.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(blank=True, editable=False, max_length=280),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.14 on 2026-10-18 18:54
+
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def backfill_counts(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    CategoryPostCount = apps.get_model('blog', 'CategoryPostCount')
+    counts = Category.objects.order_by().annotate(count=Count('post_category')).values_list('pk', 'count')
+    CategoryPostCount.objects.bulk_create(
+        (CategoryPostCount(category_id=pk, post_count=count) for pk, count in counts.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_comment_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryPostCount',
+            fields=[
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counts', serialize=False, to='blog.category')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:00
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+
+
+def backfill_stats(apps, schema_editor):
+    User = apps.get_model('blog', 'User')
+    AuthorStats = apps.get_model('blog', 'AuthorStats')
+    stats = User.objects.order_by().annotate(
+        count=Count('post_auther'), last=Max('post_auther__created_at')
+    ).values_list('pk', 'count', 'last')
+    AuthorStats.objects.bulk_create(
+        (AuthorStats(user_id=pk, post_count=count, last_post_at=last) for pk, count, last in stats.iterator()),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_category_post_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_post_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'author stats',
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
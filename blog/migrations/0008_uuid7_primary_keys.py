@@ -0,0 +1,34 @@
+# Generated by Django 4.2.14 on 2026-10-18 19:25
+
+import blog.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_author_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='category',
+            name='id',
+            field=models.UUIDField(default=blog.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='comment',
+            name='id',
+            field=models.UUIDField(default=blog.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='id',
+            field=models.UUIDField(default=blog.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='user',
+            name='id',
+            field=models.UUIDField(default=blog.ids.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
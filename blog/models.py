@@ -1,9 +1,25 @@
-import uuid
-
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.db import models, transaction
+from django.utils.text import Truncator
+
+from blog.ids import uuid7
+from blog.manager import (
+    AuthorStatsManager,
+    CategoryPostCountManager,
+    CommentManager,
+    PostManager,
+    UserManager,
+)
+
+EXCERPT_LENGTH = 280
 
-from blog.manager import UserManager
+
+def make_excerpt(content):
+    """
+    Collapse whitespace and cut the content down to a card-sized excerpt.
+    """
+
+    return Truncator(" ".join(content.split())).chars(EXCERPT_LENGTH)
 
 
 class TimestampedModel(models.Model):
@@ -24,7 +40,7 @@ class User(AbstractUser, TimestampedModel):
     Custom User model using email as the unique identifier instead of username.
     """
 
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     username = None
     email = models.EmailField(unique=True, db_index=True)
 
@@ -33,6 +49,10 @@ class User(AbstractUser, TimestampedModel):
 
     objects = UserManager()
 
+    # Set on the copies CachedModelBackend caches without their password
+    # hash: the session hash derived from it.
+    cached_session_auth_hash = None
+
     class Meta:
         indexes = [
             models.Index(fields=["email", "is_active"]),
@@ -41,13 +61,40 @@ class User(AbstractUser, TimestampedModel):
     def __str__(self):
         return self.email
 
+    def get_session_auth_hash(self):
+        # Loading or setting the password makes the cached hash moot.
+        if "password" not in self.__dict__ and self.cached_session_auth_hash:
+            return self.cached_session_auth_hash
+        return super().get_session_auth_hash()
+
+
+class AuthorStats(models.Model):
+    """
+    Denormalized summary of a user's posts, refreshed whenever one of
+    their posts is created, deleted or handed to another author.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    last_post_at = models.DateTimeField(null=True, blank=True)
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name_plural = "author stats"
+
+    def __str__(self):
+        return f"{self.user_id}: {self.post_count}"
+
 
 class Category(TimestampedModel):
     """
     Category model for blog post classification.
     """
 
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     name = models.CharField(max_length=100, db_index=True)
     description = models.TextField(blank=True, null=True)
 
@@ -61,14 +108,32 @@ class Category(TimestampedModel):
         return self.name
 
 
+class CategoryPostCount(models.Model):
+    """
+    Materialized number of posts per category, adjusted incrementally as
+    posts are created, deleted and recategorized.
+    """
+
+    category = models.OneToOneField(
+        Category, on_delete=models.CASCADE, primary_key=True, related_name="counts"
+    )
+    post_count = models.PositiveIntegerField(default=0)
+
+    objects = CategoryPostCountManager()
+
+    def __str__(self):
+        return f"{self.category_id}: {self.post_count}"
+
+
 class Post(TimestampedModel):
     """
     BlogPost model representing individual blog entries.
     """
 
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     title = models.CharField(max_length=200, db_index=True)
     content = models.TextField()
+    excerpt = models.CharField(max_length=EXCERPT_LENGTH, blank=True, editable=False)
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="post_auther"
     )
@@ -79,14 +144,63 @@ class Post(TimestampedModel):
         blank=True,
         related_name="post_category",
     )
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    last_comment_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         indexes = [
+            models.Index(fields=["created_at", "id"]),
             models.Index(fields=["title", "created_at"]),
             models.Index(fields=["author", "created_at"]),
             models.Index(fields=["category", "created_at"]),
         ]
 
+    objects = PostManager()
+
+    TRACKED_RELATIONS = ("author_id", "category_id")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the author and category the row was loaded with, so
+        # receivers can tell when a post moves between them.
+        instance._loaded_relations = {
+            name: value for name, value in zip(field_names, values)
+            if name in cls.TRACKED_RELATIONS
+        }
+        return instance
+
+    def loaded_relation(self, name):
+        return getattr(self, "_loaded_relations", {}).get(name, getattr(self, name))
+
+    def save(self, *args, **kwargs):
+        if "content" not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None and "content" in update_fields:
+                kwargs["update_fields"] = {*update_fields, "excerpt"}
+        super().save(*args, **kwargs)
+        self.reset_loaded_relations()
+
+    def relation_changes(self):
+        """
+        Return ``{name: (loaded_value, current_value)}`` for the tracked
+        relations that changed since the post was loaded.
+        """
+
+        deferred = self.get_deferred_fields()
+        return {
+            name: (self.loaded_relation(name), getattr(self, name))
+            for name in self.TRACKED_RELATIONS
+            if name not in deferred and self.loaded_relation(name) != getattr(self, name)
+        }
+
+    def reset_loaded_relations(self):
+        deferred = self.get_deferred_fields()
+        self._loaded_relations = {
+            name: getattr(self, name) for name in self.TRACKED_RELATIONS if name not in deferred
+        }
+
     def can_edit(self, user):
         return self.author == user or user.is_superuser
 
@@ -99,7 +213,7 @@ class Comment(TimestampedModel):
     Comment model representing comments made on blog posts.
     """
 
-    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    id = models.UUIDField(default=uuid7, editable=False, primary_key=True)
     post = models.ForeignKey(
         Post, on_delete=models.CASCADE, related_name="comments"
     )
@@ -112,5 +226,20 @@ class Comment(TimestampedModel):
             models.Index(fields=["name", "created_at"]),
         ]
 
+    objects = CommentManager()
+
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        with transaction.atomic(using=kwargs.get("using")):
+            super().save(*args, **kwargs)
+            if adding:
+                Post.objects.record_comments(self.post_id, 1, self.created_at)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get("using")):
+            result = super().delete(*args, **kwargs)
+            Post.objects.forget_comments(self.post_id, 1)
+        return result
+
     def __str__(self):
         return f"Comment by {self.name} on {self.post}"
@@ -0,0 +1,190 @@
+import base64
+import json
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.dateparse import parse_datetime
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    """
+    A single page of results produced by the CursorPaginator.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class CursorPaginator:
+    """
+    Keyset paginator over a queryset ordered by a fixed tuple of fields.
+
+    Pages are addressed by opaque cursor tokens that encode the ordering
+    values of the first/last row of the neighbouring page, so every page
+    is fetched with a bounded range scan on a matching index. The
+    paginator never issues an OFFSET or a COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, ordering=("-created_at", "-id")):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+
+    @property
+    def fields(self):
+        return [field.lstrip("-") for field in self.ordering]
+
+    def encode_cursor(self, obj):
+        values = []
+        for field in self.fields:
+            value = getattr(obj, field)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else str(value))
+        payload = json.dumps(values, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        except (ValueError, TypeError):
+            raise InvalidCursor(cursor)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise InvalidCursor(cursor)
+
+        decoded = []
+        model = self.queryset.model
+        for field_name, value in zip(self.fields, values):
+            field = model._meta.get_field(field_name)
+            if field.get_internal_type() == "DateTimeField":
+                try:
+                    value = parse_datetime(value) if isinstance(value, str) else None
+                except ValueError:
+                    # Well formed, but not a real date (February 30th).
+                    raise InvalidCursor(cursor)
+                if value is None:
+                    raise InvalidCursor(cursor)
+            else:
+                try:
+                    value = field.to_python(value)
+                except Exception:
+                    raise InvalidCursor(cursor)
+            decoded.append(value)
+        return decoded
+
+    def _keyset_filter(self, values, forward):
+        """
+        Build the row-value comparison ``(a, b) < (x, y)`` as the
+        equivalent ``a < x OR (a = x AND b < y)`` expansion.
+        """
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            lookup = "lt" if descending == forward else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def _reversed_ordering(self):
+        return [
+            field[1:] if field.startswith("-") else f"-{field}"
+            for field in self.ordering
+        ]
+
+    def page_queryset(self, after=None, before=None):
+        """
+        Return the sliced queryset for the page following the ``after``
+        cursor, preceding the ``before`` cursor, or the first page, along
+        with a flag telling whether it walks the ordering backwards.
+        """
+
+        queryset = self.queryset
+        backwards = bool(before) and not after
+        if after:
+            queryset = queryset.filter(self._keyset_filter(self.decode_cursor(after), True))
+        elif before:
+            queryset = queryset.filter(self._keyset_filter(self.decode_cursor(before), False))
+
+        ordering = self._reversed_ordering() if backwards else self.ordering
+        return queryset.order_by(*ordering)[: self.per_page + 1], backwards
+
+    def build_page(self, rows, after=None, backwards=False):
+        """
+        Turn the rows fetched from ``page_queryset`` into a CursorPage.
+        """
+
+        rows = list(rows)
+        has_more = len(rows) > self.per_page
+        rows = rows[: self.per_page]
+
+        if backwards:
+            rows.reverse()
+            has_next = True
+            has_previous = has_more
+        else:
+            has_next = has_more
+            has_previous = bool(after)
+
+        next_cursor = self.encode_cursor(rows[-1]) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0]) if rows and has_previous else None
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+    def get_page(self, after=None, before=None):
+        queryset, backwards = self.page_queryset(after, before)
+        return self.build_page(queryset, after, backwards)
+
+
+class CursorPaginationMixin:
+    """
+    Mixin for list views that pages a queryset with ``?after=``/``?before=``
+    cursor tokens.
+    """
+
+    paginate_by = 20
+    paginate_ordering = ("-created_at", "-id")
+
+    def get_paginator(self, queryset):
+        return CursorPaginator(queryset, self.paginate_by, ordering=self.paginate_ordering)
+
+    def paginate_queryset(self, request, queryset):
+        try:
+            return self.get_paginator(queryset).get_page(
+                after=request.GET.get("after"),
+                before=request.GET.get("before"),
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+
+    async def apaginate_queryset(self, request, queryset):
+        paginator = self.get_paginator(queryset)
+        after = request.GET.get("after")
+        try:
+            page_queryset, backwards = paginator.page_queryset(
+                after=after, before=request.GET.get("before")
+            )
+        except InvalidCursor:
+            raise Http404("Invalid page cursor.")
+        rows = [row async for row in page_queryset.aiterator()]
+        return paginator.build_page(rows, after, backwards)
@@ -0,0 +1,52 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set for the duration of a request that may read from a replica. Reads
+# made anywhere else (management commands, shell, background jobs, writes'
+# own reads) stay on the primary.
+_replica_reads = ContextVar("blog_replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads(enabled=True):
+    token = _replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_sticky_seconds():
+    return getattr(settings, "BLOG_REPLICA_STICKY_SECONDS", 5)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send writes to the primary ("default") database and, inside requests
+    marked by ReplicaPinningMiddleware, spread reads over the aliases
+    listed in the DATABASE_REPLICAS setting.
+    """
+
+    def replicas(self):
+        return getattr(settings, "DATABASE_REPLICAS", [])
+
+    def db_for_read(self, model, **hints):
+        replicas = self.replicas()
+        if not replicas or not _replica_reads.get():
+            return "default"
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {"default", *self.replicas()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
@@ -0,0 +1,165 @@
+import re
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from blog.models import Post
+
+POST_TABLE = Post._meta.db_table
+SQLITE_FTS_TABLE = "blog_post_fts"
+
+
+class BaseSearchBackend:
+    """
+    Base class for post search backends.
+
+    ``search`` narrows a Post queryset down to the posts matching ``query``,
+    annotates each row with a ``rank`` (higher is better) and orders the
+    results by it.
+    """
+
+    def search(self, queryset, query):
+        raise NotImplementedError
+
+    def index_post(self, post, using="default"):
+        """
+        Called after a post has been saved to the database ``using``.
+        """
+
+    def remove_post(self, post, using="default"):
+        """
+        Called after a post has been deleted from the database ``using``.
+        """
+
+    def rebuild(self, using="default"):
+        """
+        Rebuild the whole index of the database ``using`` from its post
+        table.
+        """
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+    Unranked substring search, used for databases without a full-text
+    engine of their own.
+    """
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(title__icontains=query) | Q(content__icontains=query)
+        ).annotate(rank=Value(0.0, output_field=FloatField())).order_by("-created_at", "-id")
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    Ranked search over the stored, weighted ``search_vector`` column that is
+    generated by PostgreSQL from the title (weight A) and content (weight B)
+    and backed by a GIN index. Being a generated column it is kept in sync
+    by the database itself on every insert and update.
+    """
+
+    config = "english"
+
+    def search(self, queryset, query):
+        tsquery = "websearch_to_tsquery(%s::regconfig, %s)"
+        params = [self.config, query]
+        return queryset.filter(
+            RawSQL(
+                f'"{POST_TABLE}"."search_vector" @@ {tsquery}',
+                params,
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            rank=RawSQL(
+                f'ts_rank_cd("{POST_TABLE}"."search_vector", {tsquery})',
+                params,
+                output_field=FloatField(),
+            )
+        ).order_by("-rank", "-created_at")
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    """
+    Ranked search over an FTS5 virtual table for local development and
+    tests. The table holds its own copy of each post's title and content,
+    maintained from the Post save/delete signals.
+    """
+
+    title_weight = 10.0
+    content_weight = 1.0
+
+    def match_expression(self, query):
+        tokens = re.findall(r"\w+", query)
+        return " ".join('"%s"' % token for token in tokens)
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return queryset.none()
+
+        return queryset.filter(
+            RawSQL(
+                f'"{POST_TABLE}"."id" IN (SELECT post_id FROM {SQLITE_FTS_TABLE} '
+                f"WHERE {SQLITE_FTS_TABLE} MATCH %s)",
+                [match],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            rank=RawSQL(
+                f"(SELECT -bm25({SQLITE_FTS_TABLE}, 0.0, %s, %s) FROM {SQLITE_FTS_TABLE} "
+                f'WHERE {SQLITE_FTS_TABLE} MATCH %s AND post_id = "{POST_TABLE}"."id")',
+                [self.title_weight, self.content_weight, match],
+                output_field=FloatField(),
+            )
+        ).order_by("-rank", "-created_at")
+
+    def _post_key(self, post, connection):
+        return Post._meta.pk.get_db_prep_value(post.pk, connection)
+
+    def index_post(self, post, using="default"):
+        connection = connections[using]
+        key = self._post_key(post, connection)
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE} WHERE post_id = %s", [key])
+            cursor.execute(
+                f"INSERT INTO {SQLITE_FTS_TABLE} (post_id, title, content) VALUES (%s, %s, %s)",
+                [key, post.title, post.content],
+            )
+
+    def remove_post(self, post, using="default"):
+        connection = connections[using]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {SQLITE_FTS_TABLE} WHERE post_id = %s",
+                [self._post_key(post, connection)],
+            )
+
+    def rebuild(self, using="default"):
+        with connections[using].cursor() as cursor:
+            cursor.execute(f"DELETE FROM {SQLITE_FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SQLITE_FTS_TABLE} (post_id, title, content) "
+                f'SELECT id, title, content FROM "{POST_TABLE}"'
+            )
+
+
+VENDOR_BACKENDS = {
+    "postgresql": PostgresSearchBackend,
+    "sqlite": SQLiteSearchBackend,
+}
+
+
+def get_search_backend(using="default"):
+    """
+    Return the backend named by the ``BLOG_SEARCH_BACKEND`` setting, or the
+    one matching the vendor of the database ``using`` when the setting is
+    not given.
+    """
+
+    backend_path = getattr(settings, "BLOG_SEARCH_BACKEND", None)
+    if backend_path:
+        return import_string(backend_path)()
+    return VENDOR_BACKENDS.get(connections[using].vendor, SimpleSearchBackend)()
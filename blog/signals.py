@@ -0,0 +1,245 @@
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from blog.auth_backends import invalidate_cached_user
+from blog.cache import bump_content_version, bump_content_version_on_commit, invalidate_post_cards
+from blog.instrumentation import install_query_recorder
+from blog.manager import post_comments_changed
+from blog.models import AuthorStats, Category, CategoryPostCount, Post, User
+from blog.search import get_search_backend
+from blog.suggest import get_suggestion_index, record_suggestion_change
+from blog.windows import day_scope
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, update_fields=None, using="default", **kwargs):
+    if raw:
+        return
+    if update_fields is not None and not {"title", "content"} & set(update_fields):
+        return
+    get_search_backend(using).index_post(instance, using=using)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_deleted_post(sender, instance, using="default", **kwargs):
+    get_search_backend(using).remove_post(instance, using=using)
+
+
+def suggest_on_commit(apply, using):
+    # An index not built yet will load the post when it is.
+    def committed():
+        index = get_suggestion_index(build=False)
+        if index is not None:
+            apply(index)
+        record_suggestion_change(applied=index is not None)
+
+    transaction.on_commit(committed, using=using)
+
+
+@receiver(post_save, sender=Post)
+def suggest_saved_post(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    if raw:
+        return
+    if update_fields is not None and "title" not in update_fields:
+        return
+    # The values are taken now; the instance may change before the commit.
+    post = (instance.pk, instance.title, instance.comment_count, instance.created_at)
+    suggest_on_commit(lambda index: index.add(*post), using)
+
+
+@receiver(post_delete, sender=Post)
+def unsuggest_deleted_post(sender, instance, using=None, **kwargs):
+    # Deleting clears the instance's pk once the signals have been sent.
+    post_id = instance.pk
+    suggest_on_commit(lambda index: index.remove(post_id), using)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    invalidate_post_cards([instance.pk])
+
+
+def invalidate_post_cards_on_commit(post_ids, using):
+    # A rename leaves the card version alone, so a card re-rendered before
+    # the commit would keep the old name cached under it.
+    post_ids = list(post_ids)
+    transaction.on_commit(lambda: invalidate_post_cards(post_ids), using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def invalidate_category_post_cards(sender, instance, raw=False, using=None, **kwargs):
+    # Deleting a category nulls out its posts with a bulk UPDATE that sends
+    # no Post signals, so the affected cards are collected before delete.
+    if raw:
+        return
+    invalidate_post_cards_on_commit(
+        Post.objects.filter(category=instance).values_list("pk", flat=True), using
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_post_cards(sender, instance, raw=False, update_fields=None, using=None,
+                                 **kwargs):
+    # Logging in only touches last_login, which no card displays.
+    if raw or kwargs.get("created"):
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_post_cards_on_commit(
+        Post.objects.filter(author=instance).values_list("pk", flat=True), using
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_version_for_content(sender, raw=False, using=None, **kwargs):
+    if not raw:
+        bump_content_version_on_commit("content", using=using)
+
+
+@receiver(post_save, sender=User)
+def bump_version_for_author(sender, instance, raw=False, update_fields=None, using=None, **kwargs):
+    if raw or kwargs.get("created"):
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    bump_content_version_on_commit("content", using=using)
+
+
+@receiver(post_comments_changed)
+def bump_version_for_comments(sender, post_id, **kwargs):
+    author_id = Post.objects.filter(pk=post_id).values_list("author_id", flat=True).first()
+    scopes = ["content"]
+    if author_id is not None:
+        scopes.append(f"author:{author_id}")
+    bump_content_version(*scopes)
+
+
+def post_feed_scopes(post):
+    """
+    Return the feed version scopes a post appears in, including the
+    author/category it was loaded with when it has since moved, and the
+    day it was created on.
+    """
+
+    scopes = {"posts"}
+    if post.created_at is not None:
+        scopes.add(day_scope(post.created_at))
+    for name, prefix in (("author_id", "author"), ("category_id", "category")):
+        for value in {post.loaded_relation(name), getattr(post, name)}:
+            if value is not None:
+                scopes.add(f"{prefix}:{value}")
+    return scopes
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def bump_feed_versions_for_post(sender, instance, raw=False, using=None, **kwargs):
+    # The scopes are collected now, while the relations the post was
+    # loaded with are still known.
+    if not raw:
+        bump_content_version_on_commit(*post_feed_scopes(instance), using=using)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_feed_versions_for_category(sender, instance, raw=False, using=None, **kwargs):
+    if not raw:
+        bump_content_version_on_commit(
+            "posts", "categories", f"category:{instance.pk}", using=using
+        )
+
+
+@receiver(post_save, sender=User)
+def bump_feed_versions_for_author(sender, instance, raw=False, update_fields=None, using=None,
+                                  **kwargs):
+    if raw or kwargs.get("created"):
+        return
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    category_ids = (
+        Post.objects.filter(author=instance, category__isnull=False)
+        .order_by()
+        .values_list("category_id", flat=True)
+        .distinct()
+    )
+    bump_content_version_on_commit(
+        "posts",
+        f"author:{instance.pk}",
+        *(f"category:{category_id}" for category_id in category_ids),
+        using=using,
+    )
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    install_query_recorder(connection)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, raw=False, **kwargs):
+    if not raw:
+        invalidate_cached_user(instance.pk)
+
+
+@receiver(user_logged_out)
+def invalidate_user_cache_on_logout(sender, request, user, **kwargs):
+    if user is not None:
+        invalidate_cached_user(user.pk)
+
+
+@receiver(post_save, sender=Category)
+def create_category_post_count(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        CategoryPostCount.objects.get_or_create(category=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if created:
+        CategoryPostCount.objects.adjust({instance.category_id: 1})
+        return
+    if update_fields is not None and not {"category", "category_id"} & set(update_fields):
+        return
+    changes = instance.relation_changes()
+    if "category_id" in changes:
+        old, new = changes["category_id"]
+        CategoryPostCount.objects.adjust({old: -1, new: 1})
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    CategoryPostCount.objects.adjust({instance.loaded_relation("category_id"): -1})
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Post)
+def refresh_author_stats_for_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        AuthorStats.objects.refresh([instance.author_id])
+    elif "author_id" in instance.relation_changes():
+        AuthorStats.objects.refresh(instance.relation_changes()["author_id"])
+
+
+@receiver(post_delete, sender=Post)
+def refresh_author_stats_for_deleted_post(sender, instance, **kwargs):
+    # The author may be being deleted along with their posts, so no stats
+    # row is (re)created here.
+    AuthorStats.objects.refresh([instance.loaded_relation("author_id")], create=False)
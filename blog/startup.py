@@ -0,0 +1,108 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.urls import get_resolver
+
+
+def load_urls():
+    """
+    Import the URLconf and, through it, every view module.
+    """
+
+    get_resolver().url_patterns
+
+
+def project_template_names():
+    """
+    Yield ``(engine, template name)`` for every template that lives inside
+    the project, skipping the ones shipped with installed packages such
+    as the admin.
+    """
+
+    base_dir = str(settings.BASE_DIR)
+    for engine in engines.all():
+        seen = set()
+        for directory in engine.template_dirs:
+            directory = str(directory)
+            if not directory.startswith(base_dir):
+                continue
+            for root, _, filenames in os.walk(directory):
+                for filename in filenames:
+                    if not filename.endswith((".html", ".txt", ".xml")):
+                        continue
+                    name = os.path.relpath(os.path.join(root, filename), directory)
+                    if name not in seen:
+                        seen.add(name)
+                        yield engine, name.replace(os.sep, "/")
+
+
+def compile_templates():
+    """
+    Compile the project's templates. With the cached template loader (the
+    default when DEBUG is off) they stay compiled for the process's
+    lifetime; Jinja2 also writes them to its bytecode cache.
+    """
+
+    count = 0
+    for engine, name in project_template_names():
+        engine.get_template(name)
+        count += 1
+    return count
+
+
+def build_suggestion_index():
+    """
+    Load the post titles into this process's suggestion index.
+    """
+
+    from blog.suggest import get_suggestion_index
+
+    return len(get_suggestion_index())
+
+
+def warm_up():
+    """
+    Do the work every worker would otherwise repeat on its first requests.
+    Run in the server's master process before forking, the result is
+    shared by all workers.
+    """
+
+    load_urls()
+    compile_templates()
+    build_suggestion_index()
+
+
+def measure():
+    """
+    Time the startup phases of a fresh process, in milliseconds. Meant to
+    be run as ``python -m blog.startup`` by ``manage.py benchmark_startup``.
+    """
+
+    import django
+    from django.core.wsgi import get_wsgi_application
+
+    timings = {}
+    started = time.perf_counter()
+    django.setup(set_prefix=False)
+    timings["setup_ms"] = time.perf_counter() - started
+
+    phase = time.perf_counter()
+    get_wsgi_application()
+    timings["wsgi_ms"] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    load_urls()
+    timings["urls_ms"] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    compile_templates()
+    timings["templates_ms"] = time.perf_counter() - phase
+
+    return {name: round(seconds * 1000, 2) for name, seconds in timings.items()}
+
+
+if __name__ == "__main__":
+    print(json.dumps(measure()))
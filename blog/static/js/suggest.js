@@ -0,0 +1,40 @@
+// Search-as-you-type: fill the search box's datalist with post titles from
+// the suggestion endpoint, and open a post when its title is picked.
+(function () {
+    var input = document.querySelector('input[data-suggest-url]');
+    if (!input) {
+        return;
+    }
+    var list = document.getElementById(input.getAttribute('list'));
+    var urls = {};
+    var pending = null;
+
+    input.addEventListener('input', function () {
+        if (urls[input.value]) {
+            window.location = urls[input.value];
+            return;
+        }
+        clearTimeout(pending);
+        pending = setTimeout(function () {
+            var query = input.value.trim();
+            if (!query) {
+                return;
+            }
+            fetch(input.dataset.suggestUrl + '?q=' + encodeURIComponent(query))
+                .then(function (response) { return response.json(); })
+                .then(function (data) {
+                    if (data.query !== input.value.trim().slice(0, 100)) {
+                        return;
+                    }
+                    list.replaceChildren();
+                    urls = {};
+                    data.results.forEach(function (result) {
+                        var option = document.createElement('option');
+                        option.value = result.title;
+                        list.appendChild(option);
+                        urls[result.title] = result.url;
+                    });
+                });
+        }, 100);
+    });
+})();
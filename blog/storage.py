@@ -0,0 +1,64 @@
+import os
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+from blog.compression import get_encoders
+
+# Formats that are compressed already and do not shrink any further.
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".gz", ".br", ".zip", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif",
+    ".ico", ".woff", ".woff2", ".mp3", ".mp4", ".webm", ".pdf",
+}
+
+# A variant is only kept if it saves at least this share of the original.
+MIN_SAVING = 0.05
+
+# Files are compressed once, so they get the slowest, smallest settings.
+LEVELS = {"br": 11, "gzip": 9}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """
+    Manifest storage that additionally writes a ``.br`` (when the brotli
+    package is installed) and a ``.gz`` variant next to every compressible
+    file at collectstatic time, so they never have to be compressed while
+    serving a request.
+    """
+
+    # Files missing from the manifest, such as a Tailwind build that has
+    # not been run, keep their plain URL instead of failing every page.
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+        if dry_run:
+            return
+
+        names = set(self.hashed_files) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() in INCOMPRESSIBLE_EXTENSIONS:
+                continue
+            if not self.exists(name):
+                continue
+            for variant in self.compress(name):
+                yield name, variant, True
+
+    def compress(self, name):
+        """
+        Write the compressed variants of ``name`` and return their names.
+        Stale variants of a file that no longer compresses well are removed.
+        """
+
+        with self.open(name) as file:
+            data = file.read()
+        written = []
+        for encoding, suffix, compressor in get_encoders():
+            variant = name + suffix
+            compressed = compressor(data, LEVELS[encoding])
+            if self.exists(variant):
+                self.delete(variant)
+            if len(compressed) <= len(data) * (1 - MIN_SAVING):
+                with open(self.path(variant), "wb") as file:
+                    file.write(compressed)
+                written.append(variant)
+        return written
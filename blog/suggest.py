@@ -0,0 +1,361 @@
+import base64
+import heapq
+import re
+import sys
+import threading
+import time
+import unicodedata
+import uuid
+from bisect import bisect_left, insort
+from collections import OrderedDict, defaultdict
+from operator import itemgetter, methodcaller
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blog.models import Post
+
+# A key is a normalized title from one of its word starts on, a separator
+# telling whether that is the start of the title, and the post's key. Both
+# separators sort before every character a normalized title can contain.
+TITLE_START = "\x00"
+WORD_START = "\x01"
+KEY_END = "\U0010ffff"
+POST_KEY_LENGTH = 22
+
+NON_WORD_RE = re.compile(r"[\W_]+")
+
+# Counts committed title changes, so each process can tell whether its
+# index has missed any.
+SUGGEST_CHANGES_KEY = "blog:suggest:changes"
+
+# Rough per-key and per-post bookkeeping overhead on top of the strings
+# themselves: list slots, dict entries, tuples and the eviction heap.
+KEY_OVERHEAD = 8
+POST_OVERHEAD = 240
+
+
+def normalize_title(title):
+    """
+    Fold a title to the form it is indexed and queried in: accents
+    stripped, case folded and runs of anything but letters and digits
+    collapsed to single spaces.
+    """
+
+    folded = unicodedata.normalize("NFKD", title)
+    if not folded.isascii():
+        folded = "".join(char for char in folded if not unicodedata.combining(char))
+    return NON_WORD_RE.sub(" ", folded.casefold()).strip()
+
+
+def read_suggestion_changes():
+    changes = cache.get(SUGGEST_CHANGES_KEY)
+    if changes is None:
+        cache.add(SUGGEST_CHANGES_KEY, 0, None)
+        changes = cache.get(SUGGEST_CHANGES_KEY, 0)
+    return changes
+
+
+def record_suggestion_change(applied=False):
+    """
+    Count a committed change to the post titles, so the other processes
+    rebuild their index. With ``applied``, this process's index already
+    has the change and stays current, unless another change was counted
+    since it was last current.
+    """
+
+    try:
+        changes = cache.incr(SUGGEST_CHANGES_KEY)
+    except ValueError:
+        cache.add(SUGGEST_CHANGES_KEY, 0, None)
+        changes = cache.incr(SUGGEST_CHANGES_KEY)
+    if applied and _index is not None:
+        _index.changes_applied(changes)
+
+
+def post_key(post_id):
+    # The id as a 22 character ASCII string; the index keeps several.
+    return base64.b64encode(post_id.bytes)[:POST_KEY_LENGTH].decode()
+
+
+def key_post_id(key_id):
+    return uuid.UUID(bytes=base64.b64decode(key_id + "=="))
+
+
+class SuggestionIndex:
+    """
+    In-process prefix index of post titles for search-as-you-type.
+
+    Every post contributes one key per word start of its normalized title
+    (up to ``max_words``), so "dja" finds both "Django tips" and "Tuning
+    django". Keys live in one sorted list searched with ``bisect``, which
+    stays far smaller than a trie of Python objects.
+
+    Posts are ranked by comment count, then recency, with titles starting
+    with the prefix first. The best ``limit`` posts of each prefix looked
+    up (and of every prefix up to ``precompute_length`` characters, whose
+    key ranges are the longest) are kept in a memo that is updated in
+    place as posts are added, so most lookups never walk the keys. Once
+    the estimated size passes ``max_bytes`` the lowest-ranked posts are
+    dropped.
+    """
+
+    def __init__(self, max_bytes=32 * 2 ** 20, max_words=8, limit=10, max_key_length=32,
+                 precompute_length=2, cache_size=2048):
+        self.max_bytes = max_bytes
+        self.max_words = max_words
+        self.limit = limit
+        self.max_key_length = max_key_length
+        self.precompute_length = precompute_length
+        self.cache_size = cache_size
+        self.lock = threading.Lock()
+        self.keys = []
+        # post key -> (comment count, created timestamp, title, size)
+        self.posts = {}
+        self.eviction_heap = []
+        self.bytes = 0
+        # prefix -> best (score, post key) pairs, at most ``limit`` long
+        self.top = OrderedDict()
+        # The change count (see record_suggestion_change) the index reflects.
+        self.changes = None
+        self.checked_at = 0.0
+        self.refreshing = False
+
+    def __len__(self):
+        return len(self.posts)
+
+    def post_keys(self, key_id, title):
+        words = normalize_title(title).split(" ")
+        keys = {}
+        for start in range(min(len(words), self.max_words)):
+            term = " ".join(words[start:])[:self.max_key_length]
+            if term and term not in keys:
+                keys[term] = f"{term}{WORD_START if start else TITLE_START}{key_id}"
+        return list(keys.values())
+
+    def prefixes(self, keys, max_length=None):
+        """
+        Return each prefix of the given keys' terms, mapped to whether it
+        is a prefix of the title start.
+        """
+
+        prefixes = {}
+        for key in keys:
+            term = key[:-POST_KEY_LENGTH - 1]
+            title_start = key[-POST_KEY_LENGTH - 1] == TITLE_START
+            for length in range(1, len(term[:max_length]) + 1):
+                prefix = term[:length]
+                prefixes[prefix] = title_start or prefixes.get(prefix, False)
+        return prefixes
+
+    def entry(self, post_id, title, comment_count, created_at):
+        key_id = post_key(post_id)
+        keys = self.post_keys(key_id, title)
+        size = POST_OVERHEAD + sys.getsizeof(title) + sum(
+            sys.getsizeof(key) + KEY_OVERHEAD for key in keys
+        )
+        timestamp = created_at.timestamp() if created_at else 0.0
+        return key_id, keys, (comment_count or 0, timestamp, title, size)
+
+    def build(self, rows):
+        """
+        Replace the contents of the index with ``rows`` of (id, title,
+        comment count, created at), keeping the highest-ranked posts that
+        fit in ``max_bytes``.
+        """
+
+        entries = sorted(
+            (self.entry(*row) for row in rows), key=lambda item: item[2][:2], reverse=True
+        )
+        posts, keys, used = {}, [], 0
+        # Posts are visited best first, so the first ``limit`` posts seen
+        # for a prefix, title starts before other word starts, are its top.
+        title_starts, word_starts = defaultdict(list), defaultdict(list)
+        for key_id, post_keys, post in entries:
+            used += post[3]
+            if used > self.max_bytes:
+                used -= post[3]
+                break
+            posts[key_id] = post
+            keys.extend(post_keys)
+            for prefix, title_start in self.prefixes(post_keys, self.precompute_length).items():
+                found = title_starts if title_start else word_starts
+                if len(found[prefix]) < self.limit:
+                    found[prefix].append(((title_start, post[0], post[1]), key_id))
+        keys.sort()
+        heap = [(post[0], post[1], key_id) for key_id, post in posts.items()]
+        heapq.heapify(heap)
+        top = OrderedDict(
+            (prefix, (title_starts[prefix] + word_starts[prefix])[:self.limit])
+            for prefix in title_starts.keys() | word_starts.keys()
+        )
+
+        with self.lock:
+            self.keys = keys
+            self.posts = posts
+            self.eviction_heap = heap
+            self.bytes = used
+            self.top = top
+
+    def rebuild(self):
+        """
+        Rebuild the index from the post table.
+        """
+
+        changes = read_suggestion_changes()
+        rows = Post.objects.order_by().values_list("id", "title", "comment_count", "created_at")
+        self.build(rows.iterator(chunk_size=2000))
+        self.changes, self.checked_at = changes, time.monotonic()
+
+    def changes_applied(self, changes):
+        with self.lock:
+            if self.changes is not None and changes == self.changes + 1:
+                self.changes = changes
+
+    def add(self, post_id, title, comment_count=0, created_at=None):
+        key_id, keys, post = self.entry(post_id, title, comment_count, created_at)
+        with self.lock:
+            self._discard(key_id)
+            self.posts[key_id] = post
+            for key in keys:
+                insort(self.keys, key)
+            heapq.heappush(self.eviction_heap, (post[0], post[1], key_id))
+            self.bytes += post[3]
+            for prefix, title_start in self.prefixes(keys).items():
+                top = self.top.get(prefix)
+                if top is None:
+                    continue
+                item = ((title_start, post[0], post[1]), key_id)
+                if len(top) < self.limit or item > top[-1]:
+                    top.append(item)
+                    top.sort(reverse=True)
+                    del top[self.limit:]
+            while self.bytes > self.max_bytes and self.eviction_heap:
+                comment_count, timestamp, victim = heapq.heappop(self.eviction_heap)
+                current = self.posts.get(victim)
+                # Entries of removed or re-ranked posts are skipped lazily.
+                if current is not None and current[:2] == (comment_count, timestamp):
+                    self._discard(victim)
+
+    def remove(self, post_id):
+        with self.lock:
+            self._discard(post_key(post_id))
+
+    def remove_post(self, post):
+        self.remove(post.pk)
+
+    def _discard(self, key_id):
+        post = self.posts.pop(key_id, None)
+        if post is None:
+            return
+        keys = self.post_keys(key_id, post[2])
+        for key in keys:
+            index = bisect_left(self.keys, key)
+            if index < len(self.keys) and self.keys[index] == key:
+                del self.keys[index]
+        self.bytes -= post[3]
+        for prefix in self.prefixes(keys):
+            top = self.top.get(prefix)
+            if top is None:
+                continue
+            for position, (_, member) in enumerate(top):
+                if member == key_id:
+                    if len(top) == self.limit:
+                        # The next best post is unknown; walk the keys again
+                        # on the next lookup.
+                        del self.top[prefix]
+                    else:
+                        del top[position]
+                    break
+
+    def _scan(self, prefix):
+        start = bisect_left(self.keys, prefix)
+        stop = bisect_left(self.keys, prefix + KEY_END, start)
+        # Ranges run to many thousands of keys for short or common prefixes,
+        # so they are split up with builtins rather than a Python loop.
+        keys = self.keys[start:stop]
+        post_keys = set(map(itemgetter(slice(-POST_KEY_LENGTH, None)), keys))
+        title_keys = set(map(
+            itemgetter(slice(-POST_KEY_LENGTH, None)),
+            filter(methodcaller("__contains__", TITLE_START), keys),
+        ))
+        rank = self.posts.__getitem__
+        best = heapq.nlargest(self.limit, title_keys, key=rank)
+        if len(best) < self.limit:
+            best += heapq.nlargest(self.limit - len(best), post_keys - title_keys, key=rank)
+        return [((key_id in title_keys, *self.posts[key_id][:2]), key_id) for key_id in best]
+
+    def suggest(self, query, limit=10):
+        """
+        Return up to ``limit`` (post id, title) pairs whose title has a
+        word starting with ``query``, best first.
+        """
+
+        prefix = normalize_title(query)[:self.max_key_length]
+        limit = min(limit, self.limit)
+        if not prefix or limit < 1:
+            return []
+        with self.lock:
+            top = self.top.get(prefix)
+            if top is None:
+                top = self.top[prefix] = self._scan(prefix)
+                if len(self.top) > self.cache_size:
+                    self.top.popitem(last=False)
+            else:
+                self.top.move_to_end(prefix)
+            return [(key_post_id(key_id), self.posts[key_id][2]) for _, key_id in top[:limit]]
+
+    def refresh_if_stale(self, interval):
+        """
+        Rebuild the index in a background thread when post titles have
+        changed in another process, checking at most once every
+        ``interval`` seconds. Changes made in this process are applied from
+        the Post signals and do not count.
+        """
+
+        now = time.monotonic()
+        if self.refreshing or now - self.checked_at < interval:
+            return
+        self.checked_at = now
+        if read_suggestion_changes() == self.changes:
+            return
+        self.refreshing = True
+        threading.Thread(target=self._refresh, daemon=True).start()
+
+    def _refresh(self):
+        from django.db import connections
+
+        try:
+            self.rebuild()
+        finally:
+            self.refreshing = False
+            connections.close_all()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_suggestion_index(build=True):
+    """
+    Return this process's suggestion index, building it from the database
+    on first use. With ``build`` false, return ``None`` rather than build.
+    """
+
+    global _index
+    if _index is None and build:
+        with _index_lock:
+            if _index is None:
+                index = SuggestionIndex(
+                    max_bytes=getattr(settings, "BLOG_SUGGEST_MAX_BYTES", 32 * 2 ** 20),
+                    max_words=getattr(settings, "BLOG_SUGGEST_MAX_WORDS", 8),
+                    limit=getattr(settings, "BLOG_SUGGEST_LIMIT", 10),
+                )
+                index.rebuild()
+                _index = index
+    return _index
+
+
+def reset_suggestion_index():
+    global _index
+    _index = None
@@ -0,0 +1,32 @@
+from django import template
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def page_url(context, direction, cursor):
+    """
+    Return the current query string with the pagination cursor replaced,
+    so filters such as ``q`` survive moving between pages.
+    """
+
+    params = context["request"].GET.copy()
+    params.pop("after", None)
+    params.pop("before", None)
+    params[direction] = cursor
+    return "?" + params.urlencode()
+
+
+@register.simple_tag(takes_context=True)
+def window_url(context, window=None):
+    """
+    Return the current query string limited to the named time window, or
+    to none, dropping the pagination cursor and any custom dates.
+    """
+
+    params = context["request"].GET.copy()
+    for name in ("after", "before", "window", "from", "to"):
+        params.pop(name, None)
+    if window:
+        params["window"] = window
+    return "?" + params.urlencode()
@@ -0,0 +1,18 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+register = template.Library()
+
+
+@register.simple_tag
+def tailwind_css():
+    """
+    Stand-in for django-tailwind's tag of the same name, for settings that
+    do not install the tailwind app: link the built stylesheet through the
+    static files storage, so it gets its hashed name.
+    """
+
+    path = getattr(settings, "TAILWIND_CSS_PATH", "css/dist/styles.css")
+    return format_html('<link rel="stylesheet" href="{}">', static(path))
@@ -0,0 +1,158 @@
+import logging
+import shutil
+import tempfile
+import unittest
+import uuid
+
+from asgiref.sync import sync_to_async
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.http import Http404
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import include, path, reverse
+from django.utils import timezone
+
+from blog.cache import bump_content_version
+from blog.comment_buffer import PENDING_SESSION_KEY
+from blog.models import Comment, Post
+from blog.views import AsyncHomePageView, AsyncPostDetailView
+
+# The project's URLs with the async read views, for the tests that request
+# them through the full middleware stack.
+urlpatterns = [
+    path('', AsyncHomePageView.as_view(), name='home'),
+    path('post/<uuid:pk>/', AsyncPostDetailView.as_view(), name='post_detail'),
+    path('', include('core.urls')),
+]
+
+
+class AsyncReadViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.factory = AsyncRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(
+            title='Async Post', content='Served without threads', author=self.user
+        )
+        Post.objects.create(title='Another Post', content='Gardening', author=self.user)
+        Comment.objects.create(post=self.post, name='Commenter', body='Async comment')
+
+    def test_views_are_async(self):
+        self.assertTrue(AsyncHomePageView.view_is_async)
+        self.assertTrue(AsyncPostDetailView.view_is_async)
+
+    async def test_feed(self):
+        response = await AsyncHomePageView.as_view()(self.factory.get(reverse('home')))
+        self.assertContains(response, 'Async Post')
+        self.assertContains(response, 'Another Post')
+
+    async def test_search(self):
+        request = self.factory.get(reverse('home'), {'q': 'threads'})
+        response = await AsyncHomePageView.as_view()(request)
+        self.assertContains(response, 'Async Post')
+        self.assertNotContains(response, 'Another Post')
+
+    async def test_windowed_search(self):
+        for _ in range(2):
+            # The second request is served from the cached window page.
+            request = self.factory.get(reverse('home'), {'q': 'threads', 'window': 'week'})
+            response = await AsyncHomePageView.as_view()(request)
+            self.assertContains(response, 'Async Post')
+            self.assertNotContains(response, 'Another Post')
+
+    async def test_post_detail(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        response = await AsyncPostDetailView.as_view()(self.factory.get(url), pk=self.post.pk)
+        self.assertContains(response, 'Async comment')
+
+        request = self.factory.get(url, headers={'If-None-Match': response['ETag']})
+        response = await AsyncPostDetailView.as_view()(request, pk=self.post.pk)
+        self.assertEqual(response.status_code, 304)
+
+    async def test_missing_post(self):
+        with self.assertRaises(Http404):
+            await AsyncPostDetailView.as_view()(self.factory.get('/'), pk=uuid.uuid4())
+
+    @override_settings(BLOG_SERVER_TIMING=True)
+    async def test_async_middleware_chain_reports_timings(self):
+        response = await self.async_client.get(reverse('home'))
+        self.assertContains(response, 'Async Post')
+        self.assertIn('view;dur=', response['Server-Timing'])
+
+
+@override_settings(ROOT_URLCONF='blog.tests.test_async_views')
+class AsyncLoggedInViewsTest(TestCase):
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(title='Async Post', content='Body', author=self.user)
+        # Logging in saves the user, which drops it from the user cache, so
+        # the templates' request.user has to be loaded from the database.
+        self.async_client.force_login(self.user)
+
+    def remember_pending_comment(self):
+        session = self.async_client.session
+        session[PENDING_SESSION_KEY] = [{
+            'id': str(uuid.uuid4()),
+            'post_id': str(self.post.pk),
+            'name': 'Reader',
+            'body': 'Still buffered',
+            'created_at': timezone.now().isoformat(),
+        }]
+        session.save()
+
+    async def test_post_detail_with_a_pending_comment(self):
+        # Pending comments skip the ETag, and with it the user lookup that
+        # get_validators would have done in a worker thread.
+        await sync_to_async(self.remember_pending_comment)()
+        response = await self.async_client.get(reverse('post_detail', kwargs={'pk': self.post.pk}))
+        self.assertContains(response, 'Still buffered')
+        self.assertTrue(response.context['user'].is_authenticated)
+
+    @unittest.skipUnless('replica' in settings.DATABASES, 'needs a "replica" database, see core.settings_test')
+    @override_settings(DATABASE_REPLICAS=['replica'])
+    async def test_feed_while_a_version_is_settling(self):
+        # The replica is not a mirror of the primary; the user has to be on it.
+        await get_user_model().objects.using('replica').abulk_create([self.user])
+        await sync_to_async(bump_content_version)('content')
+        response = await self.async_client.get(reverse('home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertTrue(response.context['user'].is_authenticated)
+
+
+class AsyncMiddlewareChainTest(SimpleTestCase):
+    def setUp(self):
+        static_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, static_root)
+        # Enables every blog middleware, so none of them is left out of
+        # the chain as MiddlewareNotUsed.
+        settings_override = override_settings(
+            DEBUG=True,
+            BLOG_SERVE_STATIC=True,
+            STATIC_ROOT=static_root,
+            BLOG_COMPRESSION=True,
+            BLOG_COLLAPSE_WHITESPACE=True,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_blog_middleware_is_not_adapted_under_asgi(self):
+        logger = logging.getLogger('django.request')
+        with self.assertLogs(logger, 'DEBUG') as logs:
+            ASGIHandler()
+            logger.debug('Middleware loaded.')
+        adapted = [line for line in logs.output if 'adapted' in line]
+        for path in settings.MIDDLEWARE:
+            if path.startswith('blog.'):
+                name = path.rsplit('.', 1)[1]
+                self.assertFalse([line for line in adapted if name in line], adapted)
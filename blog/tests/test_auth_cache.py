@@ -0,0 +1,73 @@
+import pickle
+from unittest import mock
+
+from django.contrib.auth import authenticate, get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from blog.auth_backends import USER_CACHE_KEY
+
+
+class CachedAuthTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.client.post(reverse('login'), {'email': 'testuser@example.com', 'password': 'password'})
+
+    def auth_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        tables = [f'FROM {connection.ops.quote_name(table)}' for table in ('django_session', 'blog_user')]
+        return response, [
+            query['sql'] for query in queries.captured_queries
+            if any(table in query['sql'] for table in tables)
+        ]
+
+    def test_steady_state_requests_skip_auth_queries(self):
+        self.client.get(reverse('home'))
+        response, queries = self.auth_queries(reverse('home'))
+        self.assertTrue(response.context['user'].is_authenticated)
+        self.assertEqual(queries, [])
+
+    def test_password_change_invalidates(self):
+        self.client.get(reverse('home'))
+        self.user.set_password('new password')
+        self.user.save()
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(pk=self.user.pk)))
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_logout_invalidates(self):
+        self.client.get(reverse('home'))
+        self.client.get(reverse('logout'))
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(pk=self.user.pk)))
+
+    def test_wrong_password_is_hashed_once(self):
+        hasher = get_hasher()
+        with mock.patch.object(type(hasher), 'encode', autospec=True, side_effect=type(hasher).encode) as encode:
+            self.assertIsNone(authenticate(email='testuser@example.com', password='wrong'))
+        self.assertEqual(encode.call_count, 1)
+
+    def test_cached_user_leaves_the_password_out(self):
+        self.client.get(reverse('home'))
+        cached = cache.get(USER_CACHE_KEY.format(pk=self.user.pk))
+        self.assertIn('password', cached.get_deferred_fields())
+        self.assertNotIn(self.user.password.encode(), pickle.dumps(cached))
+
+        # Saving the cached copy leaves the stored password alone.
+        cached.first_name = 'Ada'
+        cached.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.first_name, 'Ada')
+        self.assertTrue(self.user.check_password('password'))
+
+    def test_sessions_of_the_plain_model_backend_stay_valid(self):
+        self.client.force_login(self.user, backend='django.contrib.auth.backends.ModelBackend')
+        response = self.client.get(reverse('home'))
+        self.assertTrue(response.context['user'].is_authenticated)
@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import AuthorStats, Category, Comment, Post
+
+
+class AuthorStatsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada = get_user_model().objects.create_user(email='ada@example.com', password='password')
+        self.bob = get_user_model().objects.create_user(email='bob@example.com', password='password')
+
+    def stats(self, user):
+        stats = AuthorStats.objects.get(user=user)
+        return stats.post_count, stats.last_post_at
+
+    def test_stats_follow_posts(self):
+        self.assertEqual(self.stats(self.ada), (0, None))
+        first = Post.objects.create(title='First', content='Body', author=self.ada)
+        second = Post.objects.create(title='Second', content='Body', author=self.ada)
+        self.assertEqual(self.stats(self.ada), (2, second.created_at))
+
+        second = Post.objects.get(pk=second.pk)
+        second.author = self.bob
+        second.save()
+        self.assertEqual(self.stats(self.ada), (1, first.created_at))
+        self.assertEqual(self.stats(self.bob), (1, second.created_at))
+
+        first.delete()
+        self.assertEqual(self.stats(self.ada), (0, None))
+
+    def test_deleting_an_author_with_posts(self):
+        Post.objects.create(title='First', content='Body', author=self.ada)
+        self.ada.delete()
+        self.assertFalse(AuthorStats.objects.filter(pk=self.ada.pk).exists())
+
+
+class AuthorPostsViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.ada = get_user_model().objects.create_user(
+            email='ada@example.com', password='password', first_name='Ada'
+        )
+        self.bob = get_user_model().objects.create_user(email='bob@example.com', password='password')
+        self.post = Post.objects.create(title='Ada writes', content='Body', author=self.ada)
+        Post.objects.create(title='Bob writes', content='Body', author=self.bob)
+        self.url = reverse('author_posts', kwargs={'pk': self.ada.pk})
+
+    def test_lists_only_the_authors_posts(self):
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Ada writes')
+        self.assertNotContains(response, 'Bob writes')
+        self.assertEqual(response.context['author']['post_count'], 1)
+
+    def test_unknown_author_is_404(self):
+        response = self.client.get(reverse('author_posts', kwargs={'pk': self.post.pk}))
+        self.assertEqual(response.status_code, 404)
+        # No version is started for an id that does not exist.
+        self.assertIsNone(cache.get(f'blog:version:author:{self.post.pk}'))
+
+    def test_only_own_changes_invalidate(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Bob again', content='Body', author=self.bob)
+            Comment.objects.create(post=Post.objects.get(title='Bob writes'), name='Reader', body='Hi')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, name='Reader', body='Hi')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '1 comment')
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name='Renamed later')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_nav_links(self):
+        self.client.force_login(self.ada)
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, f'href="{self.url}"')
+        self.assertContains(response, f'href="{reverse("profile")}"')
+        response = self.client.get(reverse('profile'))
+        self.assertContains(response, 'ada@example.com')
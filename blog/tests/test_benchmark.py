@@ -0,0 +1,42 @@
+from django.core.cache import cache
+from django.db.models import Sum
+from django.test import TestCase
+
+from blog.benchmark import percentile, seed_dataset
+from blog.management.commands.benchmark import Command
+from blog.models import Comment, Post, User
+
+
+class SeedDatasetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_seeds_consistent_dataset(self):
+        dataset = seed_dataset(users=3, categories=2, posts=20, comments=60, seed=1)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(len(dataset['post_ids']), 20)
+        self.assertEqual(Comment.objects.count(), 60)
+        self.assertEqual(Post.objects.aggregate(total=Sum('comment_count'))['total'], 60)
+        user = User.objects.get(email=dataset['emails'][0])
+        self.assertTrue(user.check_password(dataset['password']))
+
+    def test_seed_is_reproducible(self):
+        seed_dataset(users=2, categories=1, posts=5, comments=0, seed=7)
+        titles = sorted(Post.objects.values_list('title', flat=True))
+        Post.objects.all().delete()
+        User.objects.all().delete()
+        seed_dataset(users=2, categories=1, posts=5, comments=0, seed=7)
+        self.assertEqual(sorted(Post.objects.values_list('title', flat=True)), titles)
+
+
+class BenchmarkCompareTest(TestCase):
+    def test_percentile(self):
+        self.assertEqual(percentile(list(range(1, 101)), 95), 95)
+
+    def test_regressions_over_threshold(self):
+        baseline = {'scenarios': {'home': {'p95_ms': 10.0, 'queries_per_request': 2}}}
+        results = {'scenarios': {'home': {'p95_ms': 10.5, 'queries_per_request': 3}}}
+        self.assertEqual(
+            Command().compare(baseline, results, threshold=10),
+            ['home.queries_per_request: 2 -> 3'],
+        )
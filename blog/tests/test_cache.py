@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.cache import post_card_key, post_card_stats, render_post_cards
+from blog.models import Category, Post
+
+
+class PostCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        post_card_stats.reset()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password', first_name='Ada'
+        )
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Cached Post', content='Body', author=self.user, category=self.category
+        )
+
+    def cards(self):
+        return render_post_cards(list(Post.objects.for_feed()))
+
+    def test_second_render_is_a_hit(self):
+        self.cards()
+        self.cards()
+        self.assertEqual(post_card_stats.hits, 1)
+        self.assertEqual(post_card_stats.misses, 1)
+
+    def test_post_edit_invalidates(self):
+        self.cards()
+        self.post.title = 'Renamed Post'
+        self.post.save()
+        self.assertIn('Renamed Post', self.cards()[0])
+
+    def test_category_rename_invalidates(self):
+        self.cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Python'
+            self.category.save()
+        self.assertIn('Python', self.cards()[0])
+
+    def test_card_rendered_before_the_commit_is_dropped(self):
+        self.cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = 'Python'
+            self.category.save()
+            # Another request still sees the old name until the commit.
+            Category.objects.filter(pk=self.category.pk).update(name='Django')
+            self.cards()
+            Category.objects.filter(pk=self.category.pk).update(name='Python')
+        self.assertIsNone(cache.get(post_card_key(self.post.pk)))
+        self.assertIn('Python', self.cards()[0])
+
+    def test_category_delete_invalidates(self):
+        self.cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.delete()
+        self.assertIsNone(cache.get(post_card_key(self.post.pk)))
+
+    def test_author_rename_invalidates(self):
+        self.cards()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.first_name = 'Grace'
+            self.user.save()
+        self.assertIn('Grace', self.cards()[0])
+
+    def test_login_keeps_cards(self):
+        self.cards()
+        self.client.login(email='testuser@example.com', password='password')
+        self.assertIsNotNone(cache.get(post_card_key(self.post.pk)))
+
+    def test_stats_endpoint_is_staff_only(self):
+        self.assertEqual(self.client.get(reverse('cache_stats')).status_code, 302)
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('cache_stats'))
+        self.assertEqual(response.json()['post_cards']['misses'], 0)
@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Category, CategoryPostCount, Post
+
+
+class CategoryPostCountTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.django = Category.objects.create(name='Django')
+        self.python = Category.objects.create(name='Python')
+
+    def count(self, category):
+        return CategoryPostCount.objects.get(category=category).post_count
+
+    def test_counts_follow_create_recategorize_delete(self):
+        post = Post.objects.create(title='Post', content='Body', author=self.user, category=self.django)
+        Post.objects.create(title='Other', content='Body', author=self.user, category=self.django)
+        self.assertEqual(self.count(self.django), 2)
+
+        post = Post.objects.get(pk=post.pk)
+        post.category = self.python
+        post.save()
+        self.assertEqual((self.count(self.django), self.count(self.python)), (1, 1))
+
+        post.title = 'Renamed'
+        post.save()
+        self.assertEqual(self.count(self.python), 1)
+
+        post.delete()
+        self.assertEqual(self.count(self.python), 0)
+
+    def test_rebuild_repairs_drift(self):
+        Post.objects.create(title='Post', content='Body', author=self.user, category=self.django)
+        CategoryPostCount.objects.filter(category=self.django).update(post_count=7)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertEqual(self.count(self.django), 1)
+
+
+class CategoryViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.django = Category.objects.create(name='Django')
+        self.python = Category.objects.create(name='Python')
+        for i in range(3):
+            Post.objects.create(title=f'Django {i}', content='Body', author=self.user, category=self.django)
+        Post.objects.create(title='Python 0', content='Body', author=self.user, category=self.python)
+
+    def test_category_detail_lists_only_its_posts(self):
+        response = self.client.get(reverse('category_detail', kwargs={'pk': self.django.pk}))
+        self.assertContains(response, 'Django 2')
+        self.assertNotContains(response, 'Python 0</a>')
+        self.assertEqual(len(response.context['cards']), 3)
+
+    def test_sidebar_counts_without_group_by(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(1) as captured:
+            response = self.client.get(reverse('home'))
+        self.assertNotIn('GROUP BY', captured.captured_queries[0]['sql'])
+        self.assertEqual(
+            [(row['category__name'], row['post_count']) for row in response.context['categories']],
+            [('Django', 3), ('Python', 1)],
+        )
+
+    def test_category_list(self):
+        response = self.client.get(reverse('category_list'))
+        self.assertContains(response, '3 posts')
+        self.assertContains(response, '1 post<')
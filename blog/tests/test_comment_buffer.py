@@ -0,0 +1,152 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog import comment_buffer
+from blog.comment_buffer import (DEAD_LETTER_DIR, CommentBuffer, close_comment_buffer,
+                                 get_comment_buffer, replay_journals)
+from blog.models import Comment, Post
+
+
+class CommentBufferTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.journal_dir.cleanup)
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(title='Viral Post', content='Content', author=self.user)
+
+    def buffer(self):
+        buffer = CommentBuffer(self.journal_dir.name, batch_size=10, fsync=False)
+        self.addCleanup(buffer.close, flush=False)
+        return buffer
+
+    def test_flush_inserts_batch_and_counters(self):
+        buffer = self.buffer()
+        entries = [buffer.add(self.post.pk, 'Reader', f'Comment {i}') for i in range(3)]
+        self.assertFalse(Comment.objects.exists())
+
+        self.assertEqual(buffer.flush(), 3)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 3)
+        first = Comment.objects.get(pk=entries[0]['id'])
+        self.assertEqual(first.created_at.isoformat(), entries[0]['created_at'])
+        self.assertEqual(len(list(Path(self.journal_dir.name).glob('*.jsonl'))), 1)
+
+    def test_replay_of_abandoned_journal(self):
+        buffer = self.buffer()
+        buffer.add(self.post.pk, 'Reader', 'Survives a crash')
+        buffer.add(self.post.pk, 'Reader', 'Also survives')
+        # While the buffer holds its journal, replay leaves it alone.
+        self.assertEqual(replay_journals(self.journal_dir.name), 0)
+
+        buffer.journal.close()
+        self.assertEqual(replay_journals(self.journal_dir.name), 2)
+        self.assertEqual(replay_journals(self.journal_dir.name), 0)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+
+    def test_replay_cannot_take_a_segment_being_opened(self):
+        rename = comment_buffer.os.rename
+
+        def replay_then_rename(source, target):
+            self.assertEqual(replay_journals(self.journal_dir.name), 0)
+            rename(source, target)
+
+        with mock.patch('blog.comment_buffer.os.rename', side_effect=replay_then_rename):
+            buffer = self.buffer()
+        self.assertEqual(replay_journals(self.journal_dir.name), 0)
+        buffer.add(self.post.pk, 'Reader', 'Not lost')
+        self.assertTrue(Path(buffer.journal.name).exists())
+        self.assertEqual(buffer.flush(), 1)
+
+    def test_taken_segment_names_are_skipped(self):
+        buffer = self.buffer()
+        taken = Path(self.journal_dir.name) / f'{buffer.name}-{buffer.sequence + 1:06d}.tmp'
+        taken.touch()
+        buffer.add(self.post.pk, 'Reader', 'Comment')
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(
+            Path(buffer.journal.name).name, f'{buffer.name}-{buffer.sequence:06d}.jsonl'
+        )
+        self.assertEqual(buffer.sequence, 3)
+
+    def test_comments_on_deleted_posts_are_dropped(self):
+        buffer = self.buffer()
+        buffer.add(self.post.pk, 'Reader', 'Too late')
+        self.post.delete()
+        self.assertEqual(buffer.flush(), 0)
+
+    def test_failing_segment_is_dead_lettered(self):
+        buffer = CommentBuffer(self.journal_dir.name, batch_size=10, fsync=False, max_attempts=2)
+        self.addCleanup(buffer.close, flush=False)
+        buffer.add(self.post.pk, 'Reader', 'Poison')
+        write_comments = comment_buffer.write_comments
+
+        def fail_on_poison(entries):
+            if any(entry['body'] == 'Poison' for entry in entries):
+                raise ValueError('bad row')
+            return write_comments(entries)
+
+        with mock.patch('blog.comment_buffer.write_comments', side_effect=fail_on_poison):
+            with self.assertRaises(ValueError):
+                buffer.flush()
+            buffer.add(self.post.pk, 'Reader', 'Queued behind it')
+            with self.assertLogs('blog.comment_buffer', 'ERROR'):
+                self.assertEqual(buffer.flush(), 1)
+
+        dead_letters = Path(self.journal_dir.name) / DEAD_LETTER_DIR
+        self.assertEqual(len(list(dead_letters.glob('*.jsonl'))), 1)
+        self.assertEqual(replay_journals(self.journal_dir.name), 0)
+        self.assertEqual(replay_journals(dead_letters), 1)
+        self.assertEqual(Comment.objects.count(), 2)
+
+
+class WriteBehindViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        journal_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(journal_dir.cleanup)
+        settings = override_settings(
+            BLOG_COMMENT_WRITE_BEHIND=True,
+            BLOG_COMMENT_JOURNAL_DIR=journal_dir.name,
+            BLOG_COMMENT_FLUSH_INTERVAL=3600,
+            BLOG_COMMENT_JOURNAL_FSYNC=False,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(close_comment_buffer, flush=False)
+
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(title='Viral Post', content='Content', author=self.user)
+        self.client.force_login(self.user)
+
+    def test_author_sees_pending_comment_until_flushed(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.post(
+            reverse('create_comment', kwargs={'post_id': self.post.pk}),
+            {'name': 'Reader', 'body': 'First!'},
+        )
+        self.assertRedirects(response, url)
+        self.assertFalse(Comment.objects.exists())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c['body'] for c in response.context['pending_comments']], ['First!'])
+        self.assertContains(response, 'Pending')
+
+        get_comment_buffer().flush()
+        response = self.client.get(url)
+        self.assertEqual(response.context['pending_comments'], [])
+        self.assertEqual([c.body for c in response.context['page']], ['First!'])
+        self.assertIn('ETag', self.client.get(url))
@@ -0,0 +1,77 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.compression import collapse_whitespace
+from blog.models import Post
+
+
+class CollapseWhitespaceTest(SimpleTestCase):
+    def test_collapses_runs_outside_preformatted_elements(self):
+        html = (
+            '<div   class="a  b">\n        <p>Hi</p>\n\n    </div>\n'
+            '<textarea>keep\n    this</textarea>   <pre>  and\n  this</pre>'
+        )
+        self.assertEqual(
+            collapse_whitespace(html),
+            '<div class="a b">\n<p>Hi</p>\n</div>\n'
+            '<textarea>keep\n    this</textarea> <pre>  and\n  this</pre>',
+        )
+
+
+class CompressionMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(title='Test Post', content='Content', author=self.user)
+
+    def timings(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_gzip_html(self):
+        plain = self.client.get(reverse('home'))
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+        response = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        compress = self.timings(response)['compress']
+        self.assertIn('encoding=gzip', compress['desc'])
+
+    def test_weakens_etag(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_skips_streaming_and_small_responses(self):
+        feed = self.client.get(reverse('feed', args=['rss']), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertTrue(feed.streaming)
+        self.assertNotIn('Content-Encoding', feed)
+        with override_settings(BLOG_COMPRESSION_MIN_BYTES=10 ** 7):
+            self.client = self.client_class()
+            response = self.client.get(reverse('home'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(BLOG_COLLAPSE_WHITESPACE=True)
+    def test_collapse_whitespace_is_reported(self):
+        with self.assertLogs('blog.requests', 'INFO') as logs:
+            response = self.client.get(reverse('home'))
+        self.assertNotIn(b'\n ', response.content)
+        metrics = logs.records[0].metrics
+        self.assertLess(metrics['minify_bytes_out'], metrics['minify_bytes_in'])
+        self.assertIn('minify_ms', metrics)
@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.cache import get_content_version
+from blog.models import Comment, Post
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.post = Post.objects.create(
+            title='Test Post', content='Content', author=self.user
+        )
+        self.home = reverse('home')
+
+    def test_unchanged_feed_is_304_without_queries(self):
+        etag = self.client.get(self.home)['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.home)['Last-Modified']
+        response = self.client.get(self.home, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+    def test_content_changes_invalidate(self):
+        etag = self.client.get(self.home)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='New Post', content='Content', author=self.user)
+        response = self.client.get(self.home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, name='Commenter', body='Hi')
+        response = self.client.get(self.home, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_versions_are_bumped_once_the_change_is_committed(self):
+        before = get_content_version(), get_content_version(f'author:{self.user.pk}')
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(post=self.post, name='Commenter', body='Hi')
+            self.post.title = 'Renamed'
+            self.post.save()
+            after = get_content_version(), get_content_version(f'author:{self.user.pk}')
+            self.assertEqual(after, before)
+        after = get_content_version(), get_content_version(f'author:{self.user.pk}')
+        self.assertNotEqual(after[0], before[0])
+        self.assertNotEqual(after[1], before[1])
+
+    def test_variants_do_not_leak_between_viewers(self):
+        anonymous = self.client.get(self.home)
+        self.assertIn('public', anonymous['Cache-Control'])
+        self.assertIn('Cookie', anonymous['Vary'])
+
+        self.client.force_login(self.user)
+        response = self.client.get(self.home, HTTP_IF_NONE_MATCH=anonymous['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertIn('private', response['Cache-Control'])
+
+    def test_post_detail_is_conditional(self):
+        url = reverse('post_detail', kwargs={'pk': self.post.pk})
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
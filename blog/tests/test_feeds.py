@@ -0,0 +1,101 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.models import Category, Post
+
+
+class FeedViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password', first_name='Ada'
+        )
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Feed <Post> & more', content='Body', author=self.user, category=self.category
+        )
+
+    def fetch(self, url, **extra):
+        response = self.client.get(url, **extra)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_formats_are_well_formed(self):
+        for format in ('rss', 'atom'):
+            response, body = self.fetch(reverse('feed', args=[format]))
+            self.assertEqual(response.status_code, 200)
+            root = ElementTree.fromstring(body)
+            self.assertIn('Feed <Post> & more', [element.text for element in root.iter()])
+
+        response, body = self.fetch(reverse('feed', args=['json']))
+        data = json.loads(body)
+        self.assertEqual(data['items'][0]['title'], 'Feed <Post> & more')
+        self.assertEqual(data['items'][0]['tags'], ['Django'])
+
+    def test_second_request_is_served_from_cache(self):
+        url = reverse('feed', args=['rss'])
+        first, first_body = self.fetch(url)
+        with self.assertNumQueries(0):
+            second, second_body = self.fetch(url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(first_body, second_body)
+
+    def test_cached_documents_are_per_host(self):
+        url = reverse('feed', args=['json'])
+        self.fetch(url, HTTP_HOST='evil.example')
+        _, body = self.fetch(url, HTTP_HOST='blog.example')
+        self.assertEqual(json.loads(body)['home_page_url'], 'http://blog.example/')
+
+    def test_cached_self_link_ignores_the_query_string(self):
+        url = reverse('feed', args=['json'])
+        self.fetch(url + '?utm_source=newsletter')
+        _, body = self.fetch(url)
+        self.assertEqual(json.loads(body)['feed_url'], 'http://testserver' + url)
+
+    @override_settings(BLOG_SITE_URL='https://blog.example/')
+    def test_links_use_the_configured_site_url(self):
+        _, body = self.fetch(reverse('feed', args=['json']), HTTP_HOST='evil.example')
+        data = json.loads(body)
+        self.assertEqual(data['feed_url'], 'https://blog.example' + reverse('feed', args=['json']))
+        self.assertTrue(data['items'][0]['url'].startswith('https://blog.example/'))
+
+    def test_unchanged_feed_is_304(self):
+        url = reverse('feed', args=['atom'])
+        response, _ = self.fetch(url)
+        self.assertIn('public', response['Cache-Control'])
+        response, _ = self.fetch(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_moving_a_post_invalidates_the_old_category(self):
+        url = reverse('category_feed', args=[self.category.pk, 'json'])
+        response, body = self.fetch(url)
+        self.assertEqual(len(json.loads(body)['items']), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.category = Category.objects.create(name='Python')
+            self.post.save()
+        response, body = self.fetch(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(body)['items'], [])
+
+    def test_author_feed(self):
+        response, body = self.fetch(reverse('author_feed', args=[self.user.pk, 'json']))
+        self.assertEqual(json.loads(body)['title'], 'Blogger: Ada')
+
+    def test_unknown_category_or_author_is_404_without_a_version(self):
+        for name in ('category_feed', 'author_feed'):
+            with self.subTest(name=name):
+                response = self.client.get(reverse(name, args=[self.post.pk, 'rss']))
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(cache.get_many([
+            f'blog:version:category:{self.post.pk}', f'blog:version:author:{self.post.pk}'
+        ]), {})
+
+    def test_unknown_format_is_404(self):
+        response = self.client.get(reverse('feed', args=['yaml']))
+        self.assertEqual(response.status_code, 404)
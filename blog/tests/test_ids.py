@@ -0,0 +1,49 @@
+import datetime
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+
+from blog.ids import uuid7, uuid7_datetime
+from blog.management.commands.benchmark_uuid import Command
+from blog.models import Comment, Post
+
+
+class UUID7Test(SimpleTestCase):
+    def test_version_and_variant(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+
+    def test_strictly_increasing(self):
+        values = [uuid7() for _ in range(10000)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_embeds_creation_time(self):
+        created = uuid7_datetime(uuid7())
+        self.assertLess(abs(created - timezone.now()), datetime.timedelta(seconds=5))
+        self.assertIsNone(uuid7_datetime(uuid.uuid4()))
+
+
+class UUID7KeysTest(TestCase):
+    def test_new_rows_get_time_ordered_keys_next_to_old_ones(self):
+        user = get_user_model().objects.create_user(email='testuser@example.com', password='password')
+        old = Post.objects.create(id=uuid.uuid4(), title='Old', content='Content', author=user)
+        new = Post.objects.create(title='New', content='Content', author=user)
+        comment = Comment.objects.create(post=old, name='Reader', body='Body')
+        self.assertEqual(new.pk.version, 7)
+        self.assertEqual(comment.pk.version, 7)
+        self.assertEqual(user.pk.version, 7)
+        self.assertEqual(Post.objects.get(pk=old.pk).title, 'Old')
+
+
+class BenchmarkUUIDTest(TransactionTestCase):
+    def test_measures_both_schemes(self):
+        options = {'rows': 500, 'batch_size': 100, 'posts': 10}
+        for scheme in ('uuid4', 'uuid7'):
+            summary = Command().measure(scheme, options)
+            self.assertEqual(summary['rows'], 500)
+            self.assertGreater(summary['rows_per_second'], 0)
+            self.assertGreater(summary['bytes']['primary_key'], 0)
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from io import StringIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Category, Comment, Post, User
+from blog.search import get_search_backend
+
+
+class ImportExportTest(TestCase):
+    databases = {'default', 'replica'} if 'replica' in settings.DATABASES else {'default'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testuser@example.com', password='password', first_name='Ada'
+        )
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Exported Post', content='Tabs\tand\nnewlines', author=self.user,
+            category=self.category
+        )
+        self.comment = Comment.objects.create(post=self.post, name='Commenter', body='Hi')
+        self.post.refresh_from_db()
+
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def snapshot(self):
+        return [
+            list(model.objects.order_by('pk').values())
+            for model in (User, Category, Post, Comment)
+        ]
+
+    def test_round_trip_preserves_rows(self):
+        before = self.snapshot()
+        call_command('export_blog', output=self.path, stderr=StringIO())
+        with open(self.path) as export:
+            self.assertEqual(len(export.readlines()), 4)
+
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        self.assertEqual(Post.objects.count(), 0)
+
+        err = StringIO()
+        call_command('import_blog', self.path, batch_size=1, stderr=err)
+        self.assertIn('Imported 4 rows', err.getvalue())
+        self.assertEqual(self.snapshot(), before)
+
+        results = get_search_backend().search(Post.objects.all(), 'newlines')
+        self.assertEqual(list(results), [self.post])
+
+    @unittest.skipUnless('replica' in settings.DATABASES, 'needs a "replica" database, see core.settings_test')
+    def test_import_into_another_database_indexes_it(self):
+        call_command('export_blog', output=self.path, stderr=StringIO())
+        call_command('import_blog', self.path, database='replica', stderr=StringIO())
+
+        results = get_search_backend('replica').search(Post.objects.using('replica'), 'newlines')
+        self.assertEqual(list(results), [self.post])
+
+    def test_import_refreshes_windowed_feeds(self):
+        cache.clear()
+        call_command('export_blog', output=self.path, stderr=StringIO())
+        User.objects.all().delete()
+        Category.objects.all().delete()
+        response = self.client.get(reverse('home'), {'window': 'week'})
+        self.assertNotContains(response, 'Exported Post')
+
+        call_command('import_blog', self.path, stderr=StringIO())
+        response = self.client.get(reverse('home'), {'window': 'week'})
+        self.assertContains(response, 'Exported Post')
+
+    def test_export_to_stdout(self):
+        out = StringIO()
+        call_command('export_blog', stdout=out, stderr=StringIO())
+        self.assertIn('"model":"blog.post"', out.getvalue())
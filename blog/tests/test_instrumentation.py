@@ -0,0 +1,51 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.instrumentation import sql_fingerprint
+from blog.models import Post
+
+
+class RequestMetricsMiddlewareTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        Post.objects.create(title='Test Post', content='Content', author=self.user)
+
+    def timings(self, response):
+        entries = {}
+        for entry in response['Server-Timing'].split(', '):
+            name, *params = entry.split(';')
+            entries[name] = dict(param.split('=', 1) for param in params)
+        return entries
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('home'))
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'tpl', 'view', 'total'})
+        self.assertNotEqual(timings['db']['desc'], '"0 queries"')
+        self.assertGreater(float(timings['tpl']['dur']), 0)
+
+    def test_request_log_line(self):
+        with self.assertLogs('blog.requests', 'INFO') as logs:
+            self.client.get(reverse('home'))
+        record = logs.records[0]
+        self.assertEqual(record.metrics['status'], 200)
+        self.assertGreater(record.metrics['queries'], 0)
+
+    @override_settings(BLOG_SLOW_REQUEST_MS=0)
+    def test_slow_request_logs_fingerprints(self):
+        with self.assertLogs('blog.requests.slow', 'WARNING') as logs:
+            self.client.get(reverse('home'))
+        fingerprints = logs.records[0].fingerprints
+        self.assertTrue(fingerprints)
+        self.assertTrue(all(count >= 1 for _, count, _ in fingerprints))
+
+    def test_sql_fingerprint(self):
+        self.assertEqual(
+            sql_fingerprint("SELECT * FROM t WHERE id IN (%s, %s,  %s) AND n = 'x' LIMIT 21"),
+            sql_fingerprint("SELECT * FROM t WHERE id IN (%s) AND n = 'y' LIMIT 5"),
+        )
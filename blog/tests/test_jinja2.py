@@ -0,0 +1,82 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from jinja2 import DictLoader
+
+from blog.jinja2_env import environment
+from blog.models import Category, Comment, Post
+from blog.views import CreateComment, HomePageView, PostDetailView
+
+
+def normalize(html):
+    return re.sub(r'>\s+<', '><', re.sub(r'\s+', ' ', html)).strip()
+
+
+class Jinja2TemplatesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password', first_name='Ada'
+        )
+        category = Category.objects.create(name='Tech & <Science>')
+        self.post = Post.objects.create(
+            title='A <b>bold</b> post', content='First line\nSecond line',
+            author=self.user, category=category,
+        )
+        Comment.objects.create(post=self.post, name='Reader', body='Nice\npost')
+
+    def render(self, view_class, engine, user=None, **kwargs):
+        cache.clear()
+        request = RequestFactory().get('/')
+        request.user = user or AnonymousUser()
+        response = view_class.as_view(template_engine=engine)(request, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.content.decode()
+
+    def test_homepage_matches_django_template(self):
+        for user in (None, self.user):
+            django_html = self.render(HomePageView, None, user)
+            self.assertEqual(normalize(self.render(HomePageView, 'jinja2', user)), normalize(django_html))
+        self.assertIn('A &lt;b&gt;bold&lt;/b&gt; post', django_html)
+
+    def test_post_detail_matches_django_template(self):
+        django_html = self.render(PostDetailView, None, pk=self.post.pk)
+        jinja2_html = self.render(PostDetailView, 'jinja2', pk=self.post.pk)
+        self.assertEqual(normalize(jinja2_html), normalize(django_html))
+        self.assertIn('Nice<br>post', jinja2_html)
+
+    def test_comment_form_has_csrf_input(self):
+        html = self.render(CreateComment, 'jinja2', self.user, post_id=self.post.pk)
+        self.assertIn('name="csrfmiddlewaretoken"', html)
+        self.assertIn('name="body"', html)
+
+    def test_bytecode_cache_survives_new_environments(self):
+        cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, cache_dir)
+        loader = DictLoader({'page.html': '{{ 1 + 1 }}'})
+        with override_settings(BLOG_JINJA2_BYTECODE_CACHE_DIR=cache_dir):
+            environment(loader=loader).get_template('page.html')
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+            bucket_cache = environment(loader=loader).bytecode_cache
+        self.assertEqual(bucket_cache.directory, cache_dir)
+
+
+class BenchmarkTemplatesTest(TestCase):
+    def test_reports_both_engines(self):
+        stdout = StringIO()
+        call_command(
+            'benchmark_templates', posts=5, iterations=2, warmup=0, stdout=stdout, stderr=StringIO()
+        )
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(set(results['engines']), {'django', 'jinja2'})
+        self.assertGreater(results['jinja2_speedup'], 0)
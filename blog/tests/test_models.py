@@ -1,3 +1,6 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 from blog.models import Category, Post, Comment
@@ -86,3 +89,72 @@ class CommentModelTest(TestCase):
         self.assertIsNotNone(self.comment.created_at)
         self.assertIsNotNone(self.comment.updated_at)
         self.assertEqual(str(self.comment), f'Comment by Commenter on {self.post}')
+
+
+class PostExcerptTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testauthor@example.com', password='password123'
+        )
+
+    def test_excerpt_is_precomputed_on_save(self):
+        post = Post.objects.create(
+            title='Long Post', content='word\n\n' * 200, author=self.user
+        )
+        self.assertLessEqual(len(post.excerpt), 280)
+        self.assertTrue(post.excerpt.startswith('word word'))
+
+        post.content = 'Short and sweet.'
+        post.save(update_fields=['content'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Short and sweet.')
+
+    def test_feed_projection_defers_content(self):
+        Post.objects.create(title='Feed Post', content='Body', author=self.user)
+        post = Post.objects.for_feed().get()
+        self.assertIn('content', post.get_deferred_fields())
+        with self.assertNumQueries(0):
+            self.assertEqual(post.excerpt, 'Body')
+            post.author.first_name
+            post.category
+
+
+class CommentCounterTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='testauthor@example.com', password='password123'
+        )
+        self.post = Post.objects.create(
+            title='Test Post', content='This is a test post.', author=self.user
+        )
+
+    def comment(self, body='Nice post'):
+        return Comment.objects.create(post=self.post, name='Commenter', body=body)
+
+    def test_counters_follow_creates_and_deletes(self):
+        first = self.comment()
+        second = self.comment()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 2)
+        self.assertEqual(self.post.last_comment_at, second.created_at)
+
+        second.delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, first.created_at)
+
+        Comment.objects.filter(post=self.post).delete()
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        self.assertIsNone(self.post.last_comment_at)
+
+    def test_rebuild_counters_repairs_drift(self):
+        comment = self.comment()
+        Post.objects.filter(pk=self.post.pk).update(comment_count=7, last_comment_at=None)
+
+        out = StringIO()
+        call_command('rebuild_counters', stdout=out)
+        self.assertIn('Repaired 1', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.assertEqual(self.post.last_comment_at, comment.created_at)
@@ -0,0 +1,96 @@
+import base64
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.pagination import CursorPaginator, InvalidCursor
+from blog.views import HomePageView
+
+
+class CursorPaginatorTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        now = timezone.now()
+        self.posts = []
+        for i in range(7):
+            post = Post.objects.create(
+                title=f'Post {i}', content='Content', author=self.user
+            )
+            # Posts 2 and 3 share a timestamp to exercise the id tie-breaker.
+            minutes = 2 if i == 3 else i
+            Post.objects.filter(pk=post.pk).update(
+                created_at=now - timedelta(minutes=minutes)
+            )
+            self.posts.append(post)
+        self.expected = list(Post.objects.order_by('-created_at', '-id'))
+
+    def test_walks_forward_and_backward(self):
+        paginator = CursorPaginator(Post.objects.all(), 3)
+
+        first = paginator.get_page()
+        self.assertEqual(first.object_list, self.expected[:3])
+        self.assertFalse(first.has_previous)
+        self.assertTrue(first.has_next)
+
+        second = paginator.get_page(after=first.next_cursor)
+        self.assertEqual(second.object_list, self.expected[3:6])
+        self.assertTrue(second.has_previous)
+
+        last = paginator.get_page(after=second.next_cursor)
+        self.assertEqual(last.object_list, self.expected[6:])
+        self.assertFalse(last.has_next)
+
+        back = paginator.get_page(before=last.previous_cursor)
+        self.assertEqual(back.object_list, self.expected[3:6])
+        self.assertTrue(back.has_next)
+
+        start = paginator.get_page(before=back.previous_cursor)
+        self.assertEqual(start.object_list, self.expected[:3])
+        self.assertFalse(start.has_previous)
+
+    def test_never_counts_or_offsets(self):
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        first = paginator.get_page()
+        with CaptureQueriesContext(connection) as queries:
+            paginator.get_page(after=first.next_cursor)
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
+
+    def test_invalid_cursor(self):
+        paginator = CursorPaginator(Post.objects.all(), 3)
+        with self.assertRaises(InvalidCursor):
+            paginator.get_page(after='not-a-cursor')
+
+    def test_homepage_pages(self):
+        with mock.patch.object(HomePageView, 'paginate_by', 3):
+            response = self.client.get(reverse('home'))
+        page = response.context['page']
+        self.assertTrue(page.has_next)
+        with mock.patch.object(HomePageView, 'paginate_by', 3):
+            response = self.client.get(reverse('home'), {'after': page.next_cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['page']), self.expected[3:6])
+
+    def test_homepage_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('home'), {'after': '!!!'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_with_impossible_date_is_404(self):
+        payload = json.dumps(['2024-02-30T00:00:00', 'x']).encode()
+        cursor = base64.urlsafe_b64encode(payload).decode().rstrip('=')
+        with self.assertRaises(InvalidCursor):
+            CursorPaginator(Post.objects.all(), 3).get_page(after=cursor)
+        response = self.client.get(reverse('home'), {'after': cursor})
+        self.assertEqual(response.status_code, 404)
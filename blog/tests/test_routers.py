@@ -0,0 +1,124 @@
+import time
+import unittest
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from blog.cache import bump_content_version, refill_reads
+from blog.middleware import ReplicaPinningMiddleware
+from blog.models import Category, Comment, Post, User
+from blog.routers import PrimaryReplicaRouter, replica_reads
+
+
+@override_settings(DATABASE_REPLICAS=['replica'], BLOG_REPLICA_STICKY_SECONDS=30)
+class PrimaryReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        self.router = PrimaryReplicaRouter()
+        self.factory = RequestFactory()
+
+    def read_alias(self, request):
+        seen = {}
+
+        def get_response(request):
+            seen['read'] = self.router.db_for_read(Post)
+            seen['write'] = self.router.db_for_write(Post)
+            return HttpResponse()
+
+        response = ReplicaPinningMiddleware(get_response)(request)
+        return seen, response
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_safe_request_reads_from_replica(self):
+        seen, response = self.read_alias(self.factory.get('/'))
+        self.assertEqual(seen, {'read': 'replica', 'write': 'default'})
+        self.assertNotIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    def test_writes_pin_the_client_to_primary(self):
+        seen, response = self.read_alias(self.factory.post('/create/post/'))
+        self.assertEqual(seen['read'], 'default')
+        cookie = response.cookies[ReplicaPinningMiddleware.cookie_name]
+        self.assertEqual(cookie['max-age'], 30)
+
+        request = self.factory.get('/')
+        request.COOKIES[cookie.key] = cookie.value
+        seen, _ = self.read_alias(request)
+        self.assertEqual(seen['read'], 'default')
+
+    def test_pin_expires(self):
+        request = self.factory.get('/')
+        request.COOKIES[ReplicaPinningMiddleware.cookie_name] = str(time.time() - 1)
+        seen, _ = self.read_alias(request)
+        self.assertEqual(seen['read'], 'replica')
+
+    def test_content_changes_do_not_pin_other_clients(self):
+        bump_content_version('posts')
+        self.addCleanup(cache.clear)
+        seen, _ = self.read_alias(self.factory.get('/'))
+        self.assertEqual(seen['read'], 'replica')
+
+    def test_refills_under_a_settling_version_read_from_primary(self):
+        settling = time.time_ns()
+        settled = settling - 31 * 1_000_000_000
+        with replica_reads():
+            with refill_reads([settled, settling]):
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+            with refill_reads([settled]):
+                self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+
+    def test_admin_reads_from_primary(self):
+        seen, _ = self.read_alias(self.factory.get('/admin/blog/post/'))
+        self.assertEqual(seen['read'], 'default')
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        seen, _ = self.read_alias(self.factory.get('/'))
+        self.assertEqual(seen['read'], 'default')
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'needs a "replica" database, see core.settings_test')
+@override_settings(DATABASE_REPLICAS=['replica'], BLOG_REPLICA_STICKY_SECONDS=30)
+class ReplicaDatabaseTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        cache.clear()
+        # bulk_create sends no signals, so nothing else is written to either
+        # database and the two really differ.
+        Category.objects.bulk_create([Category(name='On the primary')])
+        Category.objects.using('replica').bulk_create([Category(name='On the replica')])
+
+    def test_reads_go_to_the_replica_until_the_client_writes(self):
+        response = self.client.get(reverse('category_list'))
+        self.assertContains(response, 'On the replica')
+        self.assertNotContains(response, 'On the primary')
+
+        self.client.post(reverse('login'), {'email': 'nobody@example.com', 'password': 'wrong'})
+        response = self.client.get(reverse('category_list'))
+        self.assertContains(response, 'On the primary')
+        self.assertNotContains(response, 'On the replica')
+
+    def test_other_clients_read_from_the_replica_after_a_comment(self):
+        author = User.objects.create_user(email='author@example.com', password='secret')
+        post = Post.objects.create(title='Hello', content='World', author=author)
+        commenter = self.client_class()
+        commenter.force_login(author)
+        commenter.post(reverse('create_comment', args=[post.pk]), {'name': 'Ann', 'body': 'Hi'})
+        self.assertTrue(Comment.objects.filter(post=post).exists())
+
+        response = self.client.get(reverse('category_list'))
+        self.assertContains(response, 'On the replica')
+        self.assertNotContains(response, 'On the primary')
+        # Rendered from the replica under a version that is still settling,
+        # so the page is not validated.
+        self.assertFalse(response.has_header('ETag'))
+
+    def test_queries_outside_requests_use_the_primary(self):
+        self.assertEqual(list(Category.objects.values_list('name', flat=True)), ['On the primary'])
@@ -0,0 +1,74 @@
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from blog.models import Post
+from blog.search import SQLiteSearchBackend, get_search_backend
+
+
+class SearchBackendTest(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com', password='password'
+        )
+        self.title_match = Post.objects.create(
+            title='Scaling Django', content='Notes on caching.', author=self.user
+        )
+        self.content_match = Post.objects.create(
+            title='Weekend notes', content='We tried Django for a side project.',
+            author=self.user
+        )
+        self.other = Post.objects.create(
+            title='Gardening', content='Tomatoes and basil.', author=self.user
+        )
+
+    def search(self, query):
+        return list(get_search_backend().search(Post.objects.all(), query))
+
+    def test_uses_fts5_backend_on_sqlite(self):
+        self.assertIsInstance(get_search_backend(), SQLiteSearchBackend)
+
+    def test_matches_title_and_content_ranked(self):
+        self.assertEqual(self.search('django'), [self.title_match, self.content_match])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.title = 'Django in the garden'
+        self.other.save()
+        self.assertIn(self.other, self.search('django'))
+
+        self.title_match.delete()
+        self.assertEqual(self.search('scaling'), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(self.search('"django" -*'), [self.title_match, self.content_match])
+        self.assertEqual(self.search('!!!'), [])
+
+    def test_homepage_search_matches_content(self):
+        response = self.client.get(reverse('home'), {'q': 'basil'})
+        self.assertContains(response, 'Gardening')
+        self.assertNotContains(response, 'Scaling Django')
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, 'needs a "replica" database, see core.settings_test')
+class SearchIndexDatabaseTest(TestCase):
+    databases = {'default', 'replica'}
+
+    def search(self, using, query):
+        return list(get_search_backend(using).search(Post.objects.using(using), query))
+
+    def test_index_follows_saves_on_another_database(self):
+        # bulk_create sends no signals, so only the save below indexes the post.
+        user = get_user_model()(email='replica@example.com')
+        get_user_model().objects.using('replica').bulk_create([user])
+        post = Post(title='Replicated Django', content='Body', author_id=user.pk)
+        Post.objects.using('replica').bulk_create([post])
+
+        post.save(using='replica')
+        self.assertEqual(self.search('replica', 'replicated'), [post])
+        self.assertEqual(self.search('default', 'replicated'), [])
+
+        post.delete(using='replica')
+        self.assertEqual(self.search('replica', 'replicated'), [])
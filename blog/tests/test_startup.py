@@ -0,0 +1,80 @@
+import importlib
+import json
+import os
+import sys
+from io import StringIO
+from unittest import mock
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import SimpleTestCase
+
+from blog.management.commands.benchmark_startup import Command, parse_importtime
+from blog.startup import compile_templates, project_template_names
+
+PRODUCTION_ENV = {
+    'DJANGO_SECRET_KEY': 'production-secret',
+    'DJANGO_CACHE_BACKEND': 'django.core.cache.backends.redis.RedisCache',
+    'DJANGO_CACHE_LOCATION': 'redis://localhost:6379/0',
+}
+
+
+def import_production_settings(**env):
+    # Both modules read the environment when they are first imported.
+    with mock.patch.dict(sys.modules), mock.patch.dict(os.environ, env):
+        sys.modules.pop('core.settings_production', None)
+        sys.modules.pop('core.settings', None)
+        return importlib.import_module('core.settings_production')
+
+
+class StartupTest(SimpleTestCase):
+    def test_compiles_project_templates_only(self):
+        names = [name for engine, name in project_template_names()]
+        self.assertIn('homepage.html', names)
+        self.assertFalse(any(name.startswith('admin/') for name in names))
+        self.assertEqual(compile_templates(), len(names))
+
+    def test_production_settings_drop_dev_apps(self):
+        production = import_production_settings(**PRODUCTION_ENV)
+        self.assertFalse(production.DEBUG)
+        self.assertNotIn('django_browser_reload', production.INSTALLED_APPS)
+        self.assertNotIn('tailwind', production.INSTALLED_APPS)
+        self.assertFalse(any('browser_reload' in name for name in production.MIDDLEWARE))
+        self.assertFalse(production.BLOG_SERVER_TIMING)
+
+    def test_production_settings_require_a_secret_key_and_shared_cache(self):
+        for name, value in (
+            ('DJANGO_SECRET_KEY', ''),
+            ('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        ):
+            with self.subTest(name=name), self.assertRaises(ImproperlyConfigured):
+                import_production_settings(**{**PRODUCTION_ENV, name: value})
+
+    def test_tailwind_css_stand_in(self):
+        html = Template('{% load tailwind_static %}{% tailwind_css %}').render(Context())
+        self.assertEqual(html, '<link rel="stylesheet" href="/static/css/dist/styles.css">')
+
+    def test_parse_importtime(self):
+        output = (
+            'import time: self [us] | cumulative | imported package\n'
+            'import time:       500 |        500 |   django.utils\n'
+            'import time:      1500 |       2000 | django\n'
+            'import time:       250 |        250 | blog.views\n'
+        )
+        self.assertEqual(parse_importtime(output), {'django': 2.0, 'blog': 0.25})
+
+    def test_compare_flags_slower_phases(self):
+        baseline = {'startup': {'process_ms': 500, 'urls_ms': 40}}
+        results = {'startup': {'process_ms': 520, 'urls_ms': 60}}
+        self.assertEqual(Command().compare(baseline, results, 10), ['startup.urls_ms: 40 -> 60'])
+
+    def test_command_measures_a_cold_start(self):
+        stdout = StringIO()
+        with mock.patch.dict(os.environ, PRODUCTION_ENV):
+            call_command('benchmark_startup', runs=1, top=5, stdout=stdout, stderr=StringIO())
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(
+            set(results['startup']), {'setup_ms', 'wsgi_ms', 'urls_ms', 'templates_ms', 'process_ms'}
+        )
+        self.assertIn('django', results['imports_ms'])
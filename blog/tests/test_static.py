@@ -0,0 +1,83 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import skipIf
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from blog.compression import accepted_encodings, brotli
+from blog.middleware import PrecompressedStaticMiddleware
+
+STYLES = 'body { color: #333; }\n' * 200
+
+
+class PrecompressedStaticTest(SimpleTestCase):
+    def setUp(self):
+        self.source = tempfile.mkdtemp()
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.source)
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.source, 'css'))
+        with open(os.path.join(self.source, 'css', 'site.css'), 'w') as file:
+            file.write(STYLES)
+        with open(os.path.join(self.source, 'logo.png'), 'wb') as file:
+            file.write(os.urandom(2048))
+
+        settings = override_settings(
+            STATIC_URL='/static/',
+            STATIC_ROOT=self.root,
+            STATICFILES_DIRS=[self.source],
+            STATICFILES_FINDERS=['django.contrib.staticfiles.finders.FileSystemFinder'],
+            STORAGES={
+                'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+                'staticfiles': {'BACKEND': 'blog.storage.CompressedManifestStaticFilesStorage'},
+            },
+            BLOG_SERVE_STATIC=True,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        self.hashed = staticfiles_storage.stored_name('css/site.css')
+        self.middleware = PrecompressedStaticMiddleware(lambda request: HttpResponse('app'))
+
+    def get(self, name, encoding=''):
+        request = RequestFactory().get(f'/static/{name}', HTTP_ACCEPT_ENCODING=encoding)
+        return self.middleware(request)
+
+    def test_collectstatic_writes_compressed_variants(self):
+        path = os.path.join(self.root, self.hashed)
+        with open(path + '.gz', 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()).decode(), STYLES)
+        self.assertTrue(os.path.exists(os.path.join(self.root, 'css', 'site.css.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'logo.png.gz')))
+
+    def test_serves_gzip_variant_as_immutable(self):
+        response = self.get(self.hashed, 'gzip, deflate')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(), STYLES)
+
+    @skipIf(brotli is None, 'brotli is not installed')
+    def test_prefers_brotli(self):
+        response = self.get(self.hashed, 'gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(b''.join(response.streaming_content)).decode(), STYLES)
+
+    def test_serves_identity_without_accept_encoding(self):
+        response = self.get('css/site.css')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(b''.join(response.streaming_content).decode(), STYLES)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=3600', response['Cache-Control'])
+
+    def test_unknown_files_fall_through(self):
+        self.assertEqual(self.get('css/missing.css').content, b'app')
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings('gzip;q=1.0, br;q=0, identity'), {'gzip', 'identity'})
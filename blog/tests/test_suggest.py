@@ -0,0 +1,157 @@
+import datetime
+import json
+import uuid
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Post
+from blog.suggest import (
+    SUGGEST_CHANGES_KEY,
+    SuggestionIndex,
+    get_suggestion_index,
+    normalize_title,
+    record_suggestion_change,
+    reset_suggestion_index,
+)
+
+
+def row(title, comment_count=0, minutes_ago=0):
+    return (uuid.uuid4(), title, comment_count, timezone.now() - datetime.timedelta(minutes=minutes_ago))
+
+
+def titles(results):
+    return [title for _, title in results]
+
+
+class SuggestionIndexTest(SimpleTestCase):
+    def test_normalizes_titles(self):
+        self.assertEqual(normalize_title('  Café—Crème:  Ünïcode_Titles! '), 'cafe creme unicode titles')
+
+    def test_matches_word_starts_with_title_starts_first(self):
+        index = SuggestionIndex()
+        index.build([
+            row('Tuning Django', comment_count=9),
+            row('Django tips', comment_count=1),
+            row('Flask tips'),
+        ])
+        self.assertEqual(titles(index.suggest('dja')), ['Django tips', 'Tuning Django'])
+        self.assertEqual(titles(index.suggest('DJANGO T')), ['Django tips'])
+        self.assertEqual(titles(index.suggest('tips')), ['Django tips', 'Flask tips'])
+        self.assertEqual(index.suggest('rails'), [])
+        self.assertEqual(index.suggest('  '), [])
+
+    def test_ranks_by_comments_then_recency(self):
+        index = SuggestionIndex(limit=3)
+        index.build([
+            row('Post old', minutes_ago=10),
+            row('Post popular', comment_count=5, minutes_ago=20),
+            row('Post new'),
+            row('Post newer but quiet', minutes_ago=-1),
+        ])
+        self.assertEqual(
+            titles(index.suggest('post', 10)), ['Post popular', 'Post newer but quiet', 'Post new']
+        )
+        self.assertEqual(titles(index.suggest('po', 1)), ['Post popular'])
+
+    def test_updates_keep_the_memo_exact(self):
+        index = SuggestionIndex(limit=2)
+        rows = [row(f'Python {n}', comment_count=n) for n in range(4)]
+        index.build(rows)
+        self.assertEqual(titles(index.suggest('p')), ['Python 3', 'Python 2'])
+        self.assertEqual(titles(index.suggest('python')), ['Python 3', 'Python 2'])
+
+        index.remove_post(Post(id=rows[3][0]))
+        self.assertEqual(titles(index.suggest('p')), ['Python 2', 'Python 1'])
+        self.assertEqual(titles(index.suggest('python')), ['Python 2', 'Python 1'])
+
+        index.add(rows[1][0], 'Pythonic code', comment_count=7)
+        self.assertEqual(titles(index.suggest('p')), ['Pythonic code', 'Python 2'])
+        self.assertEqual(titles(index.suggest('python')), ['Pythonic code', 'Python 2'])
+        self.assertEqual(index.suggest('python 1'), [])
+
+    def test_drops_lowest_ranked_posts_past_the_memory_ceiling(self):
+        index = SuggestionIndex()
+        index.build([row('Popular post', comment_count=5)])
+        index.max_bytes = index.bytes * 2.5
+        index.add(uuid.uuid4(), 'Quiet post', comment_count=1)
+        index.add(uuid.uuid4(), 'Busy post', comment_count=3)
+        self.assertEqual(titles(index.suggest('post')), ['Popular post', 'Busy post'])
+        self.assertLessEqual(index.bytes, index.max_bytes)
+        self.assertEqual(len(index.keys), 4)
+
+
+class SuggestViewTest(TestCase):
+    def setUp(self):
+        reset_suggestion_index()
+        self.addCleanup(reset_suggestion_index)
+        self.user = get_user_model().objects.create_user(email='testuser@example.com', password='password')
+        self.post = Post.objects.create(title='Django performance', content='Content', author=self.user)
+
+    def test_suggests_from_the_index_without_queries(self):
+        get_suggestion_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('suggest'), {'q': 'perf'})
+        self.assertEqual(response.json(), {
+            'query': 'perf',
+            'results': [{
+                'id': str(self.post.pk),
+                'title': 'Django performance',
+                'url': reverse('post_detail', kwargs={'pk': self.post.pk}),
+            }],
+        })
+        self.assertIn('max-age=30', response['Cache-Control'])
+
+    def test_follows_saved_and_deleted_posts(self):
+        self.assertEqual(len(self.client.get(reverse('suggest'), {'q': 'dj'}).json()['results']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Django caching', content='Content', author=self.user)
+            self.post.title = 'Flask performance'
+            self.post.save()
+        results = self.client.get(reverse('suggest'), {'q': 'dj'}).json()['results']
+        self.assertEqual([result['title'] for result in results], ['Django caching'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.delete()
+        self.assertEqual(self.client.get(reverse('suggest'), {'q': 'flask'}).json()['results'], [])
+
+    def test_only_changes_from_other_processes_make_the_index_stale(self):
+        cache.delete(SUGGEST_CHANGES_KEY)
+        index = get_suggestion_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='Django caching', content='Content', author=self.user)
+        self.assertEqual(index.changes, 1)
+        with mock.patch('blog.suggest.threading.Thread') as thread:
+            index.refresh_if_stale(0)
+            thread.assert_not_called()
+
+            # Counted by another process, whose change this index lacks.
+            record_suggestion_change()
+            index.refresh_if_stale(0)
+            thread.assert_called_once()
+
+    def test_limits_results(self):
+        for n in range(12):
+            Post.objects.create(title=f'Django {n}', content='Content', author=self.user)
+        response = self.client.get(reverse('suggest'), {'q': 'django', 'limit': '3'})
+        self.assertEqual(len(response.json()['results']), 3)
+        response = self.client.get(reverse('suggest'), {'q': 'django', 'limit': 'all'})
+        self.assertEqual(len(response.json()['results']), 10)
+
+
+class BenchmarkSuggestTest(SimpleTestCase):
+    def test_reports_lookup_latency_and_memory(self):
+        stdout = StringIO()
+        call_command(
+            'benchmark_suggest', posts=200, queries=50, updates=5, stdout=stdout, stderr=StringIO()
+        )
+        results = json.loads(stdout.getvalue())['index']
+        self.assertEqual(results['posts'], 200)
+        self.assertGreater(results['traced_bytes'], 0)
+        self.assertGreater(results['lookup_p50_us'], 0)
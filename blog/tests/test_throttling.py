@@ -0,0 +1,62 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from blog.throttling import consume, parse_rate
+
+
+class TokenBucketTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('30/min'), (30, 0.5))
+
+    def test_bucket_empties_and_refills(self):
+        rates = {'ip': '2/min'}
+        self.assertEqual(consume('test', {'ip': '1.2.3.4'}, rates, now=0), 0)
+        self.assertEqual(consume('test', {'ip': '1.2.3.4'}, rates, now=0), 0)
+        self.assertEqual(consume('test', {'ip': '1.2.3.4'}, rates, now=0), 30)
+        self.assertEqual(consume('test', {'ip': '5.6.7.8'}, rates, now=0), 0)
+        self.assertEqual(consume('test', {'ip': '1.2.3.4'}, rates, now=30), 0)
+
+    def test_rejection_takes_no_tokens(self):
+        rates = {'ip': '5/min', 'email': '1/min'}
+        consume('test', {'ip': 'a', 'email': 'x@example.com'}, rates, now=0)
+        self.assertTrue(consume('test', {'ip': 'a', 'email': 'x@example.com'}, rates, now=0))
+        for index in range(4):
+            identities = {'ip': 'a', 'email': f'{index}@example.com'}
+            self.assertEqual(consume('test', identities, rates, now=0), 0)
+
+
+@override_settings(BLOG_THROTTLE_RATES={'login': {'ip': '3/min', 'email': '2/min'}})
+class LoginThrottleTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        # Exhausted buckets would otherwise throttle later tests' logins.
+        self.addCleanup(cache.clear)
+        get_user_model().objects.create_user(email='testuser@example.com', password='password')
+
+    def login(self, email, ip='127.0.0.1'):
+        return self.client.post(
+            reverse('login'), {'email': email, 'password': 'wrong'}, REMOTE_ADDR=ip
+        )
+
+    def test_per_email_limit_across_addresses(self):
+        self.assertEqual(self.login('testuser@example.com', '10.0.0.1').status_code, 200)
+        self.assertEqual(self.login('TestUser@example.com', '10.0.0.2').status_code, 200)
+        response = self.login('testuser@example.com', '10.0.0.3')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 31))
+
+    def test_rejected_before_hashing(self):
+        for index in range(3):
+            self.login(f'user{index}@example.com')
+        with mock.patch('blog.views.authenticate') as authenticate, \
+                self.assertNumQueries(0):
+            response = self.login('other@example.com')
+        self.assertEqual(response.status_code, 429)
+        authenticate.assert_not_called()
@@ -1,12 +1,18 @@
+import uuid
+
+from django.core.cache import cache
 from django.test import TestCase, RequestFactory, Client
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from blog.forms import CreateBlogPostForm, SignUpForm
-from blog.models import Post
+from blog.models import Category, Comment, Post
 from blog.views import HomePageView
 
 class HomePageViewTestCase(TestCase):
     def setUp(self):
+        # Versions are bumped on commit, which a TestCase never reaches, so
+        # fragments cached by earlier tests would otherwise still be served.
+        cache.clear()
         # Create a test user
         self.user = get_user_model().objects.create_user(
             email='testuser@example.com',
@@ -44,6 +50,25 @@ class HomePageViewTestCase(TestCase):
         self.assertNotContains(response, self.post2.title)  # Ensure 'Another Post' is not in response
         self.assertNotContains(response, 'Another Post')    # Check for the title explicitly, instead of relying on the self.post2 object
 
+    def test_feed_query_count_is_constant(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            category = Category.objects.create(name='Django')
+            for i in range(10):
+                Post.objects.create(
+                    title=f'Card {i}', content='x' * 5000, author=self.user, category=category
+                )
+        # The page of posts and the (cached) category sidebar.
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('home'))
+        self.assertContains(response, 'Card 9')
+        with self.assertNumQueries(1):
+            self.client.get(reverse('home'))
+
+    def test_feed_does_not_load_content(self):
+        with self.assertNumQueries(2) as captured:
+            self.client.get(reverse('home'))
+        self.assertNotIn('"content"', captured.captured_queries[0]['sql'])
+
 
 class SignUpPageViewTestCase(TestCase):
     def setUp(self):
@@ -177,3 +202,57 @@ class CreateBlogPostViewTestCase(TestCase):
 
         
         self.assertFalse(Post.objects.filter(title=invalid_post_data['title']).exists())
+
+
+class PostDetailViewTestCase(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testuser@example.com',
+            password='password',
+            first_name='Ada'
+        )
+        self.category = Category.objects.create(name='Django')
+        self.post = Post.objects.create(
+            title='Detail Post',
+            content='Content of the detail post',
+            author=self.user,
+            category=self.category
+        )
+        self.url = reverse('post_detail', kwargs={'pk': self.post.pk})
+
+    def test_get_post_detail(self):
+        Comment.objects.create(post=self.post, name='Commenter', body='First!')
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Detail Post')
+        self.assertContains(response, 'Ada')
+        self.assertContains(response, 'Discussion (1)')
+        self.assertContains(response, 'First!')
+
+    def test_comments_are_cursor_paginated(self):
+        for i in range(30):
+            Comment.objects.create(post=self.post, name='Commenter', body=f'Comment {i}')
+        response = self.client.get(self.url)
+        page = response.context['page']
+        self.assertEqual(len(page), 25)
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(self.url, {'after': page.next_cursor})
+        self.assertEqual(len(response.context['page']), 5)
+        self.assertContains(response, 'Comment 29')
+
+    def test_missing_post_is_404(self):
+        response = self.client.get(reverse('post_detail', kwargs={'pk': uuid.uuid4()}))
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_comment_redirects_to_detail(self):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('create_comment', kwargs={'post_id': self.post.pk}),
+            {'name': 'Commenter', 'body': 'Great post'}
+        )
+        self.assertRedirects(response, self.url)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
@@ -0,0 +1,124 @@
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+THROTTLE_KEY = "blog:throttle:{scope}:{kind}:{identity}"
+
+PERIODS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400}
+
+
+def parse_rate(rate):
+    """
+    Turn a ``"<requests>/<period>"`` rate such as ``"5/min"`` into the
+    bucket's ``(capacity, tokens refilled per second)``.
+    """
+
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period]
+
+
+def client_ip(request):
+    return request.META.get("REMOTE_ADDR") or "unknown"
+
+
+def consume(scope, identities, rates, now=None):
+    """
+    Take one token from the bucket of every ``kind: identity`` pair in
+    ``identities`` and return 0, or return the seconds until all of them
+    have a token again, without taking any.
+
+    All buckets are read and written with a single cache round trip each.
+    The read-modify-write is not atomic, so concurrent requests may slip a
+    few extra attempts through; the buckets still bound the sustained rate.
+    """
+
+    now = time.time() if now is None else now
+    buckets = {
+        THROTTLE_KEY.format(scope=scope, kind=kind, identity=identity): parse_rate(rates[kind])
+        for kind, identity in identities.items()
+        if identity and kind in rates
+    }
+    if not buckets:
+        return 0
+
+    stored = cache.get_many(buckets)
+    state, wait = {}, 0.0
+    for key, (capacity, refill) in buckets.items():
+        tokens, updated = stored.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill)
+        if tokens < 1:
+            wait = max(wait, (1 - tokens) / refill)
+        state[key] = (tokens, capacity, refill)
+    if wait:
+        return math.ceil(wait)
+
+    cache.set_many(
+        {
+            key: (tokens - 1, now)
+            for key, (tokens, capacity, refill) in state.items()
+        },
+        # A bucket left alone long enough to refill completely is the
+        # same as no bucket at all.
+        timeout=max(math.ceil(capacity / refill) for tokens, capacity, refill in state.values()),
+    )
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        "Too many attempts. Please try again later.\n",
+        content_type="text/plain; charset=utf-8",
+        status=429,
+    )
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+
+class ThrottleMixin:
+    """
+    Rate limit a view with token buckets per client IP and any other
+    identities the view extracts from the request, before the view does
+    any (expensive) work.
+
+    The rates come from the view's ``throttle_rates`` or else from
+    ``BLOG_THROTTLE_RATES[throttle_scope]``, e.g. ``{"ip": "20/min"}``.
+    """
+
+    throttle_scope = None
+    throttle_rates = None
+    throttle_methods = ("POST",)
+
+    def get_throttle_rates(self):
+        if self.throttle_rates is not None:
+            return self.throttle_rates
+        return getattr(settings, "BLOG_THROTTLE_RATES", {}).get(self.throttle_scope, {})
+
+    def get_throttle_identities(self, request):
+        return {"ip": client_ip(request)}
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in self.throttle_methods:
+            retry_after = consume(
+                self.throttle_scope,
+                self.get_throttle_identities(request),
+                self.get_throttle_rates(),
+            )
+            if retry_after:
+                return too_many_requests(retry_after)
+        return super().dispatch(request, *args, **kwargs)
+
+
+class EmailThrottleMixin(ThrottleMixin):
+    """
+    Throttle per client IP and per submitted email address, so a single
+    account cannot be guessed at from many addresses either.
+    """
+
+    def get_throttle_identities(self, request):
+        identities = super().get_throttle_identities(request)
+        identities["email"] = request.POST.get("email", "").strip().lower()[:254]
+        return identities
@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+
+@contextmanager
+def preserve_timestamps(model):
+    """
+    Stop auto_now/auto_now_add fields from overwriting the timestamps set on
+    rows while they are bulk inserted, e.g. by an import or a benchmark seed.
+    """
+
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False)
+    ]
+    saved = [(field, field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
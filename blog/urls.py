@@ -1,20 +1,58 @@
+from django.conf import settings
 from django.urls import path
-from blog.views import (CreateComment, HomePageView, SignUpPageView, LoginPageView,
-                        LogoutView, CreateBlogPostView)
+from blog.feeds import AuthorFeedView, CategoryFeedView, FeedView
+from blog.views import (AsyncHomePageView, AsyncPostDetailView, AuthorPostsView,
+                        CategoryDetailView, CategoryListView, CreateComment, HomePageView,
+                        SignUpPageView, LoginPageView, LogoutView, CreateBlogPostView,
+                        PostDetailView, ProfileView, cache_stats, suggest_posts)
+
+
+def template_engine(name):
+    """
+    Return the template engine of the view with the given URL name: the
+    Jinja2 one when it is listed in the BLOG_JINJA2_VIEWS setting.
+    """
+
+    return "jinja2" if name in getattr(settings, "BLOG_JINJA2_VIEWS", []) else None
+
+
+def select_view(name, sync_view, async_view):
+    """
+    Pick the async-native implementation of a read view when its URL name
+    is listed in the BLOG_ASYNC_VIEWS setting.
+    """
+
+    async_views = getattr(settings, "BLOG_ASYNC_VIEWS", [])
+    view = async_view if name in async_views else sync_view
+    return view.as_view(template_engine=template_engine(name))
+
 
 urlpatterns = [
-    path('', HomePageView.as_view(), name='home'),
+    path('', select_view('home', HomePageView, AsyncHomePageView), name='home'),
     path('signup/', SignUpPageView.as_view(), name='signup'),
     path('login/', LoginPageView.as_view(), name='login'),
     path('logout/', LogoutView.as_view(), name='logout'),
     path('create/post/', CreateBlogPostView.as_view(), name='create_post'),
-    path('post/<uuid:post_id>/comment/', CreateComment.as_view(), name='create_comment'),
+    path('post/<uuid:pk>/', select_view('post_detail', PostDetailView, AsyncPostDetailView),
+         name='post_detail'),
+    path('post/<uuid:post_id>/comment/',
+         CreateComment.as_view(template_engine=template_engine('create_comment')),
+         name='create_comment'),
+    path('author/<uuid:pk>/', AuthorPostsView.as_view(), name='author_posts'),
+    path('profile/', ProfileView.as_view(), name='profile'),
+    path('categories/', CategoryListView.as_view(), name='category_list'),
+    path('category/<uuid:pk>/', CategoryDetailView.as_view(), name='category_detail'),
+    path('stats/cache/', cache_stats, name='cache_stats'),
+    path('suggest/', suggest_posts, name='suggest'),
+    path('feeds/<str:format>/', FeedView.as_view(), name='feed'),
+    path('feeds/category/<uuid:pk>/<str:format>/', CategoryFeedView.as_view(),
+         name='category_feed'),
+    path('feeds/author/<uuid:pk>/<str:format>/', AuthorFeedView.as_view(), name='author_feed'),
     # path('register/', register, name='register'),
     # path('login/', CustomLoginView.as_view(), name='login'),
     # path('logout/', LogoutView.as_view(next_page='login'), name='logout'),
     # path('profile/', profile, name='profile'),
     # path('post/create/', views.create_post, name='create_post'),
     # path('category/create/', views.create_category, name='create_category'),
-    # path('post/<int:pk>/', post_detail, name='post_detail'),
     # path('post/<int:pk>/edit/', edit_post, name='edit_post'),
 ]
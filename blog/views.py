@@ -1,3 +1,5 @@
+import uuid
+
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import get_object_or_404, render, redirect
 from django.db.models import Q
@@ -5,31 +7,282 @@ from django.contrib import messages
 from django.views.generic import TemplateView
 from blog.forms import CreateCommentForm, SignUpForm, CreateBlogPostForm
 from django.contrib.auth.mixins import LoginRequiredMixin
-from blog.models import Post
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, JsonResponse
+from django.conf import settings
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_GET
+from asgiref.sync import sync_to_async
+from blog.cache import (aget_category_sidebar, arender_post_cards, get_author_summary,
+                        get_category_sidebar, post_card_stats, render_post_cards)
+from blog.comment_buffer import (get_comment_buffer, get_pending_comments, has_pending_comments,
+                                 remember_pending_comment, write_behind_enabled)
+from blog.conditional import ConditionalGetMixin, is_authenticated
+from blog.models import AuthorStats, Category, Comment, Post
+from blog.pagination import CursorPage, CursorPaginationMixin
+from blog.search import get_search_backend
+from blog.suggest import get_suggestion_index
+from blog.throttling import EmailThrottleMixin
+from blog.windows import FeedWindowMixin
+
+
+async def arender(request, template_name, context, using=None):
+    """
+    Render a template from an async view. The templates read request.user,
+    which is lazy and may query the session and user tables, so it is
+    resolved in a worker thread first.
+    """
 
+    await sync_to_async(is_authenticated)(request)
+    return render(request, template_name, context, using=using)
 
-class HomePageView(TemplateView):
+
+class HomePageView(FeedWindowMixin, ConditionalGetMixin, CursorPaginationMixin, TemplateView):
     template_name = "homepage.html"
+    search_results_limit = 50
+
+    def get_posts(self):
+        return Post.objects.for_feed()
+
+    def search_posts(self, posts, query):
+        # Search results are ranked by relevance rather than recency, so
+        # they are capped to the top matches instead of cursor-paginated.
+        return get_search_backend().search(posts, query)[:self.search_results_limit]
+
+    def get_feed_context(self, page, cards, query, categories, window=None):
+        return {
+            "posts": page,
+            "cards": cards,
+            "page": page,
+            "query": query,
+            "categories": categories,
+            "window": window,
+        }
 
     def get(self, request, *args, **kwargs):
         query = request.GET.get('q', '')
-        if query:
-            posts = Post.objects.filter(
-                title__icontains=query
-            )
+        window = self.get_window(request)
+        posts = self.get_posts()
+        if window is not None:
+            posts = window.filter(posts)
+
+        def get_page():
+            if query:
+                return CursorPage(list(self.search_posts(posts, query)))
+            return self.paginate_queryset(request, posts)
+
+        if window is None:
+            page = get_page()
+        else:
+            page = self.window_page(request, window, get_page)
+        context = self.get_feed_context(
+            page,
+            render_post_cards(page.object_list, using=self.template_engine),
+            query,
+            get_category_sidebar(),
+            window,
+        )
+        return render(request, self.template_name, context, using=self.template_engine)
+
+
+class AsyncHomePageView(HomePageView):
+    __doc__ = """Async-native variant of the homepage feed and search"""
+
+    async def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '')
+        window = self.get_window(request)
+        posts = self.get_posts()
+        if window is not None:
+            posts = window.filter(posts)
+
+        async def get_page():
+            if query:
+                return CursorPage([
+                    post async for post in self.search_posts(posts, query).aiterator()
+                ])
+            return await self.apaginate_queryset(request, posts)
+
+        if window is None:
+            page = await get_page()
+        else:
+            page = await self.awindow_page(request, window, get_page)
+        context = self.get_feed_context(
+            page,
+            await arender_post_cards(page.object_list, using=self.template_engine),
+            query,
+            await aget_category_sidebar(),
+            window,
+        )
+        return await arender(request, self.template_name, context, using=self.template_engine)
+
+
+class PostDetailView(ConditionalGetMixin, CursorPaginationMixin, TemplateView):
+    __doc__ = """This view shows a post with a page of its comments"""
+    template_name = "blog/post_data.html"
+    paginate_by = 25
+    paginate_ordering = ("created_at", "id")
+
+    def get_post_queryset(self):
+        return Post.objects.select_related("author", "category")
+
+    def get_comments(self, post):
+        # Comments are read straight off the (post, created_at) index one
+        # page at a time; the total comes from the denormalized counter.
+        return Comment.objects.filter(post=post).only(
+            "id", "name", "body", "created_at"
+        )
+
+    def has_private_changes(self, request):
+        # Buffered comments are only shown to their author until flushed.
+        return has_pending_comments(request)
+
+    def get(self, request, *args, **kwargs):
+        post = get_object_or_404(self.get_post_queryset(), pk=self.kwargs['pk'])
+        context = {
+            "post": post,
+            "page": self.paginate_queryset(request, self.get_comments(post)),
+            "pending_comments": get_pending_comments(request, post),
+        }
+        return render(request, self.template_name, context, using=self.template_engine)
+
+
+class AsyncPostDetailView(PostDetailView):
+    __doc__ = """Async-native variant of the post detail page"""
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            post = await self.get_post_queryset().aget(pk=self.kwargs['pk'])
+        except Post.DoesNotExist:
+            raise Http404("No Post matches the given query.")
+        context = {
+            "post": post,
+            "page": await self.apaginate_queryset(request, self.get_comments(post)),
+            "pending_comments": await sync_to_async(get_pending_comments)(request, post),
+        }
+        return await arender(request, self.template_name, context, using=self.template_engine)
+
+
+class CategoryListView(ConditionalGetMixin, TemplateView):
+    __doc__ = """This view lists every category with its number of posts"""
+    template_name = "blog/category_list.html"
+
+    def get(self, request, *args, **kwargs):
+        categories = Category.objects.select_related("counts").order_by("name")
+        return render(request, self.template_name, {"categories": categories})
+
+
+class CategoryDetailView(FeedWindowMixin, ConditionalGetMixin, CursorPaginationMixin, TemplateView):
+    __doc__ = """This view shows the posts of one category, newest first"""
+    template_name = "blog/category_detail.html"
+
+    def get_posts(self, category):
+        # Filtering on the category and paging by (created_at, id) reads
+        # straight off the (category, created_at) index.
+        return Post.objects.for_feed().filter(category=category)
+
+    def get(self, request, *args, **kwargs):
+        category = get_object_or_404(
+            Category.objects.select_related("counts"), pk=self.kwargs['pk']
+        )
+        window = self.get_window(request)
+        posts = self.get_posts(category)
+        if window is None:
+            page = self.paginate_queryset(request, posts)
         else:
-            posts = Post.objects.all()
-        
+            page = self.window_page(
+                request, window, lambda: self.paginate_queryset(request, window.filter(posts))
+            )
         context = {
-            "posts": posts,
-            "query": query
+            "category": category,
+            "page": page,
+            "cards": render_post_cards(page.object_list),
+            "categories": get_category_sidebar(),
+            "window": window,
         }
         return render(request, self.template_name, context)
 
 
-class SignUpPageView(TemplateView):
+class AuthorPostsView(ConditionalGetMixin, CursorPaginationMixin, TemplateView):
+    __doc__ = """This view lists the posts of one author, newest first"""
+    template_name = "blog/author_posts.html"
+
+    def get_conditional_scope(self):
+        # Only this author's changes (and category renames shown on the
+        # cards) touch the page.
+        return [f"author:{self.kwargs['pk']}", "categories"]
+
+    def scope_exists(self):
+        return AuthorStats.objects.filter(pk=self.kwargs['pk']).exists()
+
+    def get_posts(self, author_id):
+        # Filtering on the author and paging by (created_at, id) reads
+        # straight off the (author, created_at) index.
+        return Post.objects.for_feed().filter(author_id=author_id)
+
+    def get(self, request, *args, **kwargs):
+        author = get_author_summary(self.kwargs['pk'])
+        if author is None:
+            raise Http404("No author matches the given query.")
+        page = self.paginate_queryset(request, self.get_posts(author["id"]))
+        context = {
+            "author": author,
+            "page": page,
+            "cards": render_post_cards(page.object_list),
+        }
+        return render(request, self.template_name, context)
+
+
+class ProfileView(LoginRequiredMixin, TemplateView):
+    __doc__ = """This view shows the logged-in user's profile"""
+    template_name = "auth/profile.html"
+
+    def get(self, request, *args, **kwargs):
+        context = {"author": get_author_summary(request.user.pk)}
+        return render(request, self.template_name, context)
+
+
+@staff_member_required
+def cache_stats(request):
+    return JsonResponse({"post_cards": post_card_stats.as_dict()})
+
+
+# Stands in for the post id in the reversed detail URL.
+SUGGEST_URL_PLACEHOLDER = uuid.UUID(int=0)
+
+
+@require_GET
+def suggest_posts(request):
+    """
+    Suggest posts whose title has a word starting with ``q``, for search as
+    you type. Answered from the in-process title index, not the database.
+    """
+
+    index = get_suggestion_index()
+    index.refresh_if_stale(getattr(settings, "BLOG_SUGGEST_REFRESH_SECONDS", 10))
+    max_limit = getattr(settings, "BLOG_SUGGEST_LIMIT", 10)
+    try:
+        limit = min(int(request.GET.get("limit", max_limit)), max_limit)
+    except ValueError:
+        limit = max_limit
+    query = request.GET.get("q", "")[:100]
+
+    url = reverse("post_detail", kwargs={"pk": SUGGEST_URL_PLACEHOLDER})
+    results = []
+    for post_id, title in index.suggest(query, limit):
+        post_id = str(post_id)
+        results.append({
+            "id": post_id, "title": title, "url": url.replace(str(SUGGEST_URL_PLACEHOLDER), post_id),
+        })
+    response = JsonResponse({"query": query, "results": results})
+    patch_cache_control(response, public=True, max_age=getattr(settings, "BLOG_SUGGEST_MAX_AGE", 30))
+    return response
+
+
+class SignUpPageView(EmailThrottleMixin, TemplateView):
     __doc__ = """ This endpoint shows the SignUp page """
     template_name = "auth/signup.html"
+    throttle_scope = "signup"
 
     def get(self, request, *args, **kwargs):
         # if the user is logged in redirecting user to appropriate view via login
@@ -54,9 +307,10 @@ class SignUpPageView(TemplateView):
         return render(request, self.template_name, context)
 
 
-class LoginPageView(TemplateView):
+class LoginPageView(EmailThrottleMixin, TemplateView):
     __doc__ = """This view shows the Login Page"""
     template_name = "auth/login.html"
+    throttle_scope = "login"
 
     def get(self, request, *args, **kwargs):
 
@@ -133,8 +387,17 @@ class CreateComment(LoginRequiredMixin, TemplateView):
 
     def post(self, request, *args, **kwargs):
         post_id = self.kwargs['post_id']
-        post = get_object_or_404(Post, id=post_id)
         form = self.form_class(request.POST)
+        if write_behind_enabled() and form.is_valid():
+            # The post is not looked up; comments on a post deleted in the
+            # meantime are dropped when the buffer is flushed.
+            entry = get_comment_buffer().add(
+                post_id, form.cleaned_data['name'], form.cleaned_data['body']
+            )
+            remember_pending_comment(request, entry)
+            return redirect('post_detail', pk=post_id)
+
+        post = get_object_or_404(Post, id=post_id)
         if form.is_valid():
             comment = form.save(commit=False)
             comment.post = post
@@ -0,0 +1,212 @@
+import datetime
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from blog.cache import get_content_versions, refill_reads
+from blog.models import Post
+from blog.pagination import CursorPage
+
+DAY_SCOPE = "day:{}"
+FEED_WINDOW_KEY = "blog:feed-window:{}"
+
+# Preset windows and how many days, today included, each one spans.
+WINDOW_DAYS = {"day": 1, "week": 7, "month": 30}
+
+# Custom ranges are limited to days a post can have been created on, which
+# also keeps their bounds clear of the ends of the datetime range in every
+# time zone.
+EARLIEST_WINDOW_DAY = datetime.date(1970, 1, 1)
+
+
+class InvalidWindow(Exception):
+    pass
+
+
+def day_scope(moment):
+    """
+    Return the version scope of the day, in the current time zone, that
+    ``moment`` falls on.
+    """
+
+    return DAY_SCOPE.format(timezone.localdate(moment))
+
+
+class FeedWindow:
+    """
+    A range of whole days, in the current time zone, that a feed is limited
+    to: one of the presets in WINDOW_DAYS ending today, or custom dates.
+
+    The window bounds ``created_at`` on both sides, so a windowed feed is
+    read with a range scan on the index that leads with ``created_at`` (or
+    follows the category or author in the composite ones). Every day has
+    its own version scope, bumped when a post created that day changes.
+    """
+
+    def __init__(self, first_day, last_day, name=None):
+        self.first_day = first_day
+        self.last_day = last_day
+        self.name = name
+
+    @property
+    def since(self):
+        return timezone.make_aware(datetime.datetime.combine(self.first_day, datetime.time.min))
+
+    @property
+    def until(self):
+        day_after = self.last_day + datetime.timedelta(days=1)
+        return timezone.make_aware(datetime.datetime.combine(day_after, datetime.time.min))
+
+    @property
+    def scopes(self):
+        days = (self.last_day - self.first_day).days + 1
+        return [
+            DAY_SCOPE.format(self.first_day + datetime.timedelta(days=offset))
+            for offset in range(days)
+        ]
+
+    @property
+    def params(self):
+        """
+        The query string parameters that select this window.
+        """
+
+        if self.name:
+            return {"window": self.name}
+        return {"from": self.first_day.isoformat(), "to": self.last_day.isoformat()}
+
+    def filter(self, queryset):
+        return queryset.filter(created_at__gte=self.since, created_at__lt=self.until)
+
+
+def parse_window(params, today=None):
+    """
+    Return the FeedWindow selected by ``?window=day|week|month`` or by
+    ``?from=YYYY-MM-DD&to=YYYY-MM-DD`` (``to`` defaults to today), or
+    ``None`` for an unbounded feed.
+
+    Custom ranges must lie between EARLIEST_WINDOW_DAY and today and span
+    at most BLOG_FEED_WINDOW_MAX_DAYS.
+    """
+
+    today = today or timezone.localdate()
+    name = params.get("window")
+    if name:
+        if name not in WINDOW_DAYS:
+            raise InvalidWindow(name)
+        return FeedWindow(today - datetime.timedelta(days=WINDOW_DAYS[name] - 1), today, name)
+
+    first, last = params.get("from"), params.get("to")
+    if not first and not last:
+        return None
+    try:
+        first_day = parse_date(first or "")
+        last_day = parse_date(last) if last else today
+    except ValueError:
+        raise InvalidWindow(first, last)
+    if first_day is None or last_day is None:
+        raise InvalidWindow(first, last)
+    if not EARLIEST_WINDOW_DAY <= first_day <= last_day <= today:
+        raise InvalidWindow(first, last)
+    if (last_day - first_day).days >= getattr(settings, "BLOG_FEED_WINDOW_MAX_DAYS", 366):
+        raise InvalidWindow(first, last)
+    return FeedWindow(first_day, last_day)
+
+
+def feed_window_timeout():
+    return getattr(settings, "BLOG_FEED_WINDOW_CACHE_TIMEOUT", 60 * 60 * 24)
+
+
+class FeedWindowMixin:
+    """
+    Mixin for feed views that can be limited to a FeedWindow. It goes
+    before ConditionalGetMixin, whose validators it extends with the
+    window's days.
+
+    The ids and cursors of each page of a windowed feed are cached under
+    the versions of the window's days, so a post change only invalidates
+    the windows its creation day falls in, and a cached page costs a
+    primary key lookup instead of the range scan or search.
+    """
+
+    # Query string parameters that, with the path, select a page.
+    window_page_params = ("q", "after", "before")
+
+    def get_window(self, request):
+        try:
+            return parse_window(request.GET)
+        except InvalidWindow:
+            raise Http404("Invalid time window.")
+
+    def get_conditional_scope(self):
+        # A preset window covers other days once the date changes, under
+        # the same URL; its day scopes keep yesterday's ETag from matching.
+        scope = super().get_conditional_scope()
+        window = self.get_window(self.request)
+        if window is None:
+            return scope
+        return [*([scope] if isinstance(scope, str) else scope), *window.scopes]
+
+    def window_page_key(self, request, window, versions=None):
+        if versions is None:
+            versions = get_content_versions(window.scopes)
+        payload = json.dumps([
+            request.path,
+            [request.GET.get(name, "") for name in self.window_page_params],
+            getattr(self, "paginate_by", None),
+            window.first_day.isoformat(),
+            window.last_day.isoformat(),
+            [versions[scope] for scope in window.scopes],
+        ])
+        digest = hashlib.md5(payload.encode(), usedforsecurity=False).hexdigest()
+        return FEED_WINDOW_KEY.format(digest)
+
+    def get_window_posts(self, post_ids):
+        return Post.objects.for_feed().filter(pk__in=post_ids)
+
+    def window_page(self, request, window, get_page):
+        """
+        Return the page ``get_page()`` builds for the request, or the same
+        page rebuilt from the post ids cached by an earlier request.
+        """
+
+        versions = get_content_versions(window.scopes)
+        key = self.window_page_key(request, window, versions)
+        cached = cache.get(key)
+        if cached is not None:
+            post_ids, next_cursor, previous_cursor = cached
+            posts = {post.pk: post for post in self.get_window_posts(post_ids)}
+            return CursorPage(
+                [posts[pk] for pk in post_ids if pk in posts], next_cursor, previous_cursor
+            )
+        with refill_reads(versions.values()):
+            page = get_page()
+        cache.set(
+            key, ([post.pk for post in page], page.next_cursor, page.previous_cursor),
+            feed_window_timeout(),
+        )
+        return page
+
+    async def awindow_page(self, request, window, get_page):
+        versions = await sync_to_async(get_content_versions)(window.scopes)
+        key = self.window_page_key(request, window, versions)
+        cached = await cache.aget(key)
+        if cached is not None:
+            post_ids, next_cursor, previous_cursor = cached
+            posts = {post.pk: post async for post in self.get_window_posts(post_ids)}
+            return CursorPage(
+                [posts[pk] for pk in post_ids if pk in posts], next_cursor, previous_cursor
+            )
+        with refill_reads(versions.values()):
+            page = await get_page()
+        await cache.aset(
+            key, ([post.pk for post in page], page.next_cursor, page.previous_cursor),
+            feed_window_timeout(),
+        )
+        return page
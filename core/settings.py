@@ -33,6 +33,20 @@ ALLOWED_HOSTS = ["*"]
 
 AUTH_USER_MODEL = "blog.User"
 
+# The cached backend serves session users from the cache. ModelBackend stays
+# listed for one release so the sessions it logged in remain valid (Django
+# drops sessions whose backend is not listed); the cached backend ends
+# failed logins itself, so wrong passwords are still hashed only once.
+AUTHENTICATION_BACKENDS = [
+    'blog.auth_backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+BLOG_USER_CACHE_TIMEOUT = 300
+
+# Sessions are read from the cache and written through to the database.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -49,7 +63,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.middleware.PrecompressedStaticMiddleware',
+    'blog.middleware.RequestMetricsMiddleware',
+    'blog.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.ReplicaPinningMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -63,7 +81,8 @@ ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'blog.instrumentation.InstrumentedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -75,8 +94,28 @@ TEMPLATES = [
             ],
         },
     },
+    # Jinja2 ports of the hottest templates (blog/jinja2/), used by the
+    # views listed in BLOG_JINJA2_VIEWS.
+    {
+        'BACKEND': 'blog.instrumentation.InstrumentedJinja2',
+        'NAME': 'jinja2',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'environment': 'blog.jinja2_env.environment',
+        },
+    },
 ]
 
+# URL names of the views rendered with the Jinja2 engine instead of the
+# Django one, e.g. BLOG_JINJA2_VIEWS=home,post_detail,create_comment.
+BLOG_JINJA2_VIEWS = [name for name in os.getenv('BLOG_JINJA2_VIEWS', '').split(',') if name]
+
+# Compiled Jinja2 templates are cached here across restarts.
+BLOG_JINJA2_BYTECODE_CACHE_DIR = os.getenv(
+    'BLOG_JINJA2_BYTECODE_CACHE_DIR', BASE_DIR / 'var' / 'jinja2-cache'
+)
+
 WSGI_APPLICATION = 'core.wsgi.application'
 
 TAILWIND_APP_NAME = 'theme'
@@ -99,6 +138,62 @@ DATABASES = {
     }
 }
 
+# Read replicas of the default database, e.g.
+# POSTGRES_REPLICA_HOSTS=replica-1,replica-2. Safe requests read from them
+# through blog.routers.PrimaryReplicaRouter; writes always go to default.
+DATABASE_REPLICAS = []
+for index, host in enumerate(filter(None, os.getenv('POSTGRES_REPLICA_HOSTS', '').split(',')), 1):
+    DATABASES[f'replica{index}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['blog.routers.PrimaryReplicaRouter']
+
+# How long a client's reads stay on the primary after it writes something,
+# and the cache refills under a newly bumped version (so they do not cache
+# a lagging replica's rows).
+BLOG_REPLICA_STICKY_SECONDS = int(os.getenv('BLOG_REPLICA_STICKY_SECONDS', 5))
+
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('DJANGO_CACHE_LOCATION', ''),
+    }
+}
+
+BLOG_POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+BLOG_FEED_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_FEED_MAX_AGE = 300
+# Scheme and host the feeds' absolute links are built from, e.g.
+# https://blog.example.com; when empty, the request's Host header is used.
+BLOG_SITE_URL = os.getenv('BLOG_SITE_URL', '')
+
+# Time-windowed feed pages (?window=day|week|month, ?from=&to=) are cached
+# per window and invalidated by changes to posts created inside it.
+BLOG_FEED_WINDOW_CACHE_TIMEOUT = 60 * 60 * 24
+BLOG_FEED_WINDOW_MAX_DAYS = 366
+
+# Search-as-you-type title suggestions are served from an in-process index
+# of at most BLOG_SUGGEST_MAX_BYTES (estimated), rebuilt when another
+# process changed posts, checked every BLOG_SUGGEST_REFRESH_SECONDS.
+BLOG_SUGGEST_MAX_BYTES = int(os.getenv('BLOG_SUGGEST_MAX_BYTES', 32 * 2 ** 20))
+BLOG_SUGGEST_MAX_WORDS = 8
+BLOG_SUGGEST_LIMIT = 10
+BLOG_SUGGEST_REFRESH_SECONDS = int(os.getenv('BLOG_SUGGEST_REFRESH_SECONDS', 10))
+BLOG_SUGGEST_MAX_AGE = 30
+
+# URL names of the read views served by their async-native implementation,
+# e.g. BLOG_ASYNC_VIEWS=home,post_detail when running under ASGI.
+BLOG_ASYNC_VIEWS = [name for name in os.getenv('BLOG_ASYNC_VIEWS', '').split(',') if name]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -136,6 +231,24 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+STATIC_ROOT = os.getenv('BLOG_STATIC_ROOT', BASE_DIR / 'staticfiles')
+
+# Collect static files under content-hashed names, with .br and .gz
+# variants of everything compressible written next to them.
+BLOG_STATIC_PRECOMPRESSED = os.getenv('BLOG_STATIC_PRECOMPRESSED', 'false').lower() == 'true'
+
+if BLOG_STATIC_PRECOMPRESSED:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'blog.storage.CompressedManifestStaticFilesStorage'},
+    }
+
+# Serve STATIC_ROOT from the app itself, precompressed variants first.
+BLOG_SERVE_STATIC = os.getenv('BLOG_SERVE_STATIC', str(BLOG_STATIC_PRECOMPRESSED)).lower() == 'true'
+
+# Cache lifetime of static files without a content hash in their name.
+BLOG_STATIC_MAX_AGE = int(os.getenv('BLOG_STATIC_MAX_AGE', 60 * 60))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -144,3 +257,75 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_URL = 'login'
 
 LOGOUT_REDIRECT_URL = 'login'
+
+
+# Request instrumentation
+
+# Add a Server-Timing header with the per-request query/template/view timings.
+BLOG_SERVER_TIMING = os.getenv('BLOG_SERVER_TIMING', 'true').lower() == 'true'
+
+# Requests slower than this log their most expensive SQL fingerprints.
+BLOG_SLOW_REQUEST_MS = int(os.getenv('BLOG_SLOW_REQUEST_MS', 500))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Set BLOG_REQUEST_LOG_LEVEL=INFO to log one line per request.
+        'blog.requests': {
+            'handlers': ['console'],
+            'level': os.getenv('BLOG_REQUEST_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# Response compression
+
+# Compress text responses of at least BLOG_COMPRESSION_MIN_BYTES with brotli
+# (if installed) or gzip. The levels trade CPU time for size on every
+# request; static files are compressed ahead of time instead.
+BLOG_COMPRESSION = os.getenv('BLOG_COMPRESSION', 'true').lower() == 'true'
+BLOG_COMPRESSION_MIN_BYTES = int(os.getenv('BLOG_COMPRESSION_MIN_BYTES', 512))
+BLOG_BROTLI_QUALITY = int(os.getenv('BLOG_BROTLI_QUALITY', 5))
+BLOG_GZIP_LEVEL = int(os.getenv('BLOG_GZIP_LEVEL', 6))
+
+# Collapse runs of whitespace in HTML responses of at least
+# BLOG_COLLAPSE_WHITESPACE_MIN_BYTES before compressing them.
+BLOG_COLLAPSE_WHITESPACE = os.getenv('BLOG_COLLAPSE_WHITESPACE', 'false').lower() == 'true'
+BLOG_COLLAPSE_WHITESPACE_MIN_BYTES = int(os.getenv('BLOG_COLLAPSE_WHITESPACE_MIN_BYTES', 1024))
+
+
+# Write-behind comments
+
+# Queue new comments in a local, journaled buffer and insert them in batches
+# instead of one INSERT per request. Authors see their pending comments
+# right away; everyone else once the buffer has been flushed.
+BLOG_COMMENT_WRITE_BEHIND = os.getenv('BLOG_COMMENT_WRITE_BEHIND', 'false').lower() == 'true'
+BLOG_COMMENT_BATCH_SIZE = int(os.getenv('BLOG_COMMENT_BATCH_SIZE', 100))
+BLOG_COMMENT_FLUSH_INTERVAL = float(os.getenv('BLOG_COMMENT_FLUSH_INTERVAL', 1.0))
+BLOG_COMMENT_JOURNAL_DIR = os.getenv('BLOG_COMMENT_JOURNAL_DIR', BASE_DIR / 'var' / 'comment-journal')
+BLOG_COMMENT_JOURNAL_FSYNC = os.getenv('BLOG_COMMENT_JOURNAL_FSYNC', 'true').lower() == 'true'
+# Failed flushes after which a journal segment is moved to the dead-letter
+# directory (BLOG_COMMENT_JOURNAL_DIR/dead-letter).
+BLOG_COMMENT_FLUSH_ATTEMPTS = int(os.getenv('BLOG_COMMENT_FLUSH_ATTEMPTS', 5))
+
+
+# Throttling
+
+# Token buckets checked before the password hashing in login and signup,
+# as "<requests>/<s|min|hour|day>" per client IP and per submitted email.
+BLOG_THROTTLE_RATES = {
+    'login': {
+        'ip': os.getenv('BLOG_THROTTLE_LOGIN_IP', '20/min'),
+        'email': os.getenv('BLOG_THROTTLE_LOGIN_EMAIL', '5/min'),
+    },
+    'signup': {
+        'ip': os.getenv('BLOG_THROTTLE_SIGNUP_IP', '5/min'),
+        'email': os.getenv('BLOG_THROTTLE_SIGNUP_EMAIL', '3/hour'),
+    },
+}
@@ -0,0 +1,74 @@
+"""
+Production settings: the defaults from core.settings without the
+development-only apps and middleware (django-tailwind and
+django-browser-reload), with persistent database connections and hashed,
+precompressed static files.
+
+DJANGO_SECRET_KEY must be set, and DJANGO_CACHE_BACKEND must name a cache
+shared by all workers (Redis or memcached): the content versions that
+invalidate cached pages live in the cache, so a per-process LocMemCache
+would leave the other workers serving stale pages.
+
+Used by the production branch of server-entrypoint.sh, e.g.
+DJANGO_SETTINGS_MODULE=core.settings_production.
+"""
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import CACHES, INSTALLED_APPS, MIDDLEWARE, TEMPLATES, DATABASES, os
+from django.core.exceptions import ImproperlyConfigured
+
+DEBUG = False
+
+if not os.getenv('DJANGO_SECRET_KEY'):
+    raise ImproperlyConfigured('Set DJANGO_SECRET_KEY; the development key is public.')
+
+if CACHES['default']['BACKEND'] == 'django.core.cache.backends.locmem.LocMemCache':
+    raise ImproperlyConfigured(
+        'Set DJANGO_CACHE_BACKEND and DJANGO_CACHE_LOCATION to a cache shared by all '
+        'workers, e.g. django.core.cache.backends.redis.RedisCache and redis://redis:6379/0.'
+    )
+
+DEV_APPS = ['tailwind', 'django_browser_reload']
+
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in DEV_APPS]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware != 'django_browser_reload.middleware.BrowserReloadMiddleware'
+]
+
+# The templates still {% load tailwind_tags %}; without the tailwind app
+# that resolves to a plain link to the built stylesheet.
+TEMPLATES = [
+    {
+        **engine,
+        'OPTIONS': {
+            **engine['OPTIONS'],
+            'libraries': {'tailwind_tags': 'blog.templatetags.tailwind_static'},
+        },
+    }
+    if engine['BACKEND'] == 'blog.instrumentation.InstrumentedDjangoTemplates' else engine
+    for engine in TEMPLATES
+]
+
+# Keep database connections open across requests instead of reconnecting
+# every time.
+for database in DATABASES.values():
+    database['CONN_MAX_AGE'] = int(os.getenv('DJANGO_CONN_MAX_AGE', 60))
+    database['CONN_HEALTH_CHECKS'] = True
+
+BLOG_STATIC_PRECOMPRESSED = os.getenv('BLOG_STATIC_PRECOMPRESSED', 'true').lower() == 'true'
+
+if BLOG_STATIC_PRECOMPRESSED:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'blog.storage.CompressedManifestStaticFilesStorage'},
+    }
+
+BLOG_SERVE_STATIC = os.getenv('BLOG_SERVE_STATIC', str(BLOG_STATIC_PRECOMPRESSED)).lower() == 'true'
+
+BLOG_COLLAPSE_WHITESPACE = os.getenv('BLOG_COLLAPSE_WHITESPACE', 'true').lower() == 'true'
+
+# The per-request timings show anyone which pages and parameters are
+# expensive; keep them to development unless asked for.
+BLOG_SERVER_TIMING = os.getenv('BLOG_SERVER_TIMING', 'false').lower() == 'true'
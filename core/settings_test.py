@@ -0,0 +1,24 @@
+"""
+Test settings: the defaults from core.settings on two SQLite files, the
+primary ("default") and a "replica", so the suite runs without PostgreSQL
+and the replica routing can be tested against a real second database.
+
+    python manage.py test blog.tests --settings=core.settings_test
+
+The replica is not a mirror of the primary; the tests that read from it
+enable it themselves with DATABASE_REPLICAS.
+"""
+
+from core.settings import *  # noqa: F401,F403
+from core.settings import BASE_DIR
+
+DATABASES = {
+    alias: {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'var' / f'{alias}.sqlite3',
+        'TEST': {'NAME': BASE_DIR / 'var' / f'test-{alias}.sqlite3'},
+    }
+    for alias in ('default', 'replica')
+}
+
+DATABASE_REPLICAS = []
@@ -14,14 +14,17 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path("__reload__/", include("django_browser_reload.urls")),
     path('', include('blog.urls'))
 ]
 
+if 'django_browser_reload' in settings.INSTALLED_APPS:
+    urlpatterns.insert(1, path("__reload__/", include("django_browser_reload.urls")))
+
 
 #
\ No newline at end of file
@@ -0,0 +1,44 @@
+"""
+Gunicorn configuration for the production server, see the production
+branch of server-entrypoint.sh.
+
+The application is imported, its URLconf loaded and its templates compiled
+once in the master process; the forked workers share that memory and are
+ready to serve as soon as they start.
+"""
+
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Recycle workers now and then to bound slow leaks; the jitter keeps them
+# from restarting all at once.
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+preload_app = True
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+
+def when_ready(server):
+    from django.db import connections
+
+    from blog.startup import warm_up
+
+    warm_up()
+    # Close the connections warming up opened before any worker is forked,
+    # so no worker inherits (and shares) the master's sockets.
+    connections.close_all()
+    # Keep the preloaded objects out of the garbage collector's generations,
+    # so collections in the workers do not touch (and copy) shared pages.
+    gc.freeze()
+
@@ -5,6 +5,24 @@ do
     echo "Waiting for server volume..."
 done
 
+if [ "$BLOG_ENV" = "production" ]
+then
+    # Migrations are generated and reviewed in development, never on boot.
+    export DJANGO_SETTINGS_MODULE=core.settings_production
+
+    until python manage.py migrate --noinput
+    do
+        echo "Waiting for db to be ready..."
+        sleep 2
+    done
+
+    python manage.py collectstatic --no-input
+
+    python manage.py replay_comment_journal
+
+    exec gunicorn --config gunicorn.conf.py core.wsgi:application
+fi
+
 until python manage.py makemigrations --noinput
 do
      echo "Waiting for db to be ready..."
@@ -20,4 +38,6 @@ done
 
 python manage.py collectstatic --no-input
 
+python manage.py replay_comment_journal
+
 python manage.py runserver 0.0.0.0:8000